@@ -0,0 +1,244 @@
+"""
+Account profiles for posting to several brands from one install
+Each profile has its own credentials, queue and plan files, schedule and
+caption style; the runner posts for many accounts concurrently
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import config
+from config import (
+    ACCOUNTS_FILE, ACCOUNT_WORKERS, ACCOUNTS_STATE_DIR,
+    CONTENT_QUEUE_FILE, MEDIA_LINKS_FILE, POSTING_PLAN_FILE, IDENTITY_CACHE_FILE,
+    BLUESKY_SESSION_FILE, POSTING_SLOTS, SELECTION_POLICY
+)
+
+
+# Credential settings every account provides (same names as in config.py)
+CREDENTIAL_KEYS = (
+    'INSTAGRAM_ACCESS_TOKEN', 'INSTAGRAM_PAGE_ID',
+    'TIKTOK_ACCESS_TOKEN', 'TIKTOK_CLIENT_KEY', 'TIKTOK_CLIENT_SECRET', 'TIKTOK_REFRESH_TOKEN',
+    'TUMBLR_CONSUMER_KEY', 'TUMBLR_CONSUMER_SECRET',
+    'TUMBLR_OAUTH_TOKEN', 'TUMBLR_OAUTH_TOKEN_SECRET', 'TUMBLR_BLOG_NAME',
+    'BLUESKY_USERNAME', 'BLUESKY_PASSWORD',
+    'THREADS_ACCESS_TOKEN',
+)
+
+DEFAULT_ACCOUNT_NAME = 'default'
+
+
+class Account:
+    """
+    One posting identity: credentials plus where its state lives
+    """
+
+    def __init__(self, name, credentials, state_dir=None, media_folder='media',
+                 posting_slots=POSTING_SLOTS, selection_policy=SELECTION_POLICY, caption_style=None,
+                 env_prefix=None):
+        self.name = name
+        self.credentials = credentials
+        # Where reload_credentials() re-reads the secrets (None: fixed credentials)
+        self.env_prefix = env_prefix
+        self.media_folder = media_folder
+        self.posting_slots = posting_slots
+        self.selection_policy = selection_policy
+        self.caption_style = caption_style
+
+        if state_dir is None:
+            # The default account keeps the original file locations
+            self.queue_file = CONTENT_QUEUE_FILE
+            self.links_file = MEDIA_LINKS_FILE
+            self.plan_file = POSTING_PLAN_FILE
+            self.identity_cache_file = IDENTITY_CACHE_FILE
+            self.bluesky_session_file = BLUESKY_SESSION_FILE
+        else:
+            self.queue_file = os.path.join(state_dir, 'content_queue.json')
+            self.links_file = os.path.join(state_dir, 'media_links.json')
+            self.plan_file = os.path.join(state_dir, 'posting_plan.json')
+            self.identity_cache_file = os.path.join(state_dir, 'identity_cache.json')
+            # Holds JWTs, so it stays next to the default one (gitignored)
+            self.bluesky_session_file = f".bluesky_session.{name}.json"
+
+    def credential(self, key):
+        """Get one credential value (None if not set)"""
+        return self.credentials.get(key)
+
+    def reload_credentials(self):
+        """
+        Re-read the credentials from the environment after the .env file changed
+
+        Returns:
+            bool: True if the credentials were re-read
+        """
+        if self.env_prefix is None:
+            return False
+        config.reload_env_file()
+        self.credentials = {key: os.getenv(f"{self.env_prefix}{key}") for key in CREDENTIAL_KEYS}
+        return True
+
+    def has_new_media(self):
+        """Check for uploads waiting in the media folder (subfolders belong to other accounts)"""
+        if not os.path.isdir(self.media_folder):
+            return False
+        return any(
+            not name.startswith('.') and os.path.isfile(os.path.join(self.media_folder, name))
+            for name in os.listdir(self.media_folder)
+        )
+
+    def open_queue(self):
+        """Open this account's content queue"""
+        from content_queue import ContentQueue
+        return ContentQueue(self.queue_file, self.links_file, self.selection_policy)
+
+
+def default_account():
+    """
+    The account configured through the regular environment variables
+
+    Returns:
+        Account: Default account
+    """
+    return Account(DEFAULT_ACCOUNT_NAME, {key: getattr(config, key) for key in CREDENTIAL_KEYS}, env_prefix='')
+
+
+def _account_from_profile(profile):
+    """
+    Build an account from one profile entry
+
+    Secrets are never stored in the profile file: they are read from
+    environment variables named <env_prefix><KEY>, e.g. BRAND_A_TIKTOK_ACCESS_TOKEN.
+    """
+    name = profile['name']
+    prefix = profile.get('env_prefix', f"{name.upper()}_")
+    return Account(
+        name,
+        {key: os.getenv(f"{prefix}{key}") for key in CREDENTIAL_KEYS},
+        state_dir=profile.get('state_dir', os.path.join(ACCOUNTS_STATE_DIR, name)),
+        media_folder=profile.get('media_folder', os.path.join('media', name)),
+        posting_slots=profile.get('posting_slots', POSTING_SLOTS),
+        selection_policy=profile.get('selection_policy', SELECTION_POLICY),
+        caption_style=profile.get('caption_style'),
+        env_prefix=prefix
+    )
+
+
+def load_accounts(accounts_file=ACCOUNTS_FILE):
+    """
+    Load account profiles
+
+    Args:
+        accounts_file (str): JSON file with an 'accounts' list
+
+    Returns:
+        list: Accounts (just the default account if there is no profile file)
+    """
+    if not os.path.exists(accounts_file):
+        return [default_account()]
+
+    try:
+        with open(accounts_file, 'r') as f:
+            profiles = json.load(f).get('accounts', [])
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"❌ Could not read {accounts_file}: {e}")
+        return []
+
+    accounts = []
+    for profile in profiles:
+        if profile.get('name') == DEFAULT_ACCOUNT_NAME:
+            accounts.append(default_account())
+        elif profile.get('name'):
+            accounts.append(_account_from_profile(profile))
+        else:
+            print(f"⚠️ Skipping account profile without a name: {profile}")
+    return accounts
+
+
+class AccountRunner:
+    """
+    Posts for many accounts concurrently
+
+    Accounts share one HTTP connection pool; every account gets its own
+    publishers, queue and plan, and a failure in one never stops the others.
+    """
+
+    def __init__(self, accounts, max_workers=ACCOUNT_WORKERS):
+        import requests
+
+        self.accounts = accounts
+        self.max_workers = max(1, min(max_workers, len(accounts) or 1))
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=4 * self.max_workers)
+        self.session.mount('https://', adapter)
+        self._print_lock = threading.Lock()
+
+    def run_account(self, account, due_only=True):
+        """
+        Post the next (or due) item for one account
+
+        Args:
+            account (Account): Account to post for
+            due_only (bool): Only post when a planned slot is due
+
+        Returns:
+            str: Outcome summary
+        """
+        from platform_publishers import PublisherRegistry
+        from posting import get_due_content, post_content
+        from scheduler import PostingScheduler
+
+        queue = account.open_queue()
+        platforms = None
+        scheduler = None
+        if due_only:
+            scheduler = PostingScheduler(queue, account.plan_file, account.posting_slots, account.selection_policy)
+            content, platforms = get_due_content(queue, scheduler)
+            if not content:
+                return "nothing due"
+        else:
+            content = queue.get_next_content()
+            if not content:
+                return "queue empty"
+
+        registry = PublisherRegistry(account=account, session=self.session)
+        try:
+            results = post_content(queue, content, registry, platforms)
+        finally:
+            registry.shutdown()
+
+        if results is None:
+            return f"failed to post {content['filename']}"
+        if scheduler:
+            scheduler.mark_posted(content['id'])
+        queue.cleanup_old_posted(30)
+        failed = [platform for platform, result in results.items() if result is None]
+        return f"posted {content['filename']}" + (f" ({', '.join(failed)} failed)" if failed else "")
+
+    def run(self, due_only=True):
+        """
+        Run every account once, concurrently
+
+        Args:
+            due_only (bool): Only post for accounts with a due slot
+
+        Returns:
+            dict: account name -> outcome summary
+        """
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='account') as executor:
+            futures = {
+                executor.submit(self.run_account, account, due_only): account
+                for account in self.accounts
+            }
+            for future in as_completed(futures):
+                account = futures[future]
+                try:
+                    outcomes[account.name] = future.result()
+                except Exception as e:
+                    outcomes[account.name] = f"error: {e}"
+                with self._print_lock:
+                    print(f"👤 {account.name}: {outcomes[account.name]}")
+
+        self.session.close()
+        return outcomes
@@ -0,0 +1,111 @@
+"""
+Atomic file writes
+Writes go to a temp file in the same folder and are renamed over the target,
+so a crash or a concurrent reader never sees a half-written file. A lockfile
+serializes read-modify-write updates (e.g. several renewals editing .env)
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an exclusive-create lockfile
+    fcntl = None
+
+
+def _lock_path(path):
+    """Lockfile next to the target: scheduled_posts/x.json -> scheduled_posts/.x.json.lock, .env -> .env.lock"""
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name.lstrip('.')}.lock")
+
+
+@contextmanager
+def file_lock(path, timeout=30):
+    """
+    Hold an exclusive lock on a file while it is read and rewritten
+
+    Args:
+        path (str): File to lock (the lockfile sits next to it)
+        timeout (float): Seconds to wait for another holder
+
+    Raises:
+        TimeoutError: If the lock could not be taken in time
+    """
+    lock_path = _lock_path(path)
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    deadline = time.monotonic() + timeout
+
+    if fcntl is not None:
+        with open(lock_path, 'a') as lock_file:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Timed out waiting for lock on {path}")
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for lock on {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def atomic_write_text(path, text, mode=None):
+    """
+    Replace a file's contents in one step
+
+    Args:
+        path (str): File to write
+        text (str): New contents
+        mode (int): Permission bits (default: keep the existing file's, or 0o644)
+    """
+    folder = os.path.dirname(path) or '.'
+    os.makedirs(folder, exist_ok=True)
+    if mode is None:
+        mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def atomic_write_json(path, data, mode=None, **dump_options):
+    """
+    Replace a JSON file in one step
+
+    Args:
+        path (str): File to write
+        data: JSON-serializable data
+        mode (int): Permission bits (see atomic_write_text)
+        **dump_options: Passed to json.dumps (indent, ensure_ascii, ...)
+    """
+    atomic_write_text(path, json.dumps(data, **dump_options), mode)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+End-to-end posting benchmark against the local mock platforms
+Runs post_to_all_platforms (and media ingestion when boto3 is installed)
+for several media sizes and concurrency levels, each in a fresh process,
+and reports end-to-end latency, p50/p99 per traced stage and peak RSS
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_platforms import start_server, mock_environment
+
+# Platform -> SDK module it needs beyond requests
+PLATFORM_SDKS = {'tumblr': 'pytumblr', 'bluesky': 'atproto'}
+
+MOCK_CREDENTIALS = {
+    'instagram': {'INSTAGRAM_ACCESS_TOKEN': 'mock-token', 'INSTAGRAM_PAGE_ID': 'page1'},
+    'threads': {'THREADS_ACCESS_TOKEN': 'mock-token'},
+    'tiktok': {'TIKTOK_ACCESS_TOKEN': 'mock-token'},
+    'tumblr': {
+        'TUMBLR_CONSUMER_KEY': 'mock', 'TUMBLR_CONSUMER_SECRET': 'mock',
+        'TUMBLR_OAUTH_TOKEN': 'mock', 'TUMBLR_OAUTH_TOKEN_SECRET': 'mock', 'TUMBLR_BLOG_NAME': 'mockblog'
+    },
+    'bluesky': {'BLUESKY_USERNAME': 'bench.mock.social', 'BLUESKY_PASSWORD': 'mock'},
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def make_media(path, size_mb, media_type):
+    """
+    Write a synthetic media file of about size_mb megabytes
+
+    Videos are random bytes (the mock never decodes them); images are
+    noise PNGs so PIL has real pixels to work on.
+    """
+    size = int(size_mb * 1024 * 1024)
+    if media_type == 'video':
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        return
+    from PIL import Image
+    side = max(64, int((size / 3) ** 0.5))
+    Image.frombytes('RGB', (side, side), os.urandom(side * side * 3)).save(path, 'PNG', compress_level=0)
+
+
+def _captions():
+    """Caption data in the shape posting.build_captions returns"""
+    tags = ['mockart', 'benchmark', 'art']
+    return {
+        'base_caption': '(◕‿◕)', 'fun_fact': 'Mock fact.', 'fun_fact_followup': '',
+        'instagram': '(◕‿◕) Mock fact. #mockart', 'tiktok': '(◕‿◕) #mockart',
+        'tumblr': '(◕‿◕) Mock fact.', 'bluesky': '(◕‿◕) Mock fact. #mockart',
+        'threads': '(◕‿◕) Mock fact.', 'bluesky_facets': None,
+        'hashtags': {platform: tags for platform in ('instagram', 'tiktok', 'tumblr', 'bluesky')}
+    }
+
+
+def run_post_stage(args, media_url, workdir):
+    """
+    Post iterations x concurrency items through post_to_all_platforms
+
+    Returns:
+        list: End-to-end seconds per post (download + all platforms)
+    """
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+    from accounts import Account
+    from platform_publishers import PublisherRegistry, post_to_all_platforms
+    from posting import build_content_data
+
+    platforms = args.platforms.split(',')
+    credentials = {}
+    for platform in platforms:
+        credentials.update(MOCK_CREDENTIALS[platform])
+
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=4 * args.concurrency))
+    accounts = [
+        Account(f"bench{worker}", credentials, state_dir=os.path.join(workdir, f"bench{worker}"))
+        for worker in range(args.concurrency)
+    ]
+    registries = [PublisherRegistry(account, session) for account in accounts]
+    extension = '.mp4' if args.media_type == 'video' else '.png'
+
+    def post_once(worker, iteration):
+        started = time.perf_counter()
+        content = {
+            'url': media_url,
+            'local_path': os.path.join(workdir, 'downloads', f"w{worker}_{iteration}{extension}"),
+            'media_type': args.media_type,
+            'filename': f"bench{extension}"
+        }
+        content_data = build_content_data(content, registries[worker].needs_local_file(platforms, content['media_type']))
+        if content_data is None:
+            return time.perf_counter() - started, {platform: None for platform in platforms}
+        results = post_to_all_platforms(content_data, _captions(), registry=registries[worker], platforms=platforms)
+        if content_data['local_path']:
+            os.remove(content_data['local_path'])
+        return time.perf_counter() - started, results
+
+    latencies = []
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for iteration in range(args.iterations):
+            for seconds, results in executor.map(post_once, range(args.concurrency), [iteration] * args.concurrency):
+                latencies.append(seconds)
+                failures += sum(1 for result in results.values() if not result)
+
+    for registry in registries:
+        registry.close()
+    session.close()
+    return latencies, failures
+
+
+def run_ingest_stage(args, workdir):
+    """
+    Run MediaProcessor over fresh media files (resize, S3 upload, captions, queue)
+
+    Returns:
+        list: Seconds per ingested file
+    """
+    from accounts import Account
+    from media_processor import MediaProcessor
+
+    extension = '.mp4' if args.media_type == 'video' else '.png'
+    account = Account('ingest', {}, state_dir=os.path.join(workdir, 'ingest'),
+                      media_folder=os.path.join(workdir, 'ingest_media'))
+    os.makedirs(account.media_folder, exist_ok=True)
+
+    latencies = []
+    for iteration in range(args.iterations):
+        make_media(os.path.join(account.media_folder, f"ingest{iteration}{extension}"), args.size_mb, args.media_type)
+        started = time.perf_counter()
+        MediaProcessor(account).process_media_files()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_child(args):
+    """One measured configuration, in its own process; prints a JSON result"""
+    sys.path.insert(0, REPO_ROOT)
+    import requests
+    import tracing
+
+    workdir = os.getcwd()
+    extension = '.mp4' if args.media_type == 'video' else '.png'
+    source = os.path.join(workdir, f"source{extension}")
+    make_media(source, args.size_mb, args.media_type)
+    media_url = f"{os.environ['S3_URL_BASE']}bench{extension}"
+    with open(source, 'rb') as f:
+        requests.put(media_url, data=f).raise_for_status()
+    tracing.reset()
+
+    result = {'size_mb': args.size_mb, 'concurrency': args.concurrency, 'stages': {}, 'skipped': []}
+    wall_started = time.perf_counter()
+
+    latencies, failures = run_post_stage(args, media_url, workdir)
+    result['post'] = {'count': len(latencies), 'failed_platform_posts': failures, 'latencies': latencies}
+
+    if 'ingest' in args.stages.split(','):
+        if importlib.util.find_spec('boto3') is None:
+            result['skipped'].append('ingest (boto3 not installed)')
+        else:
+            result['ingest'] = {'latencies': run_ingest_stage(args, workdir)}
+
+    result['wall_seconds'] = time.perf_counter() - wall_started
+    for event in tracing.recorded_events():
+        result['stages'].setdefault(event['name'], []).append(event['dur'] / 1e6)
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+
+def run_configuration(args, base_url, size_mb, concurrency):
+    """Run one (size, concurrency) configuration in a fresh interpreter"""
+    env = {
+        **os.environ,
+        **mock_environment(base_url),
+        # Benchmarks post far more than a real account; no daily caps
+        'PLATFORM_DAILY_CAPS': '',
+        'TRACE_DIR': 'traces',
+        'PLATFORM_MEDIA_SOURCE': args.media_source,
+    }
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child',
+        '--size-mb', str(size_mb), '--concurrency', str(concurrency),
+        '--iterations', str(args.iterations), '--media-type', args.media_type,
+        '--platforms', args.platforms, '--stages', args.stages
+    ]
+    with tempfile.TemporaryDirectory(prefix='e2e_bench_') as workdir:
+        completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed:\n{completed.stdout[-2000:]}\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_result(result, top):
+    """Print one configuration's latency table"""
+    post = result['post']
+    print(f"\n📦 {result['size_mb']} MB x concurrency {result['concurrency']}: "
+          f"{post['count']} posts in {result['wall_seconds']:.1f}s "
+          f"({post['count'] / result['wall_seconds']:.2f} posts/s), peak RSS {result['peak_rss_mb']:.0f} MB")
+    print(f"   {'e2e post':<34} p50 {percentile(post['latencies'], 0.5):7.3f}s  p99 {percentile(post['latencies'], 0.99):7.3f}s")
+    if 'ingest' in result:
+        latencies = result['ingest']['latencies']
+        print(f"   {'e2e ingest':<34} p50 {percentile(latencies, 0.5):7.3f}s  p99 {percentile(latencies, 0.99):7.3f}s")
+    stages = sorted(result['stages'].items(), key=lambda entry: sum(entry[1]), reverse=True)
+    for name, durations in stages[:top]:
+        print(f"   {name:<34} p50 {percentile(durations, 0.5):7.3f}s  p99 {percentile(durations, 0.99):7.3f}s  ({len(durations)}x)")
+    if post['failed_platform_posts']:
+        print(f"   ⚠️ {post['failed_platform_posts']} platform post(s) failed")
+    for skipped in result['skipped']:
+        print(f"   ⏭️ Skipped {skipped}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end posting benchmark against mock platforms')
+    parser.add_argument('--sizes', default='1,10,50', help='Media sizes in MB')
+    parser.add_argument('--concurrency', default='1,4', help='Concurrent posts (one account each)')
+    parser.add_argument('--iterations', type=int, default=3, help='Posts per worker')
+    parser.add_argument('--media-type', choices=('video', 'image'), default='video')
+    parser.add_argument('--platforms', default='instagram,threads,tiktok,tumblr,bluesky')
+    parser.add_argument('--media-source', default='', help="PLATFORM_MEDIA_SOURCE, e.g. 'tiktok=url,tumblr=url'")
+    parser.add_argument('--stages', default='post,ingest', help='post and/or ingest')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Mock latency per request')
+    parser.add_argument('--processing-ms', type=float, default=1500, help='Mock video processing time')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--top', type=int, default=12, help='Stages to list per configuration')
+    parser.add_argument('--json', help='Also write all results to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--size-mb', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.concurrency = int(args.concurrency)
+        run_child(args)
+        return 0
+
+    platforms = []
+    for platform in args.platforms.split(','):
+        sdk = PLATFORM_SDKS.get(platform)
+        if sdk and importlib.util.find_spec(sdk) is None:
+            print(f"⏭️ Skipping {platform}: {sdk} is not installed")
+        else:
+            platforms.append(platform)
+    args.platforms = ','.join(platforms)
+
+    server, base_url = start_server(
+        latency_ms=args.latency_ms, processing_ms=args.processing_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=0
+    )
+    print(f"🧪 Mock platforms on {base_url} (latency {args.latency_ms:.0f} ms, "
+          f"processing {args.processing_ms:.0f} ms, errors {args.error_rate:.0%}, throttled {args.throttle_rate:.0%})")
+    print(f"   Platforms: {args.platforms}")
+
+    results = []
+    try:
+        for size_mb in (float(size) for size in args.sizes.split(',')):
+            for concurrency in (int(value) for value in args.concurrency.split(',')):
+                result = run_configuration(args, base_url, size_mb, concurrency)
+                print_result(result, args.top)
+                results.append(result)
+    finally:
+        server.shutdown()
+
+    print("\n📊 Mock requests: " + ', '.join(
+        f"{route} {stats['requests']}" for route, stats in sorted(server.state.stats.items())
+    ))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
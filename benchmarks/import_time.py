@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the CLI entry points
+Uses 'python -X importtime' to guard against slow startup regressions
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point module -> cumulative import budget in milliseconds
+IMPORT_BUDGETS_MS = {
+    'main': 100,
+    'check_queue': 100,
+    'content_queue': 100,
+}
+
+# Heavy SDKs that must never load just to start a CLI entry point
+FORBIDDEN_MODULES = ['requests', 'pytumblr', 'atproto', 'boto3', 'PIL', 'dotenv']
+
+
+def _parse_importtime(stderr):
+    """Parse -X importtime output into {module: cumulative microseconds}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def _startup_modules():
+    """Modules the bare interpreter (site, sitecustomize) imports on its own"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'pass'],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    return set(_parse_importtime(result.stderr))
+
+
+def measure_imports(module, runs=5):
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module (str): Module name to import
+        runs (int): Number of fresh interpreters to sample (the best run is kept)
+
+    Returns:
+        dict: {'cumulative_ms', 'wall_ms', 'modules'} for the fastest run
+    """
+    best = None
+    startup = _startup_modules()
+
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+        modules = {
+            name: cumulative_us
+            for name, cumulative_us in _parse_importtime(result.stderr).items()
+            if name not in startup
+        }
+
+        sample = {
+            'cumulative_ms': modules.get(module, 0) / 1000,
+            'wall_ms': wall_ms,
+            'modules': modules
+        }
+        if best is None or sample['cumulative_ms'] < best['cumulative_ms']:
+            best = sample
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check import time of the CLI entry points')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module')
+    parser.add_argument('--top', type=int, default=5, help='Show the N slowest imported modules')
+    args = parser.parse_args()
+
+    failures = []
+
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        sample = measure_imports(module, args.runs)
+        status = '✅' if sample['cumulative_ms'] <= budget_ms else '❌'
+        print(f"{status} {module}: {sample['cumulative_ms']:.1f} ms imports "
+              f"(budget {budget_ms} ms, interpreter wall {sample['wall_ms']:.0f} ms)")
+
+        slowest = sorted(sample['modules'].items(), key=lambda entry: entry[1], reverse=True)
+        for name, cumulative_us in slowest[1:args.top + 1]:
+            print(f"     {cumulative_us / 1000:7.1f} ms  {name}")
+
+        if sample['cumulative_ms'] > budget_ms:
+            failures.append(f"{module} took {sample['cumulative_ms']:.1f} ms (budget {budget_ms} ms)")
+
+        loaded = [name for name in FORBIDDEN_MODULES if name in sample['modules']]
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)} at startup")
+
+    if failures:
+        print("\n❌ Import-time regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+
+    print("\n🎉 All entry points within their import budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
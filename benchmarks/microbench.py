@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the queue, caption formatting and media preparation
+Times each hot path (best of several runs), compares it with the stored
+baseline and fails when one got slower than both the allowed threshold and
+the minimum absolute slowdown
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import caption_renderer
+from caption_renderer import PLATFORMS
+from content_queue import ContentQueue
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microbench_baseline.json')
+
+# Allowed slowdown against the baseline before the run fails (0.3 = 30%)
+DEFAULT_THRESHOLD = 0.3
+# A slowdown must also exceed this many seconds, so µs-scale jitter never fails the run
+DEFAULT_MIN_DELTA = 0.001
+
+HASHTAGS = ['surrealart', 'digitalcollage', 'art', 'design', 'aesthetic', 'weirdcore', 'artistsoninstagram', 'dreamcore']
+KAOMOJIS = ['(◕‿◕)', '(╯°□°)╯', 'ʕ•ᴥ•ʔ', '(｡♥‿♥｡)', '¯\\_(ツ)_/¯', '(⊙_⊙)']
+FUN_FACT = ("In 1894 the Catalan bookbinder Josep Roca i Bros marbled endpapers with ox gall "
+            "and seaweed size, a recipe only three workshops in Barcelona still use.")
+
+
+def make_items(count, rng, posted_share=0.5, duplicate_share=0.0):
+    """
+    Build queue items in the content_queue.json shape, with captions
+
+    Args:
+        count (int): Number of items
+        rng (random.Random): Random source
+        posted_share (float): Fraction already posted (half of them over 30 days ago)
+        duplicate_share (float): Fraction of items that reuse an earlier ID
+
+    Returns:
+        list: Queue items
+    """
+    now = datetime.now()
+    items = []
+    for i in range(count):
+        kaomoji = rng.choice(KAOMOJIS)
+        tags = rng.sample(HASHTAGS, 4)
+        captions = caption_renderer.render_captions(kaomoji, FUN_FACT, tags)
+        posted = rng.random() < posted_share
+        posted_date = (now - timedelta(days=rng.uniform(0, 60))).isoformat() if posted else None
+        item_id = rng.randint(1, max(i, 1)) if i and rng.random() < duplicate_share else i + 1
+        items.append({
+            'id': item_id,
+            'filename': f"item_{i}.jpg",
+            'url': f"https://bucket.s3.amazonaws.com/posts_insta/item_{i}_processed.jpg",
+            'media_type': 'video' if rng.random() < 0.3 else 'image',
+            'local_path': f"temp_processing/item_{i}_processed.jpg",
+            'added_date': (now - timedelta(days=rng.uniform(0, 365))).isoformat(),
+            'posted': posted,
+            'posted_date': posted_date,
+            'posting_results': {'instagram': {'id': str(17900000000000000 + i)}} if posted else None,
+            'kaomoji': kaomoji,
+            'fun_fact': FUN_FACT,
+            'hashtags': tags,
+            'platform_captions': {name: captions[name] for name in PLATFORMS},
+            'bluesky_facets': captions['bluesky_facets'],
+        })
+    return items
+
+
+def measure(fn, setup=None, repeats=9, number=1):
+    """
+    Time a function, keeping the best of several repeats
+    Host noise (other tenants, CPU steal) only ever adds time, so the
+    minimum is far steadier between runs than the mean or median; the
+    garbage collector is paused while timing, as timeit does
+
+    Args:
+        fn (callable): fn(state) to time; state is what setup() returned
+        setup (callable): Untimed preparation run before every repeat
+        repeats (int): Number of timed repeats
+        number (int): Calls per repeat
+
+    Returns:
+        float: Best seconds per call
+    """
+    best = None
+    for _ in range(repeats):
+        state = setup() if setup else None
+        gc.collect()
+        gc.disable()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                for _ in range(number):
+                    fn(state)
+                elapsed = (time.perf_counter() - started) / number
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def queue_benchmarks(sizes, workdir, rng):
+    """ContentQueue load/save/select/cleanup and duplicate-ID validation"""
+    results = {}
+    for size in sizes:
+        repeats = 5 if size >= 50000 else 9
+        items = make_items(size, rng)
+        queue_file = os.path.join(workdir, f"queue_{size}.json")
+        links_file = os.path.join(workdir, f"links_{size}.json")
+        with open(queue_file, 'w', encoding='utf-8') as f:
+            json.dump(items, f, indent=2, ensure_ascii=False)
+        queue = ContentQueue(queue_file, links_file)
+
+        results[f"queue.load[{size}]"] = measure(lambda _: queue._load_queue(), repeats=repeats)
+        results[f"queue.save[{size}]"] = measure(lambda _: queue._save_queue(), repeats=repeats)
+
+        def fresh_queue():
+            fresh = ContentQueue.__new__(ContentQueue)
+            fresh.__dict__.update(queue.__dict__)
+            fresh.queue = list(queue.queue)
+            fresh._index = None
+            return fresh
+
+        results[f"queue.index_build[{size}]"] = measure(lambda q: q.unposted_index, fresh_queue, repeats)
+        indexed = fresh_queue()
+        indexed.unposted_index
+        results[f"queue.select[{size}]"] = measure(lambda _: indexed.get_next_content(), repeats=repeats, number=200)
+        # What a one-shot 'main.py post' pays after loading: index build plus one pick
+        results[f"queue.first_select[{size}]"] = measure(lambda q: q.get_next_content(), fresh_queue, repeats)
+        # The cleanup rewrites the file, so each repeat gets its own copy
+        results[f"queue.cleanup[{size}]"] = measure(lambda q: q.cleanup_old_posted(30), fresh_queue, repeats)
+
+        duplicated = make_items(size, rng, duplicate_share=0.01)
+        results[f"queue.validate_ids[{size}]"] = measure(
+            lambda batch: queue._validate_and_fix_duplicate_ids(batch),
+            lambda: [dict(item) for item in duplicated], repeats
+        )
+    return results
+
+
+def caption_benchmarks(rng):
+    """format_caption for every platform and Bluesky facet building"""
+    samples = [(rng.choice(KAOMOJIS), FUN_FACT, rng.sample(HASHTAGS, 4)) for _ in range(200)]
+
+    def format_all(_):
+        for kaomoji, fun_fact, tags in samples:
+            for name in PLATFORMS:
+                caption_renderer.format_caption(kaomoji, fun_fact, tags, name)
+
+    texts = [(caption_renderer.format_caption(k, f, t, 'bluesky'), t) for k, f, t in samples]
+
+    def facets_all(_):
+        for text, tags in texts:
+            caption_renderer.get_bluesky_facets(text, tags)
+
+    def render_all(_):
+        for kaomoji, fun_fact, tags in samples:
+            caption_renderer.render_captions(kaomoji, fun_fact, tags)
+
+    return {
+        'caption.format[200x5]': measure(format_all),
+        'caption.bluesky_facets[200]': measure(facets_all),
+        'caption.render_all[200]': measure(render_all),
+    }
+
+
+def media_benchmarks(workdir, skipped):
+    """MediaProcessor.process_image on large inputs and the ffmpeg shortening"""
+    results = {}
+    try:
+        from media_processor import MediaProcessor
+        from PIL import Image
+    except ImportError as e:
+        skipped.append(f"process_image ({e})")
+    else:
+        processor = MediaProcessor()
+        for side in (2048, 4096):
+            source = os.path.join(workdir, f"large_{side}.png")
+            Image.effect_noise((side, side), 64).convert('RGB').save(source)
+            output = os.path.join(workdir, f"large_{side}.jpg")
+            results[f"media.process_image[{side}px]"] = measure(lambda _: processor.process_image(source, output), repeats=5)
+
+    if shutil.which('ffmpeg') is None:
+        skipped.append("shorten_video (ffmpeg not installed)")
+        return results
+    try:
+        from caption_generator import CaptionGenerator
+    except ImportError as e:
+        skipped.append(f"shorten_video ({e})")
+        return results
+
+    video = os.path.join(workdir, 'clip.mp4')
+    subprocess.run([
+        'ffmpeg', '-y', '-f', 'lavfi', '-i', 'testsrc=duration=30:size=1280x720:rate=30',
+        '-f', 'lavfi', '-i', 'sine=duration=30', '-shortest', video
+    ], capture_output=True, check=True)
+    with open(video, 'rb') as f:
+        video_bytes = f.read()
+    generator = CaptionGenerator()
+    results['media.shorten_video[720p 30s]'] = measure(lambda _: generator._shorten_video_for_llm(video_bytes), repeats=5)
+    return results
+
+
+def load_baseline(path):
+    """Load stored baseline results ({} if there are none)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run microbenchmarks and compare with the baseline')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Queue sizes to benchmark')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Allowed slowdown (0.3 = 30%%)')
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                        help='Smallest slowdown in seconds that can fail the run')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline results file')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Replace the baseline with this run (all sizes, no --only)')
+    parser.add_argument('--only', help='Only run benchmarks whose name contains this text')
+    args = parser.parse_args()
+    if args.update_baseline and (args.only or args.sizes != parser.get_default('sizes')):
+        # One file, one run: a partial update would mix machines and sessions
+        parser.error('--update-baseline records a full run; drop --only and --sizes')
+
+    rng = random.Random(42)
+    skipped = []
+    workdir = tempfile.mkdtemp(prefix='microbench_')
+    try:
+        results = {}
+        results.update(queue_benchmarks([int(size) for size in args.sizes.split(',')], workdir, rng))
+        results.update(caption_benchmarks(rng))
+        results.update(media_benchmarks(workdir, skipped))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.only:
+        results = {name: seconds for name, seconds in results.items() if args.only in name}
+
+    baseline = load_baseline(args.baseline)
+    machine = f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}"
+    if baseline and baseline.get('machine') != machine:
+        print(f"⚠️ Baseline was recorded on '{baseline.get('machine')}', this is '{machine}'")
+
+    regressions = []
+    for name, seconds in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f"🆕 {name:<34} {seconds * 1000:10.3f} ms  (no baseline)")
+            continue
+        ratio = seconds / previous
+        regressed = ratio > 1 + args.threshold and seconds - previous > args.min_delta
+        status = '❌' if regressed else '✅'
+        print(f"{status} {name:<34} {seconds * 1000:10.3f} ms  (baseline {previous * 1000:.3f} ms, {ratio:.2f}x)")
+        if regressed:
+            regressions.append(f"{name} is {ratio:.2f}x the baseline (+{(seconds - previous) * 1000:.1f} ms)")
+
+    for entry in skipped:
+        print(f"⏭️ Skipped {entry}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'machine': machine,
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'results': dict(sorted(results.items()))
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline updated: {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n❌ Regressions beyond {args.threshold:.0%} and {args.min_delta * 1000:g} ms:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+
+    print("\n🎉 No microbenchmark regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the platform, S3 and Bedrock APIs
+Emulates the endpoints the publishers, MediaProcessor and CaptionGenerator
+call, with configurable latency, media processing delay and injected
+errors/throttling, so posting can be benchmarked without live accounts
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Path prefixes the config.py *_API_BASE overrides point at
+PLATFORM_PREFIXES = ('instagram', 'threads', 'tiktok', 'xrpc', 'v2', 'model')
+
+MOCK_CAPTION = {
+    'kaomoji': '(◕‿◕)',
+    'fun_fact': 'Mock fact about the picture.',
+    'fun_fact_followup': 'A second mock sentence.',
+    'niche_hashtags': ['mockart', 'benchmark'],
+    'broad_hashtags': ['art', 'design']
+}
+
+
+def _fake_jwt(subject):
+    """Unsigned JWT that atproto accepts (it only reads the expiry)"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    return '.'.join([
+        encode({'alg': 'HS256', 'typ': 'JWT'}),
+        encode({'sub': subject, 'exp': int(time.time()) + 86400, 'scope': 'com.atproto.access'}),
+        base64.urlsafe_b64encode(b'mock-signature').rstrip(b'=').decode()
+    ])
+
+
+class MockState:
+    """
+    Shared server state: media containers, stored objects and request counters
+    """
+
+    def __init__(self, latency_ms=0, processing_ms=0, error_rate=0.0, throttle_rate=0.0, app_usage=0, seed=None):
+        self.latency = latency_ms / 1000
+        self.processing = processing_ms / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.app_usage = app_usage
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.next_id = 1000
+        self.ready_at = {}
+        self.objects = {}
+        self.stats = {}
+
+    def new_id(self, prefix):
+        """Next unique object ID"""
+        with self.lock:
+            self.next_id += 1
+            return f"{prefix}{self.next_id}"
+
+    def count(self, route, bytes_in, injected=None):
+        """Count one request per route (and injected faults)"""
+        with self.lock:
+            entry = self.stats.setdefault(route, {'requests': 0, 'bytes_in': 0, 'errors': 0, 'throttled': 0})
+            entry['requests'] += 1
+            entry['bytes_in'] += bytes_in
+            if injected:
+                entry[injected] += 1
+
+    def fault(self):
+        """Decide whether to inject a fault into this request"""
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.throttle_rate:
+            return 'throttled'
+        if roll < self.throttle_rate + self.error_rate:
+            return 'errors'
+        return None
+
+    def start_processing(self, container_id, video=True):
+        """Container becomes ready after the processing delay (images at once)"""
+        with self.lock:
+            self.ready_at[container_id] = time.time() + (self.processing if video else 0)
+
+    def is_ready(self, container_id):
+        with self.lock:
+            ready_at = self.ready_at.get(container_id)
+        return ready_at is not None and time.time() >= ready_at
+
+
+class MockPlatformHandler(BaseHTTPRequestHandler):
+    """Routes requests by the first path segment"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        elif isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _form(self, body):
+        """Form or JSON request parameters (uploads are not parsed)"""
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('application/json'):
+            try:
+                return json.loads(body or b'{}')
+            except ValueError:
+                return {}
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            return {key: values[0] for key, values in parse_qs(body.decode(errors='ignore')).items()}
+        return {}
+
+    def _handle(self):
+        body = self._read_body()
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        route = parts[0] if parts and parts[0] in PLATFORM_PREFIXES else 's3'
+
+        time.sleep(self.state.latency)
+        injected = self.state.fault() if route != 's3' else None
+        self.state.count(route, len(body), injected)
+
+        graph_headers = {}
+        if route in ('instagram', 'threads') and self.state.app_usage:
+            usage = self.state.app_usage
+            graph_headers['X-App-Usage'] = json.dumps({'call_count': usage, 'total_cputime': usage // 2, 'total_time': usage // 2})
+
+        if injected == 'throttled':
+            return self._send(429, {'error': {'message': 'Mock rate limit', 'code': 4}}, headers={'Retry-After': '1', **graph_headers})
+        if injected == 'errors':
+            return self._send(500, {'error': {'message': 'Mock server error', 'code': 2, 'is_transient': True}}, headers=graph_headers)
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        handler = getattr(self, f"_route_{route}")
+        status, response, headers = handler(parts[1:] if route != 's3' else parts, query, self._form(body) if route != 's3' else body)
+        if isinstance(response, bytes) and route == 's3':
+            return self._send(status, response, 'application/octet-stream', headers)
+        return self._send(status, response, headers={**graph_headers, **(headers or {})})
+
+    do_GET = do_POST = do_PUT = do_HEAD = _handle
+
+    # Meta Graph API (Instagram and Threads share the container flow)
+
+    def _graph(self, parts, query, form, status_field, media_edge, publish_edge):
+        if not parts:
+            return 404, {'error': {'message': 'Unknown path', 'code': 100}}, None
+        if len(parts) == 2 and parts[1] == media_edge and self.command == 'POST':
+            container_id = self.state.new_id('container')
+            self.state.start_processing(container_id, video='video_url' in form)
+            return 200, {'id': container_id}, None
+        if len(parts) == 2 and parts[1] == publish_edge and self.command == 'POST':
+            if not self.state.is_ready(form.get('creation_id')):
+                return 400, {'error': {'message': 'Media not ready', 'code': 9007}}, None
+            return 200, {'id': self.state.new_id('media')}, None
+        if parts[0] == 'me':
+            return 200, {'id': 'threads-user', 'username': 'mock'}, None
+        if parts[0] == 'debug_token':
+            return 200, {'data': {'is_valid': True, 'expires_at': int(time.time()) + 60 * 86400}}, None
+        if parts[0].startswith('container'):
+            ready = self.state.is_ready(parts[0])
+            return 200, {'id': parts[0], status_field: 'FINISHED' if ready else 'IN_PROGRESS'}, None
+        if 'instagram_business_account' in query.get('fields', ''):
+            return 200, {'instagram_business_account': {'id': f"ig-{parts[0]}"}, 'id': parts[0]}, None
+        return 404, {'error': {'message': 'Unsupported request', 'code': 100}}, None
+
+    def _route_instagram(self, parts, query, form):
+        return self._graph(parts, query, form, 'status_code', 'media', 'media_publish')
+
+    def _route_threads(self, parts, query, form):
+        return self._graph(parts, query, form, 'status', 'threads', 'threads_publish')
+
+    # TikTok Content Posting API
+
+    def _route_tiktok(self, parts, query, form):
+        path = '/'.join(parts)
+        ok = {'code': 'ok', 'message': ''}
+        if path.endswith('post/publish/video/init'):
+            publish_id = self.state.new_id('publish')
+            if form.get('source_info', {}).get('source') == 'PULL_FROM_URL':
+                # TikTok fetches the video itself; processing starts at once
+                self.state.start_processing(publish_id)
+                return 200, {'data': {'publish_id': publish_id}, 'error': ok}, None
+            host = self.headers.get('Host')
+            return 200, {'data': {'publish_id': publish_id, 'upload_url': f"http://{host}/tiktok/upload/{publish_id}"}, 'error': ok}, None
+        if parts and parts[0] == 'upload':
+            self.state.start_processing(parts[1])
+            return 200, {}, None
+        if path.endswith('oauth/token'):
+            if form.get('grant_type') != 'refresh_token' or not form.get('refresh_token'):
+                return 400, {'error': 'invalid_request', 'error_description': 'refresh_token required'}, None
+            return 200, {'access_token': f"act.{self.state.new_id('token')}", 'expires_in': 86400,
+                         'refresh_token': form['refresh_token'], 'refresh_expires_in': 31536000,
+                         'token_type': 'Bearer'}, None
+        if path.endswith('post/publish/status/fetch'):
+            ready = self.state.is_ready(form.get('publish_id'))
+            return 200, {'data': {'status': 'PUBLISH_COMPLETE' if ready else 'PROCESSING_UPLOAD'}, 'error': ok}, None
+        return 404, {'error': {'code': 'not_found', 'message': path}}, None
+
+    # Tumblr (pytumblr posts to /v2/blog/<blog>/post)
+
+    def _route_v2(self, parts, query, form):
+        if len(parts) >= 3 and parts[0] == 'blog' and parts[-1] == 'post':
+            return 201, {'meta': {'status': 201, 'msg': 'Created'}, 'response': {'id': self.state.new_id(''), 'state': 'published'}}, None
+        return 404, {'meta': {'status': 404, 'msg': 'Not Found'}}, None
+
+    # Bluesky XRPC
+
+    def _route_xrpc(self, parts, query, form):
+        method = parts[0] if parts else ''
+        did = 'did:plc:mockbenchmark'
+        if method in ('com.atproto.server.createSession', 'com.atproto.server.refreshSession'):
+            handle = form.get('identifier', 'mock.bsky.social')
+            return 200, {'did': did, 'handle': handle, 'accessJwt': _fake_jwt(did), 'refreshJwt': _fake_jwt(did)}, None
+        if method == 'com.atproto.server.getSession':
+            return 200, {'did': did, 'handle': 'mock.bsky.social'}, None
+        if method == 'app.bsky.actor.getProfile':
+            return 200, {'did': did, 'handle': query.get('actor', 'mock.bsky.social')}, None
+        if method == 'com.atproto.repo.uploadBlob':
+            # Raw upload bodies arrive here unparsed; only the size matters
+            size = int(self.headers.get('Content-Length') or 0)
+            return 200, {'blob': {
+                '$type': 'blob',
+                'ref': {'$link': 'bafkreie5737gdxlw5i64vzichcalba3z2v5n6icifvx5xytvske7mr3hpm'},
+                'mimeType': self.headers.get('Content-Type', 'application/octet-stream'),
+                'size': size
+            }}, None
+        if method == 'com.atproto.repo.createRecord':
+            record_id = self.state.new_id('post')
+            return 200, {
+                'uri': f"at://{did}/app.bsky.feed.post/{record_id}",
+                'cid': 'bafyreie5737gdxlw5i64vzichcalba3z2v5n6icifvx5xytvske7mr3hpm'
+            }, None
+        return 400, {'error': 'MethodNotImplemented', 'message': method}, None
+
+    # Bedrock runtime Converse
+
+    def _route_model(self, parts, query, form):
+        if parts and parts[-1] == 'converse':
+            return 200, {
+                'output': {'message': {'role': 'assistant', 'content': [{'text': json.dumps(MOCK_CAPTION, ensure_ascii=False)}]}},
+                'stopReason': 'end_turn',
+                'usage': {'inputTokens': 1000, 'outputTokens': 80, 'totalTokens': 1080},
+                'metrics': {'latencyMs': int(self.state.latency * 1000)}
+            }, None
+        return 404, {'message': 'Unknown model operation'}, None
+
+    # S3 (path-style: /<bucket>/<key>, as boto3 uses for an IP endpoint)
+
+    def _route_s3(self, parts, query, body):
+        key = '/'.join(parts)
+        if self.command == 'PUT':
+            if 'partNumber' in query:
+                key = f"{key}#part{int(query['partNumber']):05d}"
+            with self.state.lock:
+                self.state.objects[key] = body
+            return 200, b'', {'ETag': f'"{len(body):x}"'}
+        if self.command == 'POST' and 'uploads' in query:
+            xml = (f"<InitiateMultipartUploadResult><Bucket>{parts[0]}</Bucket>"
+                   f"<Key>{'/'.join(parts[1:])}</Key><UploadId>mock-upload</UploadId></InitiateMultipartUploadResult>")
+            return 200, xml.encode(), {'Content-Type': 'application/xml'}
+        if self.command == 'POST' and 'uploadId' in query:
+            with self.state.lock:
+                part_keys = sorted(name for name in self.state.objects if name.startswith(f"{key}#part"))
+                self.state.objects[key] = b''.join(self.state.objects.pop(name) for name in part_keys)
+            xml = f"<CompleteMultipartUploadResult><Key>{'/'.join(parts[1:])}</Key><ETag>\"mock\"</ETag></CompleteMultipartUploadResult>"
+            return 200, xml.encode(), {'Content-Type': 'application/xml'}
+
+        with self.state.lock:
+            data = self.state.objects.get(key)
+        if data is None:
+            return 404, b'', None
+        return 200, data, None
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """
+    Start the mock server in a background thread
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port (0 picks a free one)
+        **options: MockState options (latency_ms, processing_ms, error_rate, throttle_rate, app_usage, seed)
+
+    Returns:
+        tuple: (server, base URL)
+    """
+    server = ThreadingHTTPServer((host, port), MockPlatformHandler)
+    server.daemon_threads = True
+    server.state = MockState(**options)
+    threading.Thread(target=server.serve_forever, name='mock-platforms', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def mock_environment(base_url, bucket='mock-bucket'):
+    """
+    Environment variables that point config.py at the mock server
+
+    Args:
+        base_url (str): Mock server base URL
+
+    Returns:
+        dict: Variable name -> value
+    """
+    return {
+        'INSTAGRAM_API_BASE': f"{base_url}/instagram",
+        'THREADS_API_BASE': f"{base_url}/threads",
+        'TIKTOK_API_BASE': f"{base_url}/tiktok/v2",
+        'TUMBLR_API_HOST': base_url,
+        'BLUESKY_API_BASE': f"{base_url}/xrpc",
+        'S3_ENDPOINT_URL': base_url,
+        'BEDROCK_ENDPOINT_URL': base_url,
+        'S3_BUCKET': bucket,
+        'S3_URL_BASE': f"{base_url}/{bucket}/posts_insta/",
+        'AWS_ACCESS_KEY_ID': 'mock', 'AWS_SECRET_ACCESS_KEY': 'mock',
+        'AWS_ACCESS_KEY_ID_S3': 'mock', 'AWS_SECRET_ACCESS_KEY_S3': 'mock',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the mock platform API server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=50, help='Delay added to every response')
+    parser.add_argument('--processing-ms', type=float, default=2000, help='Time until an uploaded video is ready')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of API calls answered with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of API calls answered with HTTP 429')
+    parser.add_argument('--app-usage', type=int, default=0, help='X-App-Usage percentage on Graph API responses')
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        port=args.port, latency_ms=args.latency_ms, processing_ms=args.processing_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, app_usage=args.app_usage
+    )
+    print(f"🧪 Mock platforms listening on {base_url}")
+    print("   Point the poster at it with:")
+    for name, value in mock_environment(base_url).items():
+        print(f"   export {name}={value}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n📊 Requests served: {json.dumps(server.state.stats, indent=2)}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
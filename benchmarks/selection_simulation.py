@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Selection policy simulation over synthetic queues
+Measures pick latency against the old list-building random.choice and how
+fair each policy is (wait time, media-type clustering, hashtag repeats)
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selection_policies import POLICIES, UnpostedIndex, get_policy
+
+HASHTAG_POOL = [f"tag{i}" for i in range(40)]
+KAOMOJI_POOL = ['(◕‿◕)', '(╯°□°)╯', 'ʕ•ᴥ•ʔ', '(｡♥‿♥｡)', '¯\\_(ツ)_/¯', '(⊙_⊙)', '(ง •̀_•́)ง', '(✿◠‿◠)']
+
+
+def make_queue(size, rng, video_share=0.3):
+    """
+    Build a synthetic queue of unposted items added over the past year
+
+    Args:
+        size (int): Number of items
+        rng (random.Random): Random source
+        video_share (float): Fraction of items that are videos
+
+    Returns:
+        list: Queue items in the content_queue.json shape
+    """
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / max(size, 1)
+    return [
+        {
+            'id': i + 1,
+            'filename': f"item_{i}",
+            'media_type': 'video' if rng.random() < video_share else 'image',
+            'added_date': (start + step * i).isoformat(),
+            'posted': False,
+            'posted_date': None,
+            'kaomoji': rng.choice(KAOMOJI_POOL),
+            'hashtags': rng.sample(HASHTAG_POOL, 4)
+        }
+        for i in range(size)
+    ]
+
+
+def baseline_pick(queue, rng):
+    """The original selection: list every unposted item, then random.choice"""
+    unposted = [item for item in queue if not item['posted']]
+    return rng.choice(unposted)
+
+
+def simulate(policy_name, size, picks, seed):
+    """
+    Post picks items from a fresh queue with one policy
+
+    Returns:
+        dict: Latency and fairness stats
+    """
+    rng = random.Random(seed)
+    queue = make_queue(size, rng)
+    build_start = time.perf_counter()
+    index = UnpostedIndex(queue)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    policy = get_policy(policy_name, rng=random.Random(seed))
+    latencies = []
+    waits = []
+    same_type_runs = 0
+    repeated_tags = 0
+    previous = None
+    now = datetime.now()
+
+    for _ in range(picks):
+        pick_start = time.perf_counter()
+        item = policy.select(index)
+        latencies.append((time.perf_counter() - pick_start) * 1e6)
+
+        waits.append((now - datetime.fromisoformat(item['added_date'])).days)
+        if previous is not None:
+            same_type_runs += item['media_type'] == previous['media_type']
+            repeated_tags += len(set(item['hashtags']) & set(previous['hashtags']))
+        previous = item
+
+        item['posted'] = True
+        item['posted_date'] = now.isoformat()
+        index.remove(item['id'] - 1)
+
+    return {
+        'build_ms': build_ms,
+        'pick_us_median': statistics.median(latencies),
+        'pick_us_p99': sorted(latencies)[int(len(latencies) * 0.99) - 1],
+        'mean_wait_days': statistics.mean(waits),
+        'same_type_pct': 100 * same_type_runs / max(picks - 1, 1),
+        'repeated_tags': repeated_tags / max(picks - 1, 1),
+    }
+
+
+def baseline(size, picks, seed):
+    """Pick latency of the original list-building random.choice"""
+    rng = random.Random(seed)
+    queue = make_queue(size, rng)
+    latencies = []
+    for _ in range(picks):
+        start = time.perf_counter()
+        item = baseline_pick(queue, rng)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        item['posted'] = True
+    return statistics.median(latencies)
+
+
+def check_future_dates(seed):
+    """
+    Regression check: items added 'in the future' (clock skew, another
+    timezone) must not break age-weighted picks
+
+    Returns:
+        list: Failure messages (empty when every policy picks fine)
+    """
+    failures = []
+    for name in POLICIES:
+        rng = random.Random(seed)
+        queue = make_queue(20, rng)
+        for offset, item in enumerate(queue[:5]):
+            item['added_date'] = (datetime.now() + timedelta(days=offset + 1)).isoformat()
+        index = UnpostedIndex(queue)
+        queue.append(dict(queue[0], id=len(queue) + 1, added_date=(datetime.now() + timedelta(days=30)).isoformat()))
+        index.add(len(queue) - 1)
+
+        policy = get_policy(name, rng=random.Random(seed))
+        try:
+            for _ in range(len(queue)):
+                item = policy.select(index)
+                if item['posted']:
+                    failures.append(f"{name}: picked an already posted item")
+                    break
+                item['posted'] = True
+                index.remove(item['id'] - 1)
+        except ValueError as e:
+            failures.append(f"{name}: {e}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=100_000, help='Items in the synthetic queue')
+    parser.add_argument('--picks', type=int, default=1_000, help='Items to post per policy')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    failures = check_future_dates(args.seed)
+    for failure in failures:
+        print(f"❌ Future added_date: {failure}")
+    if failures:
+        return 1
+
+    print(f"🧪 Simulating {args.picks} picks from a queue of {args.size} items")
+    print(f"   random.choice baseline: {baseline(args.size, min(args.picks, 200), args.seed):.0f} µs per pick\n")
+
+    print(f"   {'policy':<12} {'index build':>12} {'pick p50':>10} {'pick p99':>10} {'wait (d)':>9} {'same type':>10} {'tag overlap':>12}")
+    for name in POLICIES:
+        stats = simulate(name, args.size, args.picks, args.seed)
+        print(
+            f"   {name:<12} {stats['build_ms']:>10.0f}ms {stats['pick_us_median']:>8.1f}µs "
+            f"{stats['pick_us_p99']:>8.1f}µs {stats['mean_wait_days']:>9.0f} "
+            f"{stats['same_type_pct']:>9.0f}% {stats['repeated_tags']:>12.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
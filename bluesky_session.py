@@ -0,0 +1,104 @@
+"""
+Bluesky session persistence
+Reuses the access/refresh JWTs between runs instead of a password login every
+post, which avoids createSession round trips and Bluesky's login rate limits
+"""
+
+import json
+import os
+from datetime import datetime
+from config import BLUESKY_SESSION_FILE
+
+
+def load_session_string(username, session_file=BLUESKY_SESSION_FILE):
+    """
+    Load a saved session string for this account
+
+    Args:
+        username (str): Account the session must belong to
+        session_file (str): Path of the session file
+
+    Returns:
+        str: Session string, or None if missing or for another account
+    """
+    if not os.path.exists(session_file):
+        return None
+    try:
+        with open(session_file, 'r') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+    if data.get('username') != username:
+        return None
+    return data.get('session')
+
+
+def save_session_string(username, session_string, session_file=BLUESKY_SESSION_FILE):
+    """
+    Save a session string (readable by the owner only - it holds the JWTs)
+
+    Args:
+        username (str): Account the session belongs to
+        session_string (str): Session exported by the atproto client
+        session_file (str): Path of the session file
+    """
+    try:
+        directory = os.path.dirname(session_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({
+                'username': username,
+                'session': session_string,
+                'saved_at': datetime.now().isoformat()
+            }, f)
+    except OSError as e:
+        print(f"⚠️ Could not save Bluesky session: {e}")
+
+
+def clear_session(session_file=BLUESKY_SESSION_FILE):
+    """Remove a saved session that no longer works"""
+    try:
+        if os.path.exists(session_file):
+            os.remove(session_file)
+    except OSError as e:
+        print(f"⚠️ Could not remove Bluesky session: {e}")
+
+
+def login_with_saved_session(client, username, password, session_file=BLUESKY_SESSION_FILE):
+    """
+    Log a Bluesky client in, reusing the saved session when possible
+
+    The atproto client refreshes an expired access token with the refresh
+    token on its first request; every new or refreshed session is saved.
+    Falls back to a password login when the saved session is unusable.
+
+    Args:
+        client (atproto.Client): Client to log in
+        username (str): Bluesky handle or email
+        password (str): Bluesky (app) password
+        session_file (str): Path of the session file
+
+    Raises:
+        Exception: If the password login fails as well
+    """
+    def persist_session(event, session):
+        save_session_string(username, session.encode(), session_file)
+
+    client.on_session_change(persist_session)
+
+    session_string = load_session_string(username, session_file)
+    if session_string:
+        try:
+            client.login(session_string=session_string)
+            print("✅ Bluesky: Reused saved session")
+            return
+        except Exception as e:
+            print(f"⚠️ Bluesky: Saved session rejected, logging in with password - {e}")
+            clear_session(session_file)
+
+    client.login(username, password)
+    save_session_string(username, client.export_session_string(), session_file)
+    print("✅ Bluesky: Logged in with password")
@@ -6,12 +6,14 @@ Single AI call returns both kaomoji and hashtags
 import boto3
 import requests
 import io
-import json
 import subprocess
 import tempfile
 import os
 from PIL import Image
-from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, CAPTION_MAX_ATTEMPTS, BEDROCK_ENDPOINT_URL
+from structured_output import extract_json_object, validate_caption_payload, ParseMetrics
+import caption_renderer
+from tracing import span
 
 
 class CaptionGenerator:
@@ -25,9 +27,12 @@ class CaptionGenerator:
             service_name='bedrock-runtime',
             region_name='eu-west-2',
             aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            endpoint_url=BEDROCK_ENDPOINT_URL
         )
         self.model_id = 'amazon.nova-pro-v1:0'
+        self.max_attempts = max(1, CAPTION_MAX_ATTEMPTS)
+        self.parse_metrics = ParseMetrics()
     
     def to_bold_unicode(self, text):
         """
@@ -39,17 +44,7 @@ class CaptionGenerator:
         Returns:
             str: Text with Unicode bold characters
         """
-        bold_map = {
-            'A': '𝗔', 'B': '𝗕', 'C': '𝗖', 'D': '𝗗', 'E': '𝗘', 'F': '𝗙', 'G': '𝗚', 'H': '𝗛',
-            'I': '𝗜', 'J': '𝗝', 'K': '𝗞', 'L': '𝗟', 'M': '𝗠', 'N': '𝗡', 'O': '𝗢', 'P': '𝗣',
-            'Q': '𝗤', 'R': '𝗥', 'S': '𝗦', 'T': '𝗧', 'U': '𝗨', 'V': '𝗩', 'W': '𝗪', 'X': '𝗫',
-            'Y': '𝗬', 'Z': '𝗭', 'a': '𝗮', 'b': '𝗯', 'c': '𝗰', 'd': '𝗱', 'e': '𝗲', 'f': '𝗳',
-            'g': '𝗴', 'h': '𝗵', 'i': '𝗶', 'j': '𝗷', 'k': '𝗸', 'l': '𝗹', 'm': '𝗺', 'n': '𝗻',
-            'o': '𝗼', 'p': '𝗽', 'q': '𝗾', 'r': '𝗿', 's': '𝘀', 't': '𝘁', 'u': '𝘂', 'v': '𝘃',
-            'w': '𝘄', 'x': '𝘅', 'y': '𝘆', 'z': '𝘇', '0': '𝟬', '1': '𝟭', '2': '𝟮', '3': '𝟯',
-            '4': '𝟰', '5': '𝟱', '6': '𝟲', '7': '𝟳', '8': '𝟴', '9': '𝟵'
-        }
-        return ''.join(bold_map.get(char, char) for char in text)
+        return caption_renderer.to_bold_unicode(text)
     
     def _shorten_video_for_llm(self, video_bytes, max_duration=10):
         """
@@ -85,7 +80,9 @@ class CaptionGenerator:
             print(f"🎬 Shortening video to {max_duration} seconds for LLM analysis...")
             
             # Run ffmpeg
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with span('ffmpeg.shorten', 'ffmpeg', bytes=len(video_bytes)) as ffmpeg:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                ffmpeg.set(status=result.returncode)
             
             if result.returncode == 0:
                 # Read the shortened video
@@ -123,7 +120,9 @@ class CaptionGenerator:
             tuple: (media_bytes, media_type) where media_type is 'image' or 'video'
         """
         try:
-            response = requests.get(media_url)
+            with span('caption.download', 's3') as download:
+                response = requests.get(media_url)
+                download.set(status=response.status_code, bytes=len(response.content))
             response.raise_for_status()
             
             # Check if it's a video file
@@ -134,16 +133,17 @@ class CaptionGenerator:
                 return shortened_bytes, 'video'
             else:
                 # For images, process with PIL
-                image = Image.open(io.BytesIO(response.content))
-                
-                # Convert to RGB if needed
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                
-                # Convert to bytes
-                img_buffer = io.BytesIO()
-                image.save(img_buffer, format='PNG')
-                img_buffer.seek(0)
+                with span('pil.to_png', 'pil', bytes=len(response.content)):
+                    image = Image.open(io.BytesIO(response.content))
+                    
+                    # Convert to RGB if needed
+                    if image.mode != 'RGB':
+                        image = image.convert('RGB')
+                    
+                    # Convert to bytes
+                    img_buffer = io.BytesIO()
+                    image.save(img_buffer, format='PNG')
+                    img_buffer.seek(0)
                 
                 return img_buffer.getvalue(), 'image'
             
@@ -151,13 +151,14 @@ class CaptionGenerator:
             print(f"Error downloading media: {e}")
             return None, None
     
-    def generate_caption_and_hashtags(self, media_url, recent_kaomojis=None):
+    def generate_caption_and_hashtags(self, media_url, recent_kaomojis=None, caption_style=None):
         """
         Generate both caption and hashtags in a single AI call
         
         Args:
             media_url (str): URL of the media to analyze
             recent_kaomojis (list): List of recently used kaomojis to avoid
+            caption_style (str): Extra style instructions for this account
             
         Returns:
             dict: {'kaomoji': str, 'hashtags': [str, str, str]} or {'kaomoji': '', 'hashtags': []}
@@ -174,6 +175,11 @@ class CaptionGenerator:
                 avoid_list = ', '.join(recent_kaomojis)
                 kaomoji_instruction = f"\n            AVOID THESE RECENTLY USED KAOMOJIS: {avoid_list}\n            Pick a DIFFERENT kaomoji that hasn't been used recently."
             
+            # Per-account voice, added on top of the shared format rules
+            style_instruction = ""
+            if caption_style:
+                style_instruction = f"\n\n            ACCOUNT STYLE: {caption_style}"
+            
             # Enhanced prompt for kaomoji, two punchy fun facts, and hybrid hashtags
             prompt = f"""Analyze this visual content as an art history scholar and return a JSON object with:
 
@@ -198,7 +204,7 @@ class CaptionGenerator:
 
             FORBIDDEN: H.R. Giger, Dalí, Futurism, Surrealism movement basics, any Wikipedia-level facts
             REQUIRED: Names nobody has heard of, dates that surprise, places that are unexpected
-            The two facts MUST be about completely different aspects of the visual theme."""
+            The two facts MUST be about completely different aspects of the visual theme.{style_instruction}"""
             
             # Create message content for Nova
             if media_type == 'video':
@@ -234,50 +240,53 @@ class CaptionGenerator:
             
             print(f"🤖 Generating caption and hashtags for {media_type}...")
             
-            # Call the Nova API
-            response = self.bedrock_runtime.converse(
-                modelId=self.model_id,
-                messages=conversation,
-                inferenceConfig={
-                    "maxTokens": 500,
-                    "temperature": 0.7,
-                    "topP": 0.9
-                }
-            )
-            
-            # Extract response text
-            model_response = response["output"]["message"]["content"][0]["text"]
-            
-            print(f"✅ AI Response: {model_response[:100]}...")
-            
-            # Parse JSON response
-            try:
-                result = json.loads(model_response.strip())
+            # Ask the model, re-asking with the parse errors if the reply is unusable
+            for attempt in range(1, self.max_attempts + 1):
+                with span('bedrock.converse', 'llm', attempt=attempt):
+                    response = self.bedrock_runtime.converse(
+                        modelId=self.model_id,
+                        messages=conversation,
+                        inferenceConfig={
+                            "maxTokens": 500,
+                            "temperature": 0.7,
+                            "topP": 0.9
+                        }
+                    )
                 
-                # Validate structure - new format with niche_hashtags and broad_hashtags
-                if 'kaomoji' in result and 'fun_fact' in result and 'fun_fact_followup' in result:
-                    # Get niche and broad hashtags (2 each)
-                    niche_hashtags = result.get('niche_hashtags', [])[:2] if isinstance(result.get('niche_hashtags'), list) else []
-                    broad_hashtags = result.get('broad_hashtags', [])[:2] if isinstance(result.get('broad_hashtags'), list) else []
-                    
-                    # Combine: niche first, then broad (total 4)
-                    combined_hashtags = niche_hashtags + broad_hashtags
-                    
-                    return {
-                        'kaomoji': str(result['kaomoji']),
-                        'fun_fact': str(result['fun_fact']),
-                        'fun_fact_followup': str(result['fun_fact_followup']),
-                        'niche_hashtags': niche_hashtags,
-                        'broad_hashtags': broad_hashtags,
-                        'hashtags': combined_hashtags
-                    }
+                # Extract response text
+                model_response = response["output"]["message"]["content"][0]["text"]
+                
+                print(f"✅ AI Response: {model_response[:100]}...")
+                
+                result, method = extract_json_object(model_response)
+                if result is None:
+                    errors = ["response did not contain a JSON object"]
                 else:
-                    print("❌ Invalid JSON structure from AI")
-                    return {'kaomoji': '', 'fun_fact': '', 'fun_fact_followup': '', 'niche_hashtags': [], 'broad_hashtags': [], 'hashtags': []}
-                    
-            except json.JSONDecodeError as e:
-                print(f"❌ Failed to parse AI response as JSON: {e}")
-                return {'kaomoji': '', 'fun_fact': '', 'fun_fact_followup': '', 'niche_hashtags': [], 'broad_hashtags': [], 'hashtags': []}
+                    payload, errors = validate_caption_payload(result)
+                    if payload:
+                        if method != 'direct':
+                            print(f"🔧 Recovered AI response via {method} parsing")
+                        self.parse_metrics.record(self.model_id, method, attempt)
+                        return payload
+                
+                print(f"❌ Unusable AI response (attempt {attempt}/{self.max_attempts}): {'; '.join(errors)}")
+                
+                # Re-ask with the previous reply and what was wrong with it
+                conversation.append({
+                    "role": "assistant",
+                    "content": [{"text": model_response}]
+                })
+                conversation.append({
+                    "role": "user",
+                    "content": [{"text": (
+                        "Your previous reply could not be used: " + '; '.join(errors) + ". "
+                        "Reply with ONLY the JSON object in the requested format - "
+                        "no markdown fences and no text before or after it."
+                    )}]
+                })
+            
+            self.parse_metrics.record(self.model_id, None, self.max_attempts)
+            return {'kaomoji': '', 'fun_fact': '', 'fun_fact_followup': '', 'niche_hashtags': [], 'broad_hashtags': [], 'hashtags': []}
             
         except Exception as e:
             print(f"❌ Error generating content: {e}")
@@ -296,79 +305,7 @@ class CaptionGenerator:
         Returns:
             str: Formatted caption with fun fact and hashtags
         """
-        if not kaomoji and not fun_fact and not hashtags:
-            return ""
-        
-        # Build the content parts
-        content_parts = []
-        if kaomoji:
-            content_parts.append(kaomoji)
-        if fun_fact:
-            content_parts.append(fun_fact)
-        
-        main_content = '\n\n'.join(content_parts)
-        # Strip any existing # from hashtags before adding one (AI sometimes includes it)
-        clean_hashtags = [tag.lstrip('#') for tag in hashtags] if hashtags else []
-        hashtags_text = ' '.join([f"#{tag}" for tag in clean_hashtags]) if clean_hashtags else ""
-        
-        if platform == 'instagram':
-            # Instagram: kaomoji + newline + fun_fact + double newline + hashtags
-            if hashtags_text:
-                return f"{main_content}\n\n{hashtags_text}" if main_content else hashtags_text
-            else:
-                return main_content
-            
-        elif platform == 'tiktok':
-            # TikTok: kaomoji + newline + fun_fact + space + hashtags, limited to 150 chars
-            if hashtags_text:
-                full_text = f"{main_content} {hashtags_text}" if main_content else hashtags_text
-            else:
-                full_text = main_content
-            return full_text[:147] + "..." if len(full_text) > 150 else full_text
-            
-        elif platform == 'tumblr':
-            # Tumblr: kaomoji + newline + fun_fact (hashtags handled separately as tags)
-            return main_content
-            
-        elif platform == 'bluesky':
-            # Bluesky: kaomoji + double newline + hashtags (with facets)
-            # Bluesky has a 300 character limit, so we need to be more careful
-            if kaomoji and hashtags_text:
-                full_text = f"{kaomoji}\n\n{hashtags_text}"
-            elif kaomoji:
-                full_text = kaomoji
-            elif hashtags_text:
-                full_text = hashtags_text
-            else:
-                full_text = ""
-            
-            # Check character limit
-            if len(full_text) > 300:
-                # If too long, try just kaomoji
-                if kaomoji and len(kaomoji) <= 300:
-                    return kaomoji
-                # Last resort: just hashtags
-                if hashtags_text and len(hashtags_text) <= 300:
-                    return hashtags_text
-                # If everything is too long, return empty
-                return ""
-            
-            return full_text
-        
-        elif platform == 'threads':
-            # Threads: kaomoji + fun_fact + hashtags (500 char limit)
-            # Similar to Instagram but with 500 char limit
-            if hashtags_text:
-                return f"{main_content}\n\n{hashtags_text}" if main_content else hashtags_text
-            else:
-                return main_content
-            
-        else:
-            # Default: kaomoji + newline + fun_fact + space + hashtags
-            if hashtags_text:
-                return f"{main_content} {hashtags_text}" if main_content else hashtags_text
-            else:
-                return main_content
+        return caption_renderer.format_caption(kaomoji, fun_fact, hashtags, platform)
     
     def get_bluesky_facets(self, full_text, hashtags):
         """
@@ -381,39 +318,11 @@ class CaptionGenerator:
         Returns:
             list: Bluesky facets for hashtags
         """
-        if not hashtags:
-            return []
-            
-        facets = []
-        
-        # Find the start of hashtags section (after double newline)
-        hashtag_start = full_text.find('\n\n')
-        if hashtag_start == -1:
-            return facets
-            
-        byte_offset = len(full_text[:hashtag_start + 2].encode('utf-8'))
-        
-        for tag in hashtags:
-            word = f"#{tag}"
-            word_bytes = word.encode('utf-8')
-            word_length = len(word_bytes)
-            end_byte_offset = byte_offset + word_length
-            
-            facets.append({
-                "index": {"byteStart": byte_offset, "byteEnd": end_byte_offset},
-                "features": [{
-                    "$type": "app.bsky.richtext.facet#tag",
-                    "tag": tag
-                }]
-            })
-            
-            byte_offset += word_length + 1  # +1 for the space
-        
-        return facets
+        return caption_renderer.get_bluesky_facets(full_text, hashtags)
 
 
 # Function for content queue generation (used during media upload)
-def generate_content_captions(media_url, recent_kaomojis=None):
+def generate_content_captions(media_url, recent_kaomojis=None, caption_style=None):
     """
     Generate captions for all platforms using simplified AI approach
     Used only during media upload to pre-generate all caption data
@@ -421,6 +330,7 @@ def generate_content_captions(media_url, recent_kaomojis=None):
     Args:
         media_url (str): URL of the media
         recent_kaomojis (list): List of recently used kaomojis to avoid (optional)
+        caption_style (str): Extra style instructions for the account (optional)
         
     Returns:
         dict: Captions formatted for each platform
@@ -429,42 +339,16 @@ def generate_content_captions(media_url, recent_kaomojis=None):
     
     # Single AI call for kaomoji, both fun facts, and hashtags
     # Pass recent kaomojis to avoid repetition
-    ai_result = generator.generate_caption_and_hashtags(media_url, recent_kaomojis=recent_kaomojis)
+    ai_result = generator.generate_caption_and_hashtags(
+        media_url, recent_kaomojis=recent_kaomojis, caption_style=caption_style
+    )
     kaomoji = ai_result['kaomoji']
     fun_fact = ai_result['fun_fact']
     fun_fact_followup = ai_result['fun_fact_followup']
     hashtags = ai_result['hashtags']
     
-    # Create Instagram caption with engagement hook (bold CTA)
-    # Strip any existing # from hashtags (AI sometimes includes it)
-    clean_hashtags = [tag.lstrip('#') for tag in hashtags] if hashtags else []
-    hashtags_text = ' '.join([f"#{tag}" for tag in clean_hashtags]) if clean_hashtags else ""
-    
-    # TODO: Uncomment when Instagram messaging permissions are approved
-    # cta_text = "Comment FUN FACT to receive another didactic fun fact in your DMs!"
-    # bold_cta = generator.to_bold_unicode(cta_text)
-    # instagram_caption = f"{kaomoji}\n\n{fun_fact}\n\n{bold_cta}"
-    
-    # Temporary caption format without DM CTA (until messaging permissions approved)
-    instagram_caption = f"{kaomoji}\n\n{fun_fact}"
-    if hashtags_text:
-        instagram_caption += f"\n\n{hashtags_text}"
-    
-    # Same hashtags across all platforms
-    return {
-        'base_caption': kaomoji,
-        'fun_fact': fun_fact,
-        'fun_fact_followup': fun_fact_followup,
-        'instagram': instagram_caption,
-        'tiktok': generator.format_caption_for_platform(kaomoji, fun_fact, hashtags, 'tiktok'),
-        'tumblr': generator.format_caption_for_platform(kaomoji, fun_fact, hashtags, 'tumblr'),
-        'bluesky': generator.format_caption_for_platform(kaomoji, fun_fact, hashtags, 'bluesky'),
-        'threads': generator.format_caption_for_platform(kaomoji, fun_fact, hashtags, 'threads'),
-        'hashtags': {
-            'instagram': hashtags,
-            'tiktok': hashtags,
-            'tumblr': hashtags,
-            'bluesky': hashtags,
-            'threads': hashtags
-        }
-    }
+    # Render every platform variant (and Bluesky facets) in one pass
+    captions = caption_renderer.render_captions(kaomoji, fun_fact, hashtags)
+    captions['fun_fact'] = fun_fact
+    captions['fun_fact_followup'] = fun_fact_followup
+    return captions
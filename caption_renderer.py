@@ -0,0 +1,257 @@
+"""
+Caption rendering for every platform
+Pure string formatting with no third-party imports, safe to use at post time
+"""
+
+
+# Character limits enforced by the platforms
+TIKTOK_CAPTION_LIMIT = 150
+BLUESKY_TEXT_LIMIT = 300
+
+PLATFORMS = ('instagram', 'tiktok', 'tumblr', 'bluesky', 'threads')
+
+_PLAIN_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+_BOLD_CHARS = (
+    '𝗔𝗕𝗖𝗗𝗘𝗙𝗚𝗛𝗜𝗝𝗞𝗟𝗠𝗡𝗢𝗣𝗤𝗥𝗦𝗧𝗨𝗩𝗪𝗫𝗬𝗭'
+    '𝗮𝗯𝗰𝗱𝗲𝗳𝗴𝗵𝗶𝗷𝗸𝗹𝗺𝗻𝗼𝗽𝗾𝗿𝘀𝘁𝘂𝘃𝘄𝘅𝘆𝘇'
+    '𝟬𝟭𝟮𝟯𝟰𝟱𝟲𝟳𝟴𝟵'
+)
+
+# Built once at import; str.translate does the per-character mapping in C
+BOLD_TRANSLATION = str.maketrans(dict(zip(_PLAIN_CHARS, _BOLD_CHARS)))
+
+
+def to_bold_unicode(text):
+    """
+    Convert text to Unicode bold characters for Instagram
+
+    Args:
+        text (str): Text to convert to bold
+
+    Returns:
+        str: Text with Unicode bold characters
+    """
+    return text.translate(BOLD_TRANSLATION)
+
+
+def clean_hashtags(hashtags):
+    """
+    Strip any leading # from hashtags (the AI sometimes includes it)
+
+    Args:
+        hashtags (list): List of hashtag strings
+
+    Returns:
+        list: Hashtags without leading #
+    """
+    return [tag.lstrip('#') for tag in hashtags] if hashtags else []
+
+
+def _hashtags_text(tags):
+    """Join cleaned hashtags into '#a #b #c'"""
+    return ' '.join(f"#{tag}" for tag in tags)
+
+
+def _join(main_content, hashtags_text, separator):
+    """Join main content and hashtags, dropping whichever part is empty"""
+    if hashtags_text:
+        return f"{main_content}{separator}{hashtags_text}" if main_content else hashtags_text
+    return main_content
+
+
+def _render_bluesky(kaomoji, hashtags_text):
+    """Bluesky text: kaomoji + double newline + hashtags within 300 chars"""
+    if kaomoji and hashtags_text:
+        full_text = f"{kaomoji}\n\n{hashtags_text}"
+    else:
+        full_text = kaomoji or hashtags_text or ""
+
+    if len(full_text) > BLUESKY_TEXT_LIMIT:
+        # If too long, try just kaomoji, then just hashtags
+        if kaomoji and len(kaomoji) <= BLUESKY_TEXT_LIMIT:
+            return kaomoji
+        if hashtags_text and len(hashtags_text) <= BLUESKY_TEXT_LIMIT:
+            return hashtags_text
+        return ""
+
+    return full_text
+
+
+def _render_tiktok(main_content, hashtags_text):
+    """TikTok text: content + space + hashtags, truncated to 150 chars"""
+    full_text = _join(main_content, hashtags_text, ' ')
+    if len(full_text) > TIKTOK_CAPTION_LIMIT:
+        return full_text[:TIKTOK_CAPTION_LIMIT - 3] + "..."
+    return full_text
+
+
+def format_caption(kaomoji, fun_fact, hashtags, platform):
+    """
+    Format caption with fun fact and hashtags for specific platform
+
+    Args:
+        kaomoji (str): Base kaomoji caption
+        fun_fact (str): Curious fun fact about the content
+        hashtags (list): List of hashtag strings
+        platform (str): Platform name
+
+    Returns:
+        str: Formatted caption with fun fact and hashtags
+    """
+    if not kaomoji and not fun_fact and not hashtags:
+        return ""
+
+    main_content = '\n\n'.join(part for part in (kaomoji, fun_fact) if part)
+    hashtags_text = _hashtags_text(clean_hashtags(hashtags))
+
+    if platform in ('instagram', 'threads'):
+        return _join(main_content, hashtags_text, '\n\n')
+    elif platform == 'tiktok':
+        return _render_tiktok(main_content, hashtags_text)
+    elif platform == 'tumblr':
+        # Hashtags are sent separately as Tumblr tags
+        return main_content
+    elif platform == 'bluesky':
+        return _render_bluesky(kaomoji, hashtags_text)
+    else:
+        return _join(main_content, hashtags_text, ' ')
+
+
+def _byte_offset(text, char_index):
+    """Convert a character index in text to a UTF-8 byte offset"""
+    return len(text[:char_index].encode('utf-8'))
+
+
+def get_bluesky_facets(full_text, hashtags):
+    """
+    Generate Bluesky facets for hashtags
+
+    Each hashtag is located in the final text as a standalone word, so the
+    offsets are correct whichever 300-char fallback produced the text.
+
+    Args:
+        full_text (str): Complete text with hashtags
+        hashtags (list): List of hashtag strings
+
+    Returns:
+        list: Bluesky facets for hashtags found in the text
+    """
+    if not hashtags or not full_text:
+        return []
+
+    facets = []
+    search_from = 0
+
+    for tag in clean_hashtags(hashtags):
+        if not tag:
+            continue
+        word = f"#{tag}"
+        position = full_text.find(word, search_from)
+
+        # Skip partial matches such as '#art' inside '#artwork'
+        while position != -1:
+            before = full_text[position - 1] if position > 0 else ' '
+            end = position + len(word)
+            after = full_text[end] if end < len(full_text) else ' '
+            if before.isspace() and after.isspace():
+                break
+            position = full_text.find(word, position + 1)
+
+        if position == -1:
+            continue
+
+        byte_start = _byte_offset(full_text, position)
+        facets.append({
+            "index": {
+                "byteStart": byte_start,
+                "byteEnd": byte_start + len(word.encode('utf-8'))
+            },
+            "features": [{
+                "$type": "app.bsky.richtext.facet#tag",
+                "tag": tag
+            }]
+        })
+        search_from = position + len(word)
+
+    return facets
+
+
+def validate_facets(full_text, facets):
+    """
+    Keep only facets whose byte range matches their hashtag in the text
+
+    Args:
+        full_text (str): Final post text
+        facets (list): Bluesky facets to check
+
+    Returns:
+        tuple: (valid_facets, errors)
+    """
+    text_bytes = full_text.encode('utf-8') if full_text else b''
+    valid = []
+    errors = []
+    previous_end = 0
+
+    for facet in facets or []:
+        try:
+            start = facet['index']['byteStart']
+            end = facet['index']['byteEnd']
+            tag = facet['features'][0]['tag']
+        except (KeyError, IndexError, TypeError):
+            errors.append(f"malformed facet: {facet}")
+            continue
+
+        if not (isinstance(start, int) and isinstance(end, int)) or not 0 <= start < end <= len(text_bytes):
+            errors.append(f"facet #{tag} out of range ({start}-{end})")
+        elif start < previous_end:
+            errors.append(f"facet #{tag} overlaps previous facet")
+        elif text_bytes[start:end] != f"#{tag}".encode('utf-8'):
+            errors.append(f"facet #{tag} does not match text at {start}-{end}")
+        else:
+            valid.append(facet)
+            previous_end = end
+
+    return valid, errors
+
+
+def render_captions(kaomoji, fun_fact, hashtags):
+    """
+    Render every platform variant and the Bluesky facets in one pass
+
+    Args:
+        kaomoji (str): Base kaomoji caption
+        fun_fact (str): Curious fun fact about the content
+        hashtags (list): List of hashtag strings (shared by all platforms)
+
+    Returns:
+        dict: Captions per platform, per-platform hashtags (without #) and
+              Bluesky facets checked against the final Bluesky text
+    """
+    tags = clean_hashtags(hashtags)
+    hashtags_text = _hashtags_text(tags)
+
+    if kaomoji or fun_fact or hashtags:
+        main_content = '\n\n'.join(part for part in (kaomoji, fun_fact) if part)
+        long_form = _join(main_content, hashtags_text, '\n\n')
+        tiktok = _render_tiktok(main_content, hashtags_text)
+        bluesky = _render_bluesky(kaomoji, hashtags_text)
+    else:
+        main_content = long_form = tiktok = bluesky = ""
+
+    # TODO: Add the bold DM CTA when Instagram messaging permissions are approved
+    # cta_text = "Comment FUN FACT to receive another didactic fun fact in your DMs!"
+    # instagram = f"{kaomoji}\n\n{fun_fact}\n\n{to_bold_unicode(cta_text)}"
+    instagram = f"{kaomoji}\n\n{fun_fact}"
+    if hashtags_text:
+        instagram += f"\n\n{hashtags_text}"
+
+    return {
+        'base_caption': kaomoji,
+        'instagram': instagram,
+        'tiktok': tiktok,
+        'tumblr': main_content,
+        'bluesky': bluesky,
+        'threads': long_form,
+        'hashtags': {platform: tags for platform in PLATFORMS},
+        'bluesky_facets': validate_facets(bluesky, get_bluesky_facets(bluesky, tags))[0]
+    }
@@ -0,0 +1,193 @@
+"""
+Incremental Instagram comment sync
+Keeps a per-media high-water mark (newest comment seen) and comment count, so
+each poll lists recent media once, then fetches only the media whose count
+changed, asking for comments newer than the mark in one Graph batch request
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from config import COMMENT_SYNC_FILE, DM_POLL_MEDIA_LIMIT, DM_POLL_WINDOW_MINUTES
+from identity_cache import is_auth_error
+from tracing import span
+
+
+# Graph API batch requests carry at most 50 calls
+GRAPH_BATCH_LIMIT = 50
+
+# Comment fields the DM responder needs
+COMMENT_FIELDS = 'id,text,from,timestamp'
+
+# Pages followed per media in one sync (a burst of comments on one post)
+MAX_PAGES_PER_MEDIA = 10
+
+
+def parse_timestamp(value):
+    """Parse a Graph API timestamp ('2024-05-01T12:00:00+0000')"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00').replace('+0000', '+00:00'))
+
+
+class CommentSync:
+    """
+    Fetches comments posted since the last sync
+    """
+
+    def __init__(self, session, base_url, access_token, state_file=COMMENT_SYNC_FILE,
+                 media_limit=DM_POLL_MEDIA_LIMIT, first_window_minutes=DM_POLL_WINDOW_MINUTES):
+        self.session = session
+        self.base_url = base_url
+        self.access_token = access_token
+        self.state_file = state_file
+        self.media_limit = media_limit
+        self.first_window = timedelta(minutes=first_window_minutes)
+        self.last_error = None
+
+    def _load_state(self):
+        """Load per-media sync state from file"""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _save_state(self, state):
+        """Save per-media sync state to file"""
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            with open(self.state_file, 'w') as f:
+                json.dump(state, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save comment sync state: {e}")
+
+    def _list_media(self, account_id):
+        """Recent media with their comment counts (one request)"""
+        response = self.session.get(f"{self.base_url}/{account_id}/media", params={
+            'access_token': self.access_token,
+            'fields': 'id,timestamp,comments_count',
+            'limit': self.media_limit
+        })
+        data = response.json()
+        if 'data' not in data:
+            self.last_error = data
+            return None
+        return data['data']
+
+    def _fetch_new_comments(self, changed):
+        """
+        Fetch comments newer than each media's mark
+
+        Args:
+            changed (dict): media_id -> high-water mark (datetime)
+
+        Returns:
+            dict: media_id -> list of comment pages (first page from the batch)
+        """
+        pages = {}
+        media_ids = list(changed)
+        for start in range(0, len(media_ids), GRAPH_BATCH_LIMIT):
+            chunk = media_ids[start:start + GRAPH_BATCH_LIMIT]
+            batch = [{
+                'method': 'GET',
+                'relative_url': (f"{media_id}/comments?fields={COMMENT_FIELDS}&limit=50"
+                                 f"&since={int(changed[media_id].timestamp())}")
+            } for media_id in chunk]
+            response = self.session.post(self.base_url, data={
+                'access_token': self.access_token,
+                'batch': json.dumps(batch)
+            })
+            replies = response.json()
+            if not isinstance(replies, list):
+                self.last_error = replies
+                continue
+            for media_id, reply in zip(chunk, replies):
+                if reply and reply.get('code') == 200:
+                    pages[media_id] = [json.loads(reply['body'])]
+                else:
+                    print(f"⚠️ Could not fetch comments for media {media_id}: {(reply or {}).get('body')}")
+
+        # Bursts spill over to more pages; follow them until the mark is reached
+        for media_id, media_pages in pages.items():
+            page = media_pages[0]
+            while len(media_pages) < MAX_PAGES_PER_MEDIA and page.get('paging', {}).get('next'):
+                if any(parse_timestamp(comment['timestamp']) <= changed[media_id] for comment in page.get('data', [])):
+                    break
+                page = self.session.get(page['paging']['next']).json()
+                media_pages.append(page)
+        return pages
+
+    def sync(self, account_id, now=None):
+        """
+        Get the comments posted on recent media since the last sync
+
+        Media seen for the first time only report comments from the last few
+        minutes, so enabling the sync does not answer old comments
+
+        Args:
+            account_id (str): Instagram Business Account ID
+
+        Returns:
+            list: New comments (id, text, from, timestamp, media_id), or None
+                  if the media list could not be fetched
+        """
+        now = now or datetime.now(timezone.utc)
+        self.last_error = None
+        state = self._load_state()
+        known = state.get('media', {})
+
+        try:
+            with span('instagram.comment_sync', 'poll') as sync_span:
+                media_list = self._list_media(account_id)
+                if media_list is None:
+                    print(f"❌ Could not list media: {self.last_error}")
+                    return None
+
+                changed = {}
+                for media in media_list:
+                    entry = known.get(media['id'])
+                    if entry is None:
+                        if media.get('comments_count'):
+                            changed[media['id']] = now - self.first_window
+                    elif media.get('comments_count', 0) != entry.get('comments_count'):
+                        changed[media['id']] = datetime.fromisoformat(entry['high_water'])
+
+                pages = self._fetch_new_comments(changed) if changed else {}
+                sync_span.set(media=len(media_list), changed=len(changed))
+        except Exception as e:
+            print(f"❌ Error syncing comments: {e}")
+            return None
+
+        comments = []
+        synced = {}
+        for media in media_list:
+            media_id = media['id']
+            entry = dict(known.get(media_id) or {'high_water': (now - self.first_window).isoformat()})
+            if media_id in changed and media_id not in pages:
+                # Fetch failed: keep the old count so the next sync tries again
+                synced[media_id] = entry
+                continue
+
+            high_water = datetime.fromisoformat(entry['high_water'])
+            for page in pages.get(media_id, []):
+                for comment in page.get('data', []):
+                    created = parse_timestamp(comment['timestamp'])
+                    # 'since' is a hint; the mark decides what is new
+                    if created > changed[media_id]:
+                        comment['media_id'] = media_id
+                        comments.append(comment)
+                        high_water = max(high_water, created)
+
+            entry['high_water'] = high_water.isoformat()
+            entry['comments_count'] = media.get('comments_count', 0)
+            synced[media_id] = entry
+
+        # Media that dropped out of the recent list are forgotten
+        self._save_state({'media': synced, 'synced_at': now.isoformat()})
+        print(f"🔄 Comment sync: {len(media_list)} media, {len(changed)} with new activity, {len(comments)} new comments")
+        return comments
+
+    def auth_failed(self):
+        """Check whether the last sync failed on an expired or invalid token"""
+        return is_auth_error(self.last_error)
@@ -3,9 +3,40 @@ Configuration settings for the scheduled posting system
 """
 
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _load_env_file():
+    """
+    Load the nearest .env file (searching upwards like python-dotenv does)
+    dotenv is only imported when a .env file exists, keeping CLI startup fast
+
+    Returns:
+        str: Path of the loaded .env file, or None if there is none
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        env_path = os.path.join(directory, '.env')
+        if os.path.isfile(env_path):
+            from dotenv import load_dotenv
+            load_dotenv(env_path)
+            return env_path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+# .env watched for renewed tokens (next to this file if none exists yet)
+ENV_FILE = _load_env_file() or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+
+def reload_env_file():
+    """
+    Re-read ENV_FILE so renewed tokens replace the values loaded at startup
+    """
+    if os.path.isfile(ENV_FILE):
+        from dotenv import load_dotenv
+        load_dotenv(ENV_FILE, override=True)
 
 # AWS Configuration
 # Bedrock AI credentials (for caption generation)
@@ -19,12 +50,27 @@ AWS_SECRET_ACCESS_KEY_S3 = os.getenv('AWS_SECRET_ACCESS_KEY_S3')
 # S3 Configuration
 S3_BUCKET = os.getenv('S3_BUCKET', 'majindonpatch-public')
 S3_PATH = 'posts_insta'
-S3_URL_BASE = f'https://{S3_BUCKET}.s3.amazonaws.com/{S3_PATH}/'
+S3_URL_BASE = os.getenv('S3_URL_BASE', f'https://{S3_BUCKET}.s3.amazonaws.com/{S3_PATH}/')
+
+# API endpoints. Override them to run against a local stand-in server
+# (benchmarks/mock_platforms.py) instead of the live services
+INSTAGRAM_API_BASE = os.getenv('INSTAGRAM_API_BASE', 'https://graph.facebook.com/v21.0')
+THREADS_API_BASE = os.getenv('THREADS_API_BASE', 'https://graph.threads.net/v1.0')
+TIKTOK_API_BASE = os.getenv('TIKTOK_API_BASE', 'https://open.tiktokapis.com/v2')
+TUMBLR_API_HOST = os.getenv('TUMBLR_API_HOST', 'https://api.tumblr.com')
+BLUESKY_API_BASE = os.getenv('BLUESKY_API_BASE')  # None: atproto's default (bsky.social)
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL')  # None: AWS
+BEDROCK_ENDPOINT_URL = os.getenv('BEDROCK_ENDPOINT_URL')  # None: AWS
 
 # Social Media API Configuration
 INSTAGRAM_ACCESS_TOKEN = os.getenv('INSTAGRAM_ACCESS_TOKEN')
 INSTAGRAM_PAGE_ID = os.getenv('INSTAGRAM_PAGE_ID')
 TIKTOK_ACCESS_TOKEN = os.getenv('TIKTOK_ACCESS_TOKEN')
+# TikTok access tokens last about 24 hours; with these set, the publisher
+# refreshes them from the refresh token instead of using TIKTOK_ACCESS_TOKEN
+TIKTOK_CLIENT_KEY = os.getenv('TIKTOK_CLIENT_KEY')
+TIKTOK_CLIENT_SECRET = os.getenv('TIKTOK_CLIENT_SECRET')
+TIKTOK_REFRESH_TOKEN = os.getenv('TIKTOK_REFRESH_TOKEN')
 # AWS Bedrock is used for AI captions (using same AWS credentials as S3)
 
 # Tumblr API Configuration
@@ -37,16 +83,114 @@ TUMBLR_BLOG_NAME = os.getenv('TUMBLR_BLOG_NAME')
 # Bluesky Configuration
 BLUESKY_USERNAME = os.getenv('BLUESKY_USERNAME')
 BLUESKY_PASSWORD = os.getenv('BLUESKY_PASSWORD')
+# Saved access/refresh session (contains JWTs - never commit this file)
+BLUESKY_SESSION_FILE = os.getenv('BLUESKY_SESSION_FILE', '.bluesky_session.json')
 
 # Threads Configuration
 THREADS_ACCESS_TOKEN = os.getenv('THREADS_ACCESS_TOKEN')
 THREADS_APP_SECRET = os.getenv('THREADS_APP_SECRET')
 
+# Construct publishers (logins, account lookups) concurrently with the media download
+PREWARM_PUBLISHERS = os.getenv('PREWARM_PUBLISHERS', 'true').lower() == 'true'
+# How TikTok and Tumblr get the media: 'upload' (the runner downloads the file
+# and uploads it) or 'url' (the platform pulls it from S3), e.g. 'tiktok=url,tumblr=url'.
+# TikTok's PULL_FROM_URL needs the S3 domain verified in the TikTok developer portal
+# Tumblr only pulls photos by URL; its videos are always uploaded
+PLATFORM_MEDIA_SOURCE = os.getenv('PLATFORM_MEDIA_SOURCE', '')
+
+# How the next item is picked: aging, fifo, random, round_robin or diversity
+SELECTION_POLICY = os.getenv('SELECTION_POLICY', 'aging')
+
+# Retrying individual platforms that failed when an item was posted
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY_MINUTES = int(os.getenv('RETRY_BASE_DELAY_MINUTES', '30'))
+RETRY_WINDOW_DAYS = int(os.getenv('RETRY_WINDOW_DAYS', '3'))
+
+# Slot-based scheduling ('python main.py plan' / 'python main.py post --due')
+# Weekly slots in the runner's local time (UTC on GitHub Actions), as in the crons
+POSTING_SLOTS = os.getenv(
+    'POSTING_SLOTS',
+    'mon 22:00, tue 19:30, wed 22:15, thu 21:45, fri 15:45, sat 13:30, sun 22:10'
+)
+# Minimum hours between posts per platform, e.g. 'tiktok=24,tumblr=12'
+PLATFORM_MIN_GAP_HOURS = os.getenv('PLATFORM_MIN_GAP_HOURS', '')
+MAX_POSTS_PER_DAY = int(os.getenv('MAX_POSTS_PER_DAY', '1'))
+# No slots in this hour range, e.g. '01-07' (empty to disable)
+QUIET_HOURS = os.getenv('QUIET_HOURS', '')
+PLAN_HORIZON_DAYS = int(os.getenv('PLAN_HORIZON_DAYS', '7'))
+# A planned slot not posted within this many hours is marked missed
+SLOT_EXPIRY_HOURS = int(os.getenv('SLOT_EXPIRY_HOURS', '12'))
+
+# Daemon mode ('python main.py serve'): how often each in-process job runs
+DAEMON_POLL_SECONDS = int(os.getenv('DAEMON_POLL_SECONDS', '60'))
+DAEMON_RETRY_MINUTES = int(os.getenv('DAEMON_RETRY_MINUTES', '15'))
+DAEMON_INGEST_MINUTES = int(os.getenv('DAEMON_INGEST_MINUTES', '10'))
+
+# Multiple accounts ('python main.py accounts'): profiles file and parallelism
+ACCOUNTS_FILE = os.getenv('ACCOUNTS_FILE', 'accounts.json')
+ACCOUNT_WORKERS = int(os.getenv('ACCOUNT_WORKERS', '4'))
+ACCOUNTS_STATE_DIR = 'scheduled_posts/accounts'
+
+# Quotas: max publishes per rolling 24h per account, and the Meta app usage
+# percentage (X-App-Usage) at which publishes are deferred
+PLATFORM_DAILY_CAPS = os.getenv('PLATFORM_DAILY_CAPS', 'instagram=25,threads=250,tiktok=15,tumblr=250')
+APP_USAGE_THRESHOLD = int(os.getenv('APP_USAGE_THRESHOLD', '90'))
+
+# Run tracing: spans for network calls, polls, ffmpeg, PIL, S3 and queue I/O,
+# written as a Chrome trace per run
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+TRACE_DIR = os.getenv('TRACE_DIR', 'traces')
+
 # Content Settings
 SUPPORTED_IMAGE_FORMATS = ['.png', '.jpg', '.jpeg', '.gif']
 SUPPORTED_VIDEO_FORMATS = ['.mp4', '.mov', '.avi']
 MAX_IMAGE_SIZE = (1080, 1080)
 
+# Caption generation: how many times to re-ask the model for valid JSON
+CAPTION_MAX_ATTEMPTS = int(os.getenv('CAPTION_MAX_ATTEMPTS', '3'))
+
 # File paths
 MEDIA_LINKS_FILE = 'scheduled_posts/media_links.json'
 CONTENT_QUEUE_FILE = 'scheduled_posts/content_queue.json'
+CAPTION_METRICS_FILE = 'scheduled_posts/caption_metrics.json'
+IDENTITY_CACHE_FILE = 'scheduled_posts/identity_cache.json'
+POSTING_PLAN_FILE = 'scheduled_posts/posting_plan.json'
+DAEMON_STATE_FILE = 'scheduled_posts/daemon_state.json'
+RATE_LIMIT_FILE = 'scheduled_posts/rate_limits.json'
+POST_INDEX_FILE = 'scheduled_posts/post_index.json'
+
+# FUN FACT DM responder: comment that triggers the DM, and the polling
+# fallback's reach (recent media whose comment counts are checked, and how
+# far back comments count on media the sync has not seen before)
+DM_TRIGGER_TEXT = os.getenv('DM_TRIGGER_TEXT', 'FUN FACT')
+DM_POLL_MEDIA_LIMIT = int(os.getenv('DM_POLL_MEDIA_LIMIT', '25'))
+DM_POLL_WINDOW_MINUTES = int(os.getenv('DM_POLL_WINDOW_MINUTES', '10'))
+COMMENT_SYNC_FILE = 'scheduled_posts/comment_sync.json'
+INTERACTIONS_LOG_FILE = 'instagram_interactions.log'
+
+# Sent-DM ledger: every answered comment is recorded so it is never answered
+# twice. Sends are capped per user per day and per account per hour
+# (Meta allows about 200 automated DMs an hour); Graph batch requests carry
+# up to DM_BATCH_SIZE messages
+DM_LEDGER_FILE = 'scheduled_posts/dm_ledger.json'
+DM_LEDGER_RETENTION_DAYS = int(os.getenv('DM_LEDGER_RETENTION_DAYS', '90'))
+DM_USER_DAILY_LIMIT = int(os.getenv('DM_USER_DAILY_LIMIT', '3'))
+DM_HOURLY_LIMIT = int(os.getenv('DM_HOURLY_LIMIT', '200'))
+DM_BATCH_SIZE = min(int(os.getenv('DM_BATCH_SIZE', '50')), 50)
+
+# Access token expiry tracking: renew when a token expires within
+# TOKEN_RENEW_WINDOW_DAYS, re-check validity with debug_token every
+# TOKEN_CHECK_HOURS, and hold a post when the token has less than
+# TOKEN_MIN_VALID_HOURS left (or is known to be invalid)
+TOKEN_STATE_FILE = 'scheduled_posts/token_state.json'
+TOKEN_RENEW_WINDOW_DAYS = int(os.getenv('TOKEN_RENEW_WINDOW_DAYS', '14'))
+TOKEN_CHECK_HOURS = int(os.getenv('TOKEN_CHECK_HOURS', '6'))
+TOKEN_MIN_VALID_HOURS = int(os.getenv('TOKEN_MIN_VALID_HOURS', '2'))
+# Renewed or rotated tokens waiting for a workflow to copy them into the
+# repository secrets (gitignored; the workflow deletes it afterwards)
+TOKEN_OUTPUT_FILE = 'renewed_tokens.json'
+# A cached TikTok access token is refreshed when it has less than this left
+TIKTOK_TOKEN_MARGIN_MINUTES = int(os.getenv('TIKTOK_TOKEN_MARGIN_MINUTES', '15'))
+
+# How long cached platform IDs (Instagram account, Threads user) are trusted
+IDENTITY_CACHE_TTL_DAYS = int(os.getenv('IDENTITY_CACHE_TTL_DAYS', '7'))
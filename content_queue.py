@@ -5,9 +5,27 @@ Simple, clean queue operations for scheduled posting
 
 import json
 import os
-import random
-from datetime import datetime
-from config import CONTENT_QUEUE_FILE, MEDIA_LINKS_FILE
+from datetime import datetime, timedelta
+from config import (
+    CONTENT_QUEUE_FILE, MEDIA_LINKS_FILE, POST_INDEX_FILE, SELECTION_POLICY,
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY_MINUTES, RETRY_WINDOW_DAYS
+)
+from post_index import PostIndex
+from selection_policies import UnpostedIndex, get_policy
+from tracing import span
+
+
+# Per-platform posting states, checkpointed on the queue item
+PROGRESS_PENDING = 'pending'
+PROGRESS_CONTAINER_CREATED = 'container_created'
+PROGRESS_PUBLISHED = 'published'
+PROGRESS_FAILED = 'failed'
+PROGRESS_SKIPPED = 'skipped'
+
+# Per-platform retry states for platforms that failed when the item was posted
+RETRY_PENDING = 'pending'
+RETRY_SUCCEEDED = 'succeeded'
+RETRY_GAVE_UP = 'gave_up'
 
 
 class ContentQueue:
@@ -16,17 +34,30 @@ class ContentQueue:
     Simple Python data structures for clean queue operations
     """
     
-    def __init__(self):
-        self.queue_file = CONTENT_QUEUE_FILE
-        self.links_file = MEDIA_LINKS_FILE
+    def __init__(self, queue_file=CONTENT_QUEUE_FILE, links_file=MEDIA_LINKS_FILE, selection_policy=SELECTION_POLICY):
+        self.queue_file = queue_file
+        self.links_file = links_file
+        self.selection_policy = selection_policy
         self.queue = self._load_queue()
         self.media_links = self._load_media_links()
+        self._index = None
+        # Kept next to the queue file, so every account has its own index
+        self.post_index = PostIndex(
+            os.path.join(os.path.dirname(queue_file), os.path.basename(POST_INDEX_FILE)), queue_file
+        )
+    
+    @property
+    def unposted_index(self):
+        """Index of unposted items, built on first use and kept up to date"""
+        if self._index is None:
+            self._index = UnpostedIndex(self.queue)
+        return self._index
     
     def _load_queue(self):
         """Load queue from file or create empty queue with duplicate ID validation"""
         if os.path.exists(self.queue_file):
             try:
-                with open(self.queue_file, 'r') as f:
+                with span('queue.load', 'queue', bytes=os.path.getsize(self.queue_file)), open(self.queue_file, 'r') as f:
                     queue = json.load(f)
                     
                 # Validate and fix duplicate IDs
@@ -79,8 +110,9 @@ class ContentQueue:
     def _save_queue(self):
         """Save queue to file with readable Unicode characters"""
         os.makedirs(os.path.dirname(self.queue_file), exist_ok=True)
-        with open(self.queue_file, 'w', encoding='utf-8') as f:
+        with span('queue.save', 'queue') as save, open(self.queue_file, 'w', encoding='utf-8') as f:
             json.dump(self.queue, f, indent=2, ensure_ascii=False)
+            save.set(bytes=f.tell())
     
     def _load_media_links(self):
         """Load media links tracking file"""
@@ -98,7 +130,7 @@ class ContentQueue:
         with open(self.links_file, 'w') as f:
             json.dump(self.media_links, f, indent=2)
     
-    def add_content(self, filename, s3_url, media_type, local_path=None):
+    def add_content(self, filename, s3_url, media_type, local_path=None, caption_style=None):
         """
         Add content to the posting queue with fun facts generation
         
@@ -107,6 +139,7 @@ class ContentQueue:
             s3_url (str): S3 URL of the uploaded content
             media_type (str): 'image' or 'video'
             local_path (str): Local path for platforms that need it
+            caption_style (str): Extra style instructions for the caption model
             
         Returns:
             dict: The content item added to queue
@@ -125,7 +158,9 @@ class ContentQueue:
         
         try:
             from caption_generator import generate_content_captions
-            captions_data = generate_content_captions(s3_url, recent_kaomojis=recent_kaomojis)
+            captions_data = generate_content_captions(
+                s3_url, recent_kaomojis=recent_kaomojis, caption_style=caption_style
+            )
             
             kaomoji = captions_data['base_caption']
             fun_fact = captions_data['fun_fact']
@@ -135,8 +170,11 @@ class ContentQueue:
                 'instagram': captions_data['instagram'],
                 'tiktok': captions_data['tiktok'],
                 'tumblr': captions_data['tumblr'],
-                'bluesky': captions_data['bluesky']
+                'bluesky': captions_data['bluesky'],
+                'threads': captions_data['threads']
             }
+            # Facets are rendered and checked against the Bluesky text once, here
+            bluesky_facets = captions_data['bluesky_facets']
             engagement_hook_used = True
             
             print(f"✅ Generated complete caption data for {filename}")
@@ -151,8 +189,10 @@ class ContentQueue:
                 'instagram': "",
                 'tiktok': "",
                 'tumblr': "",
-                'bluesky': ""
+                'bluesky': "",
+                'threads': ""
             }
+            bluesky_facets = []
             engagement_hook_used = False
         
         content_item = {
@@ -170,10 +210,13 @@ class ContentQueue:
             'fun_fact_followup': fun_fact_followup,
             'hashtags': hashtags,
             'platform_captions': platform_captions,
+            'bluesky_facets': bluesky_facets,
             'engagement_hook_used': engagement_hook_used
         }
         
         self.queue.append(content_item)
+        if self._index is not None:
+            self._index.add(len(self.queue) - 1)
         self._save_queue()
         
         # Also track in media links for permanent record
@@ -189,24 +232,121 @@ class ContentQueue:
         print(f"✅ Added to queue: {filename} -> {s3_url}")
         return content_item
     
-    def get_next_content(self):
+    def get_next_content(self, policy=None):
         """
-        Get the next content item to post (random selection from unposted)
+        Get the next content item to post, chosen by the selection policy
         
+        Args:
+            policy (str): Selection policy name (default: the queue's policy)
+            
         Returns:
             dict: Content item to post, or None if queue is empty
         """
-        unposted = [item for item in self.queue if not item['posted']]
+        # Finish an interrupted run first so nothing gets posted twice
+        in_progress = self.get_in_progress_content()
+        if in_progress:
+            print(f"♻️ Resuming interrupted post: {in_progress['filename']}")
+            return in_progress
         
-        if not unposted:
+        index = self.unposted_index
+        if not index.count():
             print("📭 No content available in queue")
             return None
         
-        # Random selection from unposted content
-        selected = random.choice(unposted)
-        print(f"🎯 Selected for posting: {selected['filename']}")
+        policy = policy or self.selection_policy
+        selected = get_policy(policy).select(index)
+        print(f"🎯 Selected for posting ({policy}): {selected['filename']}")
         return selected
     
+    def get_in_progress_content(self):
+        """
+        Get an unposted item whose posting was started but never finished
+        
+        Returns:
+            dict: Content item, or None
+        """
+        # Tracked by the unposted index (start_posting / mark_as_posted keep it current)
+        return self.unposted_index.first_in_progress()
+    
+    def _find_position(self, content_id):
+        """Find a queue item's position by ID"""
+        for position, item in enumerate(self.queue):
+            if item['id'] == content_id:
+                return position
+        return None
+    
+    def _find_item(self, content_id):
+        """Find a queue item by ID"""
+        position = self._find_position(content_id)
+        return None if position is None else self.queue[position]
+    
+    def _track_in_progress(self, position):
+        """Record a started posting in the unposted index, if it is built"""
+        if self._index is not None:
+            self._index.mark_in_progress(position)
+    
+    def get_content(self, content_id):
+        """
+        Get a content item by ID
+        
+        Args:
+            content_id (int): ID of the content item
+            
+        Returns:
+            dict: Content item, or None if it is not in the queue
+        """
+        return self._find_item(content_id)
+    
+    def start_posting(self, content_id, platforms):
+        """
+        Record that posting has started, creating per-platform progress
+        
+        Args:
+            content_id (int): ID of the content item
+            platforms (list): Platforms that will be attempted
+            
+        Returns:
+            dict: platform -> progress entry (existing entries are kept for resume)
+        """
+        position = self._find_position(content_id)
+        if position is None:
+            return {}
+        item = self.queue[position]
+        self._track_in_progress(position)
+        
+        progress = item.setdefault('platform_progress', {})
+        for platform in platforms:
+            progress.setdefault(platform, {'state': PROGRESS_PENDING})
+        item.setdefault('posting_started', datetime.now().isoformat())
+        
+        self._save_queue()
+        return progress
+    
+    def update_platform_progress(self, content_id, platform, state, **fields):
+        """
+        Checkpoint one platform's progress to disk immediately
+        
+        Args:
+            content_id (int): ID of the content item
+            platform (str): Platform name
+            state (str): One of the PROGRESS_* states
+            **fields: Extra data to keep, e.g. container_id or result
+        """
+        position = self._find_position(content_id)
+        if position is None:
+            return
+        item = self.queue[position]
+        self._track_in_progress(position)
+        
+        if 'result' in fields:
+            fields['result'] = self._clean_results_for_json({platform: fields['result']})[platform]
+        
+        entry = item.setdefault('platform_progress', {}).setdefault(platform, {})
+        entry.update(fields)
+        entry['state'] = state
+        entry['updated_at'] = datetime.now().isoformat()
+        self._save_queue()
+    
     def mark_as_posted(self, content_id, results):
         """
         Mark content as posted with results
@@ -218,16 +358,125 @@ class ContentQueue:
         # Clean results to make them JSON serializable
         clean_results = self._clean_results_for_json(results)
         
-        for item in self.queue:
+        for position, item in enumerate(self.queue):
             if item['id'] == content_id:
+                if self._index is not None:
+                    self._index.remove(position)
                 item['posted'] = True
                 item['posted_date'] = datetime.now().isoformat()
                 item['posting_results'] = clean_results
+                self._schedule_retries(item)
+                self.post_index.add(item)
                 break
         
         self._save_queue()
         print(f"✅ Marked as posted: ID {content_id}")
     
+    def _retry_delay(self, attempts):
+        """Exponential backoff: base delay doubled per attempt, capped at a day"""
+        return timedelta(minutes=min(RETRY_BASE_DELAY_MINUTES * (2 ** attempts), 24 * 60))
+    
+    def _schedule_retries(self, item):
+        """
+        Queue a retry for every platform that failed (result None)
+        
+        Args:
+            item (dict): Queue item that was just posted
+        """
+        progress = item.get('platform_progress', {})
+        now = datetime.now()
+        
+        for platform, result in item['posting_results'].items():
+            if result is not None or platform in item.get('retries', {}):
+                continue
+            reason = progress.get(platform, {}).get('reason') or 'Publisher returned no result'
+            next_attempt = now + self._retry_delay(0)
+            # A rate-limited platform is not retried before its quota resets
+            retry_after = progress.get(platform, {}).get('retry_after')
+            if retry_after:
+                next_attempt = max(next_attempt, datetime.fromisoformat(retry_after))
+            item.setdefault('retries', {})[platform] = {
+                'status': RETRY_PENDING,
+                'attempts': 0,
+                'next_attempt': next_attempt.isoformat(),
+                'reasons': [{'at': now.isoformat(), 'reason': reason[:300]}]
+            }
+            print(f"🔁 Queued {platform} for retry: {reason[:100]}")
+    
+    def get_due_retries(self, window_days=None):
+        """
+        Get recently posted items with platform retries that are due now
+        
+        Args:
+            window_days (int): Only retry items posted within this many days
+            
+        Returns:
+            list: (item, [platforms]) tuples
+        """
+        window_days = RETRY_WINDOW_DAYS if window_days is None else window_days
+        now = datetime.now()
+        cutoff = now - timedelta(days=window_days)
+        due = []
+        
+        for item in self.queue:
+            retries = item.get('retries')
+            if not item['posted'] or not retries or not item.get('posted_date'):
+                continue
+            if datetime.fromisoformat(item['posted_date']) < cutoff:
+                continue
+            platforms = [
+                platform for platform, retry in retries.items()
+                if retry['status'] == RETRY_PENDING
+                and datetime.fromisoformat(retry['next_attempt']) <= now
+            ]
+            if platforms:
+                due.append((item, platforms))
+        
+        return due
+    
+    def record_retry_result(self, content_id, platform, result, reason=None, retry_after=None):
+        """
+        Record the outcome of one platform retry
+        
+        Args:
+            content_id (int): ID of the content item
+            platform (str): Platform that was retried
+            result: Publisher result (None if it failed again)
+            reason (str): Why it failed, if it did
+            retry_after (str): ISO time the platform's quota resets, if it was
+                               deferred (a deferral does not use up an attempt)
+        """
+        item = self._find_item(content_id)
+        if item is None or platform not in item.get('retries', {}):
+            return
+        
+        retry = item['retries'][platform]
+        now = datetime.now()
+        retry['last_attempt'] = now.isoformat()
+        
+        if result is None and retry_after:
+            retry['next_attempt'] = retry_after
+            print(f"⏸️ Retry deferred: {platform} for ID {content_id} until {retry_after[:16]}")
+            self._save_queue()
+            return
+        
+        retry['attempts'] += 1
+        if result is not None:
+            item['posting_results'][platform] = self._clean_results_for_json({platform: result})[platform]
+            retry['status'] = RETRY_SUCCEEDED
+            self.post_index.add(item)
+            print(f"✅ Retry succeeded: {platform} for ID {content_id}")
+        else:
+            retry['reasons'].append({'at': now.isoformat(), 'reason': (reason or 'Publisher returned no result')[:300]})
+            if retry['attempts'] >= RETRY_MAX_ATTEMPTS:
+                retry['status'] = RETRY_GAVE_UP
+                print(f"🛑 Giving up on {platform} for ID {content_id} after {retry['attempts']} retries")
+            else:
+                retry['next_attempt'] = (now + self._retry_delay(retry['attempts'])).isoformat()
+                print(f"🔁 Retry failed: {platform} for ID {content_id}, next attempt at {retry['next_attempt'][:16]}")
+        
+        self._save_queue()
+    
     def _clean_results_for_json(self, results):
         """
         Clean posting results to make them JSON serializable
@@ -296,8 +545,6 @@ class ContentQueue:
         Args:
             days_old (int): Remove items posted more than this many days ago
         """
-        from datetime import datetime, timedelta
-        
         cutoff_date = datetime.now() - timedelta(days=days_old)
         original_count = len(self.queue)
         
@@ -310,6 +557,8 @@ class ContentQueue:
         
         removed_count = original_count - len(self.queue)
         if removed_count > 0:
+            # Positions shifted, so the index is rebuilt on next use
+            self._index = None
             self._save_queue()
             print(f"🧹 Cleaned up {removed_count} old posted items")
         
@@ -325,6 +574,11 @@ class ContentQueue:
         return self.media_links
 
 
+def is_skipped_result(result):
+    """Check for a deliberate skip ('Skipped (...)' string) rather than a post result"""
+    return isinstance(result, str) and result.startswith('Skipped')
+
+
 # Convenience functions for easy use in main script
 def add_to_queue(filename, s3_url, media_type, local_path=None):
     """Add content to queue"""
@@ -0,0 +1,195 @@
+"""
+Long-running posting daemon ('python main.py serve')
+Keeps publishers, their HTTP sessions and the queues of every account in
+memory and runs scheduled posts, platform retries and media ingestion from
+one timer loop
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+from config import DAEMON_POLL_SECONDS, DAEMON_RETRY_MINUTES, DAEMON_INGEST_MINUTES, DAEMON_STATE_FILE
+from accounts import load_accounts
+from posting import get_due_content, post_content, retry_due
+from scheduler import PostingScheduler
+from tracing import finish_run, reset as reset_trace
+
+
+class PostingDaemon:
+    """
+    In-process scheduler for posting, retry and ingestion jobs
+    Every account profile (accounts.json) gets its own publishers, queue and
+    plan; profiles are read at startup, so a new one needs a restart
+    """
+
+    def __init__(self, state_file=DAEMON_STATE_FILE, accounts=None):
+        from platform_publishers import PublisherRegistry
+
+        self.state_file = state_file
+        self.stop_event = threading.Event()
+        self.accounts = load_accounts() if accounts is None else accounts
+        # account name -> publishers, loaded queue and scheduler, queue file mtime
+        self.registries = {account.name: PublisherRegistry(account=account) for account in self.accounts}
+        self.queues = {}
+        self.schedulers = {}
+        self.queue_mtimes = {}
+
+        # name -> (interval in seconds, job)
+        self.jobs = {
+            'post': (DAEMON_POLL_SECONDS, self.post_due),
+            'retry': (DAEMON_RETRY_MINUTES * 60, self.retry_failed),
+            'ingest': (DAEMON_INGEST_MINUTES * 60, self.ingest_media),
+        }
+        self.last_run = self._load_state()
+
+    def _load_state(self):
+        """Load when each job last ran, so a restart keeps the job rhythm"""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f).get('last_run', {})
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _save_state(self):
+        """Save job run times"""
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file, 'w') as f:
+            json.dump({
+                'last_run': self.last_run,
+                'saved_at': datetime.now().isoformat()
+            }, f, indent=2)
+
+    def _refresh_queue(self, account):
+        """Load an account's queue, reloading only when another process changed the file"""
+        try:
+            mtime = os.path.getmtime(account.queue_file)
+        except OSError:
+            mtime = None
+
+        if self.queues.get(account.name) is None or mtime != self.queue_mtimes.get(account.name):
+            queue = account.open_queue()
+            self.queues[account.name] = queue
+            self.schedulers[account.name] = PostingScheduler(
+                queue, account.plan_file, account.posting_slots, account.selection_policy
+            )
+        return self.queues[account.name]
+
+    def _remember_queue_mtimes(self):
+        """Our own writes do not need a reload"""
+        for account in self.accounts:
+            try:
+                self.queue_mtimes[account.name] = os.path.getmtime(account.queue_file)
+            except OSError:
+                self.queue_mtimes[account.name] = None
+
+    def post_due(self):
+        """Post each account's content whose planned slot has come (True if something was posted)"""
+        posted = False
+        for account in self.accounts:
+            if self.stop_event.is_set():
+                break
+            queue = self._refresh_queue(account)
+            scheduler = self.schedulers[account.name]
+            content, platforms = get_due_content(queue, scheduler)
+            if content and post_content(queue, content, self.registries[account.name], platforms) is not None:
+                scheduler.mark_posted(content['id'])
+                queue.cleanup_old_posted(30)
+                posted = True
+        return posted
+
+    def retry_failed(self):
+        """Retry every account's failed platforms that are due (number of items retried)"""
+        return sum(
+            retry_due(self._refresh_queue(account), self.registries[account.name])
+            for account in self.accounts
+            if not self.stop_event.is_set()
+        )
+
+    def ingest_media(self):
+        """Process new uploads of every account into its queue (number ingested)"""
+        # Checked before importing media_processor, which loads boto3
+        if not any(account.has_new_media() for account in self.accounts):
+            return 0
+
+        from media_processor import process_new_media
+        count = 0
+        for account in self.accounts:
+            if not account.has_new_media():
+                continue
+            print(f"📂 {account.name}: Processing {account.media_folder}")
+            count += process_new_media(account)['processed_count']
+            # add_to_queue wrote the file from its own ContentQueue
+            self.queues.pop(account.name, None)
+        print(f"📥 Ingested {count} new media file(s)")
+        return count
+
+    def _handle_signal(self, signum, frame):
+        """Stop after the running job finishes (its progress is checkpointed)"""
+        print(f"\n🛑 Received {signal.Signals(signum).name}, shutting down after the current job...")
+        self.stop_event.set()
+
+    def _seconds_until_next_job(self):
+        """How long the loop can sleep before a job is due"""
+        now = time.time()
+        waits = [
+            self.last_run.get(name, 0) + interval - now
+            for name, (interval, _) in self.jobs.items()
+        ]
+        return max(1, min(waits))
+
+    def run_pending(self):
+        """Run every job whose interval has passed"""
+        for name, (interval, job) in self.jobs.items():
+            if self.stop_event.is_set():
+                return
+            if time.time() - self.last_run.get(name, 0) < interval:
+                continue
+            did_work = True
+            try:
+                did_work = job()
+            except Exception as e:
+                print(f"❌ Daemon job '{name}' failed: {e}")
+            # One trace per job that did something; idle polls are dropped
+            if did_work:
+                finish_run(f"serve-{name}")
+            else:
+                reset_trace()
+            self.last_run[name] = time.time()
+            self._remember_queue_mtimes()
+            self._save_state()
+
+    def run(self):
+        """
+        Run jobs until SIGINT/SIGTERM, then flush state and close publishers
+        """
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+
+        print(f"🛰️ Posting daemon started at {datetime.now()} "
+              f"for {', '.join(account.name for account in self.accounts) or 'no accounts'} "
+              f"(post every {DAEMON_POLL_SECONDS}s, retry every {DAEMON_RETRY_MINUTES}m, "
+              f"ingest every {DAEMON_INGEST_MINUTES}m)")
+
+        # Log in once up front; the registries stay warm for every post
+        for registry in self.registries.values():
+            registry.prewarm()
+
+        try:
+            while not self.stop_event.is_set():
+                self.run_pending()
+                self.stop_event.wait(self._seconds_until_next_job())
+        finally:
+            self._save_state()
+            for registry in self.registries.values():
+                registry.close()
+            print("👋 Posting daemon stopped")
+
+
+def run_daemon():
+    """Start the posting daemon in the foreground"""
+    PostingDaemon().run()
@@ -0,0 +1,153 @@
+"""
+Ledger of sent fun fact DMs
+Records every answered comment so webhook redeliveries and overlapping poll
+windows never DM the same comment (or the same user about the same post)
+twice, and counts recent sends for the per-user and hourly limits
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from config import (
+    DM_LEDGER_FILE, DM_LEDGER_RETENTION_DAYS, DM_USER_DAILY_LIMIT, DM_HOURLY_LIMIT,
+    INTERACTIONS_LOG_FILE
+)
+
+
+def _user_post_key(user_id, media_id):
+    return f"{user_id}:{media_id}"
+
+
+class DMLedger:
+    """
+    JSON-backed record of sent DMs, indexed by comment and by user + post
+    """
+
+    def __init__(self, ledger_file=DM_LEDGER_FILE, log_file=INTERACTIONS_LOG_FILE,
+                 user_daily_limit=DM_USER_DAILY_LIMIT, hourly_limit=DM_HOURLY_LIMIT):
+        self.ledger_file = ledger_file
+        self.log_file = log_file
+        self.user_daily_limit = user_daily_limit
+        self.hourly_limit = hourly_limit
+        self.comments = {}
+        self.user_posts = {}
+        self.user_sends = {}
+        self.sends = []
+        self._load()
+
+    def _load(self):
+        """Load the ledger, seeding it from the interactions log if there is none yet"""
+        if os.path.exists(self.ledger_file):
+            try:
+                with open(self.ledger_file, 'r') as f:
+                    entries = json.load(f).get('sent', [])
+            except (json.JSONDecodeError, FileNotFoundError, AttributeError):
+                entries = []
+        else:
+            entries = self._entries_from_log()
+
+        cutoff = datetime.now() - timedelta(days=DM_LEDGER_RETENTION_DAYS)
+        for entry in sorted(entries, key=lambda entry: entry['sent_at']):
+            if datetime.fromisoformat(entry['sent_at']) > cutoff:
+                self._index(entry)
+
+    def _entries_from_log(self):
+        """Sent DMs from instagram_interactions.log (no comment IDs there)"""
+        if not self.log_file or not os.path.exists(self.log_file):
+            return []
+        entries = []
+        with open(self.log_file, 'r') as f:
+            for line in f:
+                try:
+                    logged = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if logged.get('action') == 'fun_fact_dm_sent' and logged.get('timestamp'):
+                    entries.append({
+                        'comment_id': logged.get('comment_id'),
+                        'user_id': logged.get('user_id'),
+                        'media_id': logged.get('media_id'),
+                        'sent_at': logged['timestamp']
+                    })
+        return entries
+
+    def _index(self, entry):
+        """Add one sent DM to the in-memory indexes"""
+        if entry.get('comment_id'):
+            self.comments[entry['comment_id']] = entry
+        if entry.get('user_id'):
+            self.user_posts[_user_post_key(entry['user_id'], entry['media_id'])] = entry
+            self.user_sends.setdefault(entry['user_id'], []).append(entry['sent_at'])
+        self.sends.append(entry)
+
+    def save(self):
+        """Save the ledger to file"""
+        try:
+            os.makedirs(os.path.dirname(self.ledger_file) or '.', exist_ok=True)
+            with open(self.ledger_file, 'w') as f:
+                json.dump({'sent': self.sends}, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save DM ledger: {e}")
+
+    def already_sent(self, comment_id=None, user_id=None, media_id=None):
+        """
+        Check whether this comment (or this user about this post) was answered
+
+        Returns:
+            bool: True if a DM already went out
+        """
+        if comment_id and comment_id in self.comments:
+            return True
+        return bool(user_id and _user_post_key(user_id, media_id) in self.user_posts)
+
+    def _sent_since(self, stamps, since):
+        """Count ISO timestamps (oldest first) newer than since"""
+        since = since.isoformat()
+        count = 0
+        for stamp in reversed(stamps):
+            if stamp <= since:
+                break
+            count += 1
+        return count
+
+    def hourly_remaining(self, now=None):
+        """
+        How many more DMs the account may send in the current hour
+
+        Returns:
+            int: Remaining sends (0 when the hourly limit is reached)
+        """
+        now = now or datetime.now()
+        recent = [entry['sent_at'] for entry in self.sends[-self.hourly_limit:]]
+        return max(self.hourly_limit - self._sent_since(recent, now - timedelta(hours=1)), 0)
+
+    def user_allowed(self, user_id, now=None):
+        """
+        Check the recipient's daily limit
+
+        Args:
+            user_id (str): Recipient (None when only the comment is known)
+
+        Returns:
+            bool: True if the user may get another DM
+        """
+        if not user_id:
+            return True
+        now = now or datetime.now()
+        return self._sent_since(self.user_sends.get(user_id, []), now - timedelta(days=1)) < self.user_daily_limit
+
+    def record(self, comment_id, user_id, media_id, now=None):
+        """
+        Record a sent DM (call save() once the batch is done)
+
+        Args:
+            comment_id (str): Comment that was answered
+            user_id (str): Recipient, if known
+            media_id (str): Post the comment was on
+        """
+        self._index({
+            'comment_id': comment_id,
+            'user_id': user_id,
+            'media_id': media_id,
+            'sent_at': (now or datetime.now()).isoformat()
+        })
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+FUN FACT DM responder
+Answers 'FUN FACT' comments with a DM carrying the post's follow-up fun fact.
+Comments arrive from the webhook (api/webhook.js) as repository_dispatch
+payloads; without one, new comments are synced incrementally (comment_sync.py)
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from urllib.parse import urlencode
+from config import (
+    INSTAGRAM_API_BASE, INSTAGRAM_ACCESS_TOKEN, INSTAGRAM_PAGE_ID,
+    DM_TRIGGER_TEXT, DM_BATCH_SIZE, INTERACTIONS_LOG_FILE
+)
+from comment_sync import CommentSync
+from dm_ledger import DMLedger
+from identity_cache import IdentityCache
+from post_index import PostIndex
+from rate_limits import get_tracker, install_hooks
+from tracing import span, trace_session, finish_run
+
+
+def is_trigger(text):
+    """Check whether a comment asks for the fun fact"""
+    return (text or '').strip().upper() == DM_TRIGGER_TEXT
+
+
+class DMResponder:
+    """
+    Sends fun fact DMs for trigger comments on Instagram posts
+    """
+
+    def __init__(self, access_token=INSTAGRAM_ACCESS_TOKEN, page_id=INSTAGRAM_PAGE_ID,
+                 session=None, post_index=None, identity_cache=None, ledger=None):
+        import requests
+
+        self.access_token = access_token
+        self.page_id = page_id
+        self.base_url = INSTAGRAM_API_BASE
+        self.session = trace_session(install_hooks(session or requests.Session()))
+        self.post_index = post_index or PostIndex()
+        self.identity_cache = identity_cache or IdentityCache()
+        self.ledger = ledger or DMLedger()
+        self.comment_sync = CommentSync(self.session, self.base_url, access_token)
+        self._account_id = None
+
+    def get_instagram_account_id(self):
+        """
+        Get the Instagram Business Account ID from the Facebook Page (cached)
+
+        Returns:
+            str: Account ID, or None if it could not be found
+        """
+        if self._account_id:
+            return self._account_id
+
+        cached_id = self.identity_cache.get('instagram_account_id', scope=self.page_id)
+        if cached_id:
+            print(f"✅ Instagram Account ID (cached): {cached_id}")
+            self._account_id = cached_id
+            return cached_id
+
+        try:
+            response = self.session.get(f"{self.base_url}/{self.page_id}", params={
+                'access_token': self.access_token,
+                'fields': 'instagram_business_account'
+            })
+            data = response.json()
+
+            if 'instagram_business_account' in data:
+                self._account_id = data['instagram_business_account']['id']
+                self.identity_cache.set('instagram_account_id', self._account_id, scope=self.page_id)
+                print(f"✅ Instagram Account ID: {self._account_id}")
+                return self._account_id
+
+            print(f"❌ No Instagram Business Account found: {data}")
+            return None
+        except Exception as e:
+            print(f"❌ Error getting Instagram account ID: {e}")
+            return None
+
+    def fetch_recent_comments(self):
+        """
+        Polling fallback: comments posted on recent media since the last poll
+        (see comment_sync.CommentSync)
+
+        Returns:
+            list: Comments (id, text, from, timestamp, media_id)
+        """
+        account_id = self.get_instagram_account_id()
+        if not account_id:
+            return []
+
+        comments = self.comment_sync.sync(account_id)
+        if comments is None:
+            if self.comment_sync.auth_failed():
+                self.identity_cache.invalidate('instagram_account_id')
+            return []
+        return comments
+
+    def _recipient(self, user_id, comment_id):
+        """DM the commenter, or reply privately to the comment when the user ID is unknown"""
+        return {'id': user_id} if user_id else {'comment_id': comment_id}
+
+    def send_dm(self, message, user_id=None, comment_id=None):
+        """
+        Send one DM to the commenter
+
+        Returns:
+            bool: True if the message was sent
+        """
+        account_id = self.get_instagram_account_id()
+        if not account_id:
+            return False
+
+        try:
+            with span('instagram.dm', 'platform'):
+                response = self.session.post(f"{self.base_url}/{account_id}/messages", json={
+                    'recipient': self._recipient(user_id, comment_id),
+                    'message': {'text': message},
+                    'access_token': self.access_token
+                })
+                result = response.json()
+
+            if response.status_code == 200 and ('message_id' in result or 'id' in result):
+                return True
+            print(f"❌ Failed to send DM: {result}")
+            return False
+        except Exception as e:
+            print(f"❌ Error sending DM: {e}")
+            return False
+
+    def send_batch(self, pending):
+        """
+        Send several DMs in one Graph API batch request
+
+        Args:
+            pending (list): Dicts with message, user_id and comment_id
+
+        Returns:
+            list: True/False per pending DM, in order
+        """
+        if len(pending) == 1:
+            dm = pending[0]
+            return [self.send_dm(dm['message'], dm['user_id'], dm['comment_id'])]
+
+        account_id = self.get_instagram_account_id()
+        if not account_id:
+            return [False] * len(pending)
+
+        batch = [{
+            'method': 'POST',
+            'relative_url': f"{account_id}/messages",
+            'body': urlencode({
+                'recipient': json.dumps(self._recipient(dm['user_id'], dm['comment_id'])),
+                'message': json.dumps({'text': dm['message']})
+            })
+        } for dm in pending]
+
+        try:
+            with span('instagram.dm_batch', 'platform', messages=len(pending)):
+                response = self.session.post(self.base_url, data={
+                    'access_token': self.access_token,
+                    'batch': json.dumps(batch)
+                })
+                replies = response.json()
+        except Exception as e:
+            print(f"❌ Error sending DM batch: {e}")
+            return [False] * len(pending)
+
+        if not isinstance(replies, list):
+            print(f"❌ Failed to send DM batch: {replies}")
+            return [False] * len(pending)
+
+        sent = []
+        for dm, reply in zip(pending, replies):
+            ok = bool(reply) and reply.get('code') == 200
+            if not ok:
+                print(f"❌ Failed to send DM for comment {dm['comment_id']}: {(reply or {}).get('body')}")
+            sent.append(ok)
+        return sent + [False] * (len(pending) - len(sent))
+
+    def log_interaction(self, comment_id, user_id, media_id, fun_fact):
+        """Append the sent DM to the interactions log"""
+        try:
+            with open(INTERACTIONS_LOG_FILE, 'a') as f:
+                f.write(json.dumps({
+                    'timestamp': datetime.now().isoformat(),
+                    'comment_id': comment_id,
+                    'user_id': user_id,
+                    'media_id': media_id,
+                    'fun_fact_sent': fun_fact[:100] + '...' if len(fun_fact) > 100 else fun_fact,
+                    'action': 'fun_fact_dm_sent'
+                }) + '\n')
+        except OSError as e:
+            print(f"⚠️ Failed to log interaction: {e}")
+
+    def _prepare(self, comment_id, media_id, text, user_id=None):
+        """
+        Build the DM for one comment, unless it is not a trigger or was
+        already answered
+
+        Returns:
+            dict: Pending DM (message, comment_id, user_id, media_id, fun_fact), or None
+        """
+        if not is_trigger(text):
+            print(f"ℹ️ Comment doesn't match trigger: \"{(text or '').strip()}\"")
+            return None
+        if not user_id and not comment_id:
+            print("⚠️ Trigger comment has no user or comment ID")
+            return None
+        if self.ledger.already_sent(comment_id, user_id, media_id):
+            print(f"⏭️ Already answered comment {comment_id}")
+            return None
+
+        fun_fact = self.post_index.get_fun_fact_followup('instagram', media_id)
+        if not fun_fact:
+            print(f"⚠️ No fun fact found for media {media_id}")
+            return None
+
+        return {
+            'message': f"Here's your didactic fun fact: {fun_fact}",
+            'comment_id': comment_id,
+            'user_id': user_id,
+            'media_id': media_id,
+            'fun_fact': fun_fact
+        }
+
+    def respond(self, comments):
+        """
+        Send fun fact DMs for trigger comments, at most one per comment
+
+        Already answered comments and users over their daily limit are
+        skipped; the rest go out in batches while the hourly limit allows
+
+        Args:
+            comments (list): Dicts with comment_id, media_id, text and user_id
+
+        Returns:
+            int: Number of DMs sent
+        """
+        pending = []
+        for comment in comments:
+            dm = self._prepare(comment['comment_id'], comment['media_id'], comment.get('text'), comment.get('user_id'))
+            if dm:
+                pending.append(dm)
+
+        sent = 0
+        while pending:
+            allowed, reason, _ = get_tracker().check('instagram', 'dm')
+            if not allowed:
+                print(f"⏸️ Holding {len(pending)} DM(s): {reason}")
+                break
+
+            room = min(DM_BATCH_SIZE, self.ledger.hourly_remaining())
+            if room == 0:
+                print(f"⏸️ Holding {len(pending)} DM(s): hourly limit of {self.ledger.hourly_limit} DMs reached")
+                break
+
+            # One DM per user per batch, so the daily limit sees earlier sends
+            batch, waiting, users = [], [], set()
+            for dm in pending:
+                if self.ledger.already_sent(dm['comment_id'], dm['user_id'], dm['media_id']):
+                    continue
+                if len(batch) >= room or (dm['user_id'] and dm['user_id'] in users):
+                    waiting.append(dm)
+                elif not self.ledger.user_allowed(dm['user_id']):
+                    print(f"⏭️ Not answering comment {dm['comment_id']}: user reached {self.ledger.user_daily_limit} DMs today")
+                else:
+                    batch.append(dm)
+                    users.add(dm['user_id'])
+
+            if not batch:
+                break
+
+            for dm, ok in zip(batch, self.send_batch(batch)):
+                if ok:
+                    print(f"✅ Sent fun fact DM for comment {dm['comment_id']}")
+                    self.ledger.record(dm['comment_id'], dm['user_id'], dm['media_id'])
+                    self.log_interaction(dm['comment_id'], dm['user_id'], dm['media_id'], dm['fun_fact'])
+                    sent += 1
+            self.ledger.save()
+            pending = waiting
+
+        return sent
+
+    def process_dispatch(self, payload):
+        """
+        Handle one comment event forwarded by the webhook
+
+        Args:
+            payload (dict): repository_dispatch client_payload
+                            (comment_id, user_id, media_id, comment_text)
+
+        Returns:
+            int: Number of DMs sent (0 or 1)
+        """
+        print(f"📝 Comment {payload.get('comment_id')} on media {payload.get('media_id')} (webhook)")
+        return self.respond([{
+            'comment_id': payload.get('comment_id'),
+            'media_id': payload.get('media_id'),
+            'text': payload.get('comment_text'),
+            'user_id': payload.get('user_id')
+        }])
+
+    def poll(self):
+        """
+        Handle trigger comments from the last few minutes (fallback when no
+        webhook payload is available)
+
+        Returns:
+            int: Number of DMs sent
+        """
+        comments = self.fetch_recent_comments()
+        print(f"📝 Found {len(comments)} recent comments")
+        return self.respond([{
+            'comment_id': comment['id'],
+            'media_id': comment['media_id'],
+            'text': comment.get('text'),
+            'user_id': comment.get('from', {}).get('id')
+        } for comment in comments if is_trigger(comment.get('text'))])
+
+def load_dispatch_payload(raw):
+    """
+    Parse a repository_dispatch client_payload
+
+    Args:
+        raw (str): JSON text (empty or 'null' when the run was not dispatched)
+
+    Returns:
+        dict: Payload, or None if there is no usable comment event
+    """
+    if not raw:
+        return None
+    try:
+        payload = json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f"⚠️ Ignoring invalid dispatch payload: {e}")
+        return None
+    if not isinstance(payload, dict) or not payload.get('media_id'):
+        return None
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send fun fact DMs for FUN FACT comments')
+    parser.add_argument('--payload', default=os.getenv('DISPATCH_PAYLOAD'),
+                        help='Webhook comment payload (JSON); polls recent comments when missing')
+    args = parser.parse_args()
+
+    print("🚀 Starting Instagram DM automation...")
+    responder = DMResponder()
+    if not responder.get_instagram_account_id():
+        print("❌ Cannot proceed without Instagram account ID")
+        return 1
+
+    payload = load_dispatch_payload(args.payload)
+    if payload:
+        sent = responder.process_dispatch(payload)
+    else:
+        print("🔎 No webhook payload, polling recent comments")
+        sent = responder.poll()
+
+    print(f"🎉 Instagram DM automation completed ({sent} DM(s) sent)")
+    finish_run('dm')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
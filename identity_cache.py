@@ -0,0 +1,135 @@
+"""
+Persistent cache for platform identity lookups
+Instagram business account and Threads user IDs rarely change, so they are
+cached with a TTL instead of being fetched from the Graph API on every run
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from config import IDENTITY_CACHE_FILE, IDENTITY_CACHE_TTL_DAYS
+
+
+# Graph API error codes meaning the token or session is no longer valid
+AUTH_ERROR_CODES = {102, 190}
+
+# Publishers are pre-warmed in parallel threads and share the cache file
+_FILE_LOCK = threading.Lock()
+
+
+def is_auth_error(response_data):
+    """
+    Check whether a Graph API response is an authentication error
+
+    Args:
+        response_data (dict): Parsed JSON response
+
+    Returns:
+        bool: True for invalid-token/session errors (codes 190 and 102)
+    """
+    if not isinstance(response_data, dict):
+        return False
+    error = response_data.get('error')
+    if not isinstance(error, dict):
+        return False
+    # Rate limits (4, 17, 32, 613) and permission errors are also typed
+    # OAuthException, so the type alone does not mean the token is bad
+    return error.get('code') in AUTH_ERROR_CODES
+
+
+def _fingerprint(scope):
+    """Hash the lookup scope (e.g. a page ID) so secrets never land in the file"""
+    if scope is None:
+        return None
+    return hashlib.sha256(str(scope).encode('utf-8')).hexdigest()[:16]
+
+
+class IdentityCache:
+    """
+    Small JSON-backed key/value cache with a TTL
+    """
+
+    def __init__(self, cache_file=IDENTITY_CACHE_FILE, ttl_days=IDENTITY_CACHE_TTL_DAYS):
+        self.cache_file = cache_file
+        self.ttl = timedelta(days=ttl_days)
+
+    def _load(self):
+        """Load cache entries from file"""
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _save(self, entries):
+        """Save cache entries to file"""
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(entries, f, indent=2)
+
+    def get(self, key, scope=None):
+        """
+        Get a cached value if it is fresh and was cached for the same scope
+
+        Args:
+            key (str): Cache key, e.g. 'instagram_account_id'
+            scope (str): What the value was looked up for (e.g. the page ID)
+
+        Returns:
+            str: Cached value, or None on a miss
+        """
+        with _FILE_LOCK:
+            entry = self._load().get(key)
+
+        if not entry or entry.get('scope') != _fingerprint(scope):
+            return None
+
+        try:
+            cached_at = datetime.fromisoformat(entry['cached_at'])
+        except (KeyError, ValueError):
+            return None
+
+        if datetime.now() - cached_at > self.ttl:
+            return None
+        return entry.get('value')
+
+    def set(self, key, value, scope=None):
+        """
+        Store a value in the cache
+
+        Args:
+            key (str): Cache key
+            value (str): Value to cache
+            scope (str): What the value was looked up for
+        """
+        try:
+            with _FILE_LOCK:
+                entries = self._load()
+                entries[key] = {
+                    'value': value,
+                    'scope': _fingerprint(scope),
+                    'cached_at': datetime.now().isoformat()
+                }
+                self._save(entries)
+        except OSError as e:
+            print(f"⚠️ Could not save identity cache: {e}")
+
+    def invalidate(self, key):
+        """
+        Drop a cached value (e.g. after an auth error)
+
+        Args:
+            key (str): Cache key
+        """
+        try:
+            with _FILE_LOCK:
+                entries = self._load()
+                if entries.pop(key, None) is not None:
+                    self._save(entries)
+                    print(f"🧹 Invalidated cached {key}")
+        except OSError as e:
+            print(f"⚠️ Could not update identity cache: {e}")
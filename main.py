@@ -4,124 +4,51 @@ Clean, minimal entry point that coordinates all components
 """
 
 import sys
-import os
-import requests
 from datetime import datetime
-from content_queue import get_next_post, mark_posted, get_status, cleanup_queue
-from platform_publishers import post_to_all_platforms
+from config import PREWARM_PUBLISHERS
+from content_queue import ContentQueue, get_status, cleanup_queue
+from posting import get_due_content, post_content, retry_due
+from tracing import finish_run
 
+# Publisher SDKs (requests, pytumblr, atproto) are imported only when posting,
+# so 'python main.py status' starts without loading them
 
-def download_file_from_s3(s3_url, local_path):
+
+def main(due_only=False):
     """
-    Download file from S3 URL to local path for platforms that need local files
+    Main posting function - called by GitHub Actions on schedule
     
     Args:
-        s3_url (str): S3 URL of the file
-        local_path (str): Local path where to save the file
-        
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        
-        # Download file from S3
-        print(f"📥 Downloading {os.path.basename(local_path)} from S3...")
-        response = requests.get(s3_url)
-        response.raise_for_status()
-        
-        # Save to local path
-        with open(local_path, 'wb') as f:
-            f.write(response.content)
-        
-        print(f"✅ Downloaded to {local_path}")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Failed to download file: {e}")
-        return False
-
-
-def main():
-    """
-    Main posting function - called by GitHub Actions on schedule
+        due_only (bool): Only post if a slot in the posting plan is due
     """
     print(f"🚀 Starting scheduled posting at {datetime.now()}")
     
-    # Get next content to post
-    content = get_next_post()
+    # Get next content to post (an interrupted post is resumed first)
+    queue = ContentQueue()
+    platforms = None
+    if due_only:
+        from scheduler import PostingScheduler
+        scheduler = PostingScheduler(queue)
+        content, platforms = get_due_content(queue, scheduler)
+        if not content:
+            return
+    else:
+        content = queue.get_next_content()
     if not content:
         print("📭 No content available to post")
         return
     
-    print(f"🎯 Selected content: {content['filename']} (ID: {content['id']})")
-    
-    # Use pre-generated captions from queue
-    print("📝 Using pre-generated captions...")
-    
-    # Check if content has complete caption data
-    if 'platform_captions' not in content or not content['platform_captions']:
-        print("❌ Content missing pre-generated captions. Please run migration script.")
-        return
-    
-    # Prepare captions data structure for platform publishers
-    captions = {
-        'base_caption': content.get('kaomoji', ''),
-        'fun_fact': content.get('fun_fact', ''),
-        'fun_fact_followup': content.get('fun_fact_followup', ''),
-        'instagram': content['platform_captions']['instagram'],
-        'tiktok': content['platform_captions']['tiktok'],
-        'tumblr': content['platform_captions']['tumblr'],
-        'bluesky': content['platform_captions']['bluesky'],
-        'hashtags': {
-            'instagram': content.get('hashtags', []),
-            'tiktok': content.get('hashtags', []),
-            'tumblr': content.get('hashtags', []),
-            'bluesky': content.get('hashtags', [])
-        }
-    }
-    
-    print(f"✅ Using pre-generated caption: {captions['base_caption']}")
-    
-    # Download file from S3 to local path for platforms that need local files
-    local_path = content.get('local_path')
-    if local_path and not os.path.exists(local_path):
-        if not download_file_from_s3(content['url'], local_path):
-            print("❌ Failed to download file for local platforms")
-            return
-    
-    # Prepare content data for posting
-    content_data = {
-        'url': content['url'],
-        'local_path': local_path,
-        'media_type': content['media_type'],
-        'filename': content['filename']
-    }
-    
-    # Post to all platforms simultaneously
-    print("📤 Posting to all platforms...")
+    from platform_publishers import PublisherRegistry
+    registry = PublisherRegistry()
     try:
-        results = post_to_all_platforms(content_data, captions)
-        
-        # Log results
-        print("\n📊 Posting Results:")
-        for platform, result in results.items():
-            if result and result != "Skipped (images not supported)":
-                print(f"   ✅ {platform.capitalize()}: Success")
-            elif result == "Skipped (images not supported)":
-                print(f"   ⏭️ {platform.capitalize()}: {result}")
-            else:
-                print(f"   ❌ {platform.capitalize()}: Failed")
-        
-        # Mark as posted
-        mark_posted(content['id'], results)
-        
-        print(f"✅ Successfully posted: {content['filename']}")
-        
-    except Exception as e:
-        print(f"❌ Posting failed: {e}")
+        results = post_content(queue, content, registry, platforms, prewarm=PREWARM_PUBLISHERS)
+    finally:
+        registry.shutdown()
+    
+    if results is None:
         return
+    if due_only:
+        scheduler.mark_posted(content['id'])
     
     # Clean up old posted items (keep last 30 days)
     cleanup_queue(30)
@@ -131,6 +58,80 @@ def main():
     print(f"\n📈 Queue Status: {status['pending_items']} pending, {status['posted_items']} posted")
 
 
+def retry_failed():
+    """
+    Retry platforms that failed on recently posted items, with backoff
+    """
+    from platform_publishers import PublisherRegistry
+    registry = PublisherRegistry()
+    try:
+        retry_due(ContentQueue(), registry)
+    finally:
+        registry.shutdown()
+
+
+def ingest_accounts(account_name=None):
+    """
+    Process new uploads for every account profile (or one) into its queue
+    
+    Args:
+        account_name (str): Only process this account
+    """
+    from media_processor import ingest_accounts as ingest
+    
+    results = ingest(account_name)
+    if not results:
+        print("📭 No new media for any account")
+    for name, result in results.items():
+        print(f"📥 {name}: {result['processed_count']} new media file(s)")
+
+
+def run_accounts(due_only=False):
+    """
+    Post for every account profile concurrently (see accounts.py)
+    
+    Args:
+        due_only (bool): Only post for accounts with a due plan slot
+    """
+    from accounts import load_accounts, AccountRunner
+    
+    accounts = load_accounts()
+    if not accounts:
+        print("📭 No accounts configured")
+        return
+    
+    print(f"🚀 Posting for {len(accounts)} account(s) at {datetime.now()}")
+    AccountRunner(accounts).run(due_only=due_only)
+
+
+def check_due():
+    """
+    Check whether 'post --due' has work: an interrupted post or a due slot
+    Needs no publisher SDKs, so a workflow can run it before installing them
+    
+    Returns:
+        bool: True if a post is due
+    """
+    from scheduler import PostingScheduler
+    
+    queue = ContentQueue()
+    content, _ = get_due_content(queue, PostingScheduler(queue))
+    return content is not None
+
+
+def show_plan():
+    """Refresh the posting plan and show the upcoming slots"""
+    from scheduler import PostingScheduler
+    
+    scheduler = PostingScheduler(ContentQueue())
+    scheduler.refresh()
+    upcoming = scheduler.upcoming()
+    
+    print(f"🗓️ Posting plan ({len(upcoming)} upcoming slots):")
+    for entry in upcoming:
+        print(f"   {entry['slot'][:16]}  {entry['filename']} ({entry['media_type']}) -> {', '.join(entry['platforms'])}")
+
+
 def show_status():
     """Show current queue status"""
     status = get_status()
@@ -152,9 +153,29 @@ if __name__ == "__main__":
         if sys.argv[1] == "status":
             show_status()
         elif sys.argv[1] == "post":
-            main()
+            main(due_only="--due" in sys.argv[2:])
+            finish_run('post')
+        elif sys.argv[1] == "plan":
+            show_plan()
+        elif sys.argv[1] == "due":
+            # Exit code 0 when a post is due, 1 when there is nothing to do
+            sys.exit(0 if check_due() else 1)
+        elif sys.argv[1] == "retry":
+            retry_failed()
+            finish_run('retry')
+        elif sys.argv[1] == "accounts" and sys.argv[2:3] == ["ingest"]:
+            args = sys.argv[3:]
+            ingest_accounts(args[args.index("--account") + 1] if "--account" in args[:-1] else None)
+            finish_run('process-media')
+        elif sys.argv[1] == "accounts":
+            run_accounts(due_only="--due" in sys.argv[2:])
+            finish_run('accounts')
+        elif sys.argv[1] == "serve":
+            from daemon import run_daemon
+            run_daemon()
         else:
-            print("Usage: python main.py [status|post]")
+            print("Usage: python main.py [status|post [--due]|due|plan|retry|accounts [--due]|accounts ingest [--account NAME]|serve]")
     else:
         # Default action is to post
         main()
+        finish_run('post')
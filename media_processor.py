@@ -3,6 +3,7 @@ Media processing system
 Handles GitHub → S3 → Delete workflow for uploaded media files
 """
 
+import argparse
 import os
 import boto3
 import shutil
@@ -10,9 +11,11 @@ from PIL import Image
 from pathlib import Path
 from config import (
     AWS_ACCESS_KEY_ID_S3, AWS_SECRET_ACCESS_KEY_S3, S3_BUCKET, S3_PATH, S3_URL_BASE,
-    SUPPORTED_IMAGE_FORMATS, SUPPORTED_VIDEO_FORMATS, MAX_IMAGE_SIZE
+    SUPPORTED_IMAGE_FORMATS, SUPPORTED_VIDEO_FORMATS, MAX_IMAGE_SIZE, S3_ENDPOINT_URL
 )
+from accounts import DEFAULT_ACCOUNT_NAME
 from content_queue import add_to_queue
+from tracing import span, finish_run
 
 
 class MediaProcessor:
@@ -20,13 +23,16 @@ class MediaProcessor:
     Processes media files: resize, upload to S3, add to queue, cleanup
     """
     
-    def __init__(self):
+    def __init__(self, account=None):
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=AWS_ACCESS_KEY_ID_S3,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY_S3
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY_S3,
+            endpoint_url=S3_ENDPOINT_URL
         )
-        self.media_folder = 'media'
+        # Other accounts (see accounts.py) have their own upload folder and queue
+        self.account = account
+        self.media_folder = account.media_folder if account else 'media'
         self.temp_folder = 'temp'
     
     def get_media_type(self, filename):
@@ -60,7 +66,7 @@ class MediaProcessor:
             bool: True if successful
         """
         try:
-            with Image.open(file_path) as img:
+            with span('pil.process_image', 'pil', bytes=os.path.getsize(file_path)), Image.open(file_path) as img:
                 # Convert to RGB if needed
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
@@ -92,7 +98,8 @@ class MediaProcessor:
         try:
             # For now, just copy the video
             # Future: could add video compression, format conversion, etc.
-            shutil.copy2(file_path, output_path)
+            with span('video.copy', 'io', bytes=os.path.getsize(file_path)):
+                shutil.copy2(file_path, output_path)
             print(f"📹 Video copied for processing")
             return True
             
@@ -112,7 +119,8 @@ class MediaProcessor:
             str: S3 URL if successful, None if failed
         """
         try:
-            self.s3_client.upload_file(file_path, S3_BUCKET, s3_key)
+            with span('s3.upload', 's3', bytes=os.path.getsize(file_path)):
+                self.s3_client.upload_file(file_path, S3_BUCKET, s3_key)
             s3_url = f"{S3_URL_BASE}{os.path.basename(s3_key)}"
             print(f"☁️ Uploaded to S3: {s3_url}")
             return s3_url
@@ -158,6 +166,10 @@ class MediaProcessor:
             
             # Generate processed filename
             base_name = Path(filename).stem
+            if self.account and self.account.name != DEFAULT_ACCOUNT_NAME:
+                # Accounts share the S3 folder, so keep their filenames apart
+                # (the default account keeps the original names)
+                base_name = f"{self.account.name}_{base_name}"
             if media_type == 'image':
                 processed_filename = f"{base_name}_processed.jpg"
             else:  # video
@@ -181,12 +193,18 @@ class MediaProcessor:
             
             if s3_url:
                 # Add to content queue
-                queue_item = add_to_queue(
-                    filename=filename,
-                    s3_url=s3_url,
-                    media_type=media_type,
-                    local_path=processed_path  # Keep temp file for platforms that need it
-                )
+                if self.account:
+                    queue_item = self.account.open_queue().add_content(
+                        filename, s3_url, media_type, processed_path,
+                        caption_style=self.account.caption_style
+                    )
+                else:
+                    queue_item = add_to_queue(
+                        filename=filename,
+                        s3_url=s3_url,
+                        media_type=media_type,
+                        local_path=processed_path  # Keep temp file for platforms that need it
+                    )
                 
                 processed_files.append({
                     'original_filename': filename,
@@ -236,15 +254,18 @@ class MediaProcessor:
             print(f"🧹 Cleaned up {removed_count} old temp files")
 
 
-def process_new_media():
+def process_new_media(account=None):
     """
     Main function to process new media files
     Called by GitHub Actions when new files are detected
     
+    Args:
+        account (Account): Account whose media folder to process (default: media/)
+    
     Returns:
         dict: Processing results
     """
-    processor = MediaProcessor()
+    processor = MediaProcessor(account)
     
     # Process all media files
     processed_files = processor.process_media_files()
@@ -260,10 +281,54 @@ def process_new_media():
     }
 
 
-if __name__ == "__main__":
-    # For testing locally
-    results = process_new_media()
+def ingest_accounts(account_name=None):
+    """
+    Process new media for every account profile (see accounts.py)
+    
+    Args:
+        account_name (str): Only process this account
+    
+    Returns:
+        dict: Account name -> processing results (accounts without new files are left out)
+    """
+    from accounts import load_accounts
+    
+    accounts = load_accounts()
+    if account_name:
+        accounts = [account for account in accounts if account.name == account_name]
+        if not accounts:
+            print(f"❌ Unknown account: {account_name}")
+            return {}
+    
+    results = {}
+    for account in accounts:
+        if not account.has_new_media():
+            continue
+        print(f"📂 {account.name}: Processing {account.media_folder}")
+        results[account.name] = process_new_media(account)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process uploaded media into the content queue')
+    parser.add_argument('--account', help='Only process this account profile (default: the default account)')
+    parser.add_argument('--all-accounts', action='store_true', help='Process every account profile in accounts.json')
+    args = parser.parse_args()
+    
+    if args.all_accounts or args.account:
+        all_results = ingest_accounts(args.account)
+    else:
+        all_results = {'default': process_new_media()}
+    
     print(f"\n📊 Processing Summary:")
-    print(f"   Files processed: {results['processed_count']}")
-    for file_info in results['processed_files']:
-        print(f"   ✅ {file_info['original_filename']} → {file_info['s3_url']}")
+    for name, results in all_results.items():
+        print(f"   {name}: {results['processed_count']} file(s) processed")
+        for file_info in results['processed_files']:
+            print(f"   ✅ {file_info['original_filename']} → {file_info['s3_url']}")
+    if not all_results:
+        print("   No new media")
+    finish_run('process-media')
+
+
+if __name__ == "__main__":
+    main()
@@ -7,92 +7,257 @@ import requests
 import json
 import time
 import os
-import pytumblr
-from atproto import Client as BskyClient
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from caption_renderer import get_bluesky_facets, validate_facets
+from identity_cache import IdentityCache, is_auth_error
+from bluesky_session import login_with_saved_session
+from content_queue import (
+    PROGRESS_CONTAINER_CREATED, PROGRESS_PUBLISHED, PROGRESS_FAILED,
+    PROGRESS_SKIPPED, is_skipped_result
+)
+from accounts import default_account
+from rate_limits import get_tracker, install_hooks
+from token_manager import TOKEN_CREDENTIALS, TikTokTokenProvider, get_token_manager
+from tracing import span, trace_session
 from config import (
-    INSTAGRAM_ACCESS_TOKEN, INSTAGRAM_PAGE_ID,
-    TIKTOK_ACCESS_TOKEN,
-    TUMBLR_CONSUMER_KEY, TUMBLR_CONSUMER_SECRET, 
-    TUMBLR_OAUTH_TOKEN, TUMBLR_OAUTH_TOKEN_SECRET, TUMBLR_BLOG_NAME,
-    BLUESKY_USERNAME, BLUESKY_PASSWORD,
-    THREADS_ACCESS_TOKEN
+    INSTAGRAM_API_BASE, THREADS_API_BASE, TIKTOK_API_BASE, TUMBLR_API_HOST, BLUESKY_API_BASE,
+    PLATFORM_MEDIA_SOURCE, ENV_FILE, TOKEN_STATE_FILE
 )
 
 
+# Identity cache keys (see identity_cache.py)
+INSTAGRAM_ACCOUNT_CACHE_KEY = 'instagram_account_id'
+THREADS_USER_CACHE_KEY = 'threads_user_id'
+
+# Graph API "object does not exist / unsupported request" - a stale cached ID
+GRAPH_UNKNOWN_OBJECT_CODE = 100
+
+# Recent posts searched for one an interrupted run already published
+RESUME_LOOKUP_LIMIT = 10
+
+# Media sources: the runner uploads the file, or the platform pulls the S3 URL
+MEDIA_SOURCE_UPLOAD = 'upload'
+MEDIA_SOURCE_URL = 'url'
+
+# Platforms that can pull the media by URL instead of a runner upload
+URL_SOURCE_PLATFORMS = ('tiktok', 'tumblr')
+
+
+def parse_media_sources(spec):
+    """
+    Parse 'tiktok=url,tumblr=upload' into {platform: source}
+    
+    Args:
+        spec (str): Comma-separated platform=source pairs
+        
+    Returns:
+        dict: Media source per platform (platforms not listed upload)
+    """
+    sources = {}
+    for part in spec.split(','):
+        if '=' not in part:
+            continue
+        platform, source = (value.strip().lower() for value in part.split('=', 1))
+        if platform not in URL_SOURCE_PLATFORMS or source not in (MEDIA_SOURCE_UPLOAD, MEDIA_SOURCE_URL):
+            print(f"⚠️ Ignoring invalid media source '{part.strip()}'")
+            continue
+        sources[platform] = source
+    return sources
+
+
+MEDIA_SOURCES = parse_media_sources(PLATFORM_MEDIA_SOURCE)
+
+
+def pulls_from_url(platform):
+    """Check whether a platform is set to pull the media from its S3 URL"""
+    return MEDIA_SOURCES.get(platform) == MEDIA_SOURCE_URL
+
+
 class InstagramPublisher:
     """Instagram Graph API publisher"""
     
-    def __init__(self):
-        self.access_token = INSTAGRAM_ACCESS_TOKEN
-        self.page_id = INSTAGRAM_PAGE_ID
-        self.base_url = "https://graph.facebook.com/v21.0"
+    @staticmethod
+    def is_configured(account=None):
+        """Check credentials without any network I/O"""
+        account = account or default_account()
+        return bool(account.credential('INSTAGRAM_ACCESS_TOKEN') and account.credential('INSTAGRAM_PAGE_ID'))
+    
+    @staticmethod
+    def needs_local_file(media_type=None):
+        """Instagram always fetches the media from its URL"""
+        return False
+    
+    def __init__(self, account=None, session=None):
+        account = account or default_account()
+        self.last_error = None
+        # Keep-alive connection pool, reused across posts by a long-lived registry
+        self.session = trace_session(install_hooks(session or requests.Session()))
+        self.access_token = account.credential('INSTAGRAM_ACCESS_TOKEN')
+        self.page_id = account.credential('INSTAGRAM_PAGE_ID')
+        self.base_url = INSTAGRAM_API_BASE
         self.instagram_account_id = None
+        self.auth_failed = False
+        self.identity_cache = IdentityCache(account.identity_cache_file)
         self._get_instagram_account_id()
     
+    def is_ready(self):
+        """Check the account ID lookup succeeded and the token was not rejected since"""
+        return self.instagram_account_id is not None and not self.auth_failed
+    
     def _get_instagram_account_id(self):
-        """Get the Instagram Business Account ID from the Facebook Page"""
+        """Get the Instagram Business Account ID from the Facebook Page (cached)"""
+        cached_id = self.identity_cache.get(INSTAGRAM_ACCOUNT_CACHE_KEY, scope=self.page_id)
+        if cached_id:
+            self.instagram_account_id = cached_id
+            return
+        
         try:
             url = f"{self.base_url}/{self.page_id}"
             params = {
                 'access_token': self.access_token,
                 'fields': 'instagram_business_account'
             }
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params)
             data = response.json()
             
             if 'instagram_business_account' in data:
                 self.instagram_account_id = data['instagram_business_account']['id']
+                self.identity_cache.set(INSTAGRAM_ACCOUNT_CACHE_KEY, self.instagram_account_id, scope=self.page_id)
             else:
                 print("❌ No Instagram Business Account found for this page")
         except Exception as e:
             print(f"❌ Error getting Instagram account ID: {e}")
+            self.last_error = f"Error getting Instagram account ID: {e}"
     
-    def post_content(self, content_data, caption):
+    def _handle_api_error(self, response_data):
+        """Drop the cached account ID after auth or unknown-object errors"""
+        error_code = response_data.get('error', {}).get('code') if isinstance(response_data, dict) else None
+        if is_auth_error(response_data) or error_code == GRAPH_UNKNOWN_OBJECT_CODE:
+            self.identity_cache.invalidate(INSTAGRAM_ACCOUNT_CACHE_KEY)
+        if is_auth_error(response_data):
+            self.auth_failed = True
+            get_token_manager().mark_invalid('instagram', self.access_token, response_data['error'].get('message'))
+    
+    def _create_container(self, media_type, media_url, caption):
+        """
+        Step 1: Create media container using Instagram Business Account ID
+        
+        Returns:
+            str: Container ID, or None if creation failed
+        """
+        container_url = f"{self.base_url}/{self.instagram_account_id}/media"
+        
+        if media_type == 'video':
+            container_params = {
+                'media_type': 'REELS',
+                'video_url': media_url,
+                'caption': caption,
+                'access_token': self.access_token,
+                'is_made_with_ai': 'true'
+            }
+        else:  # image
+            container_params = {
+                'image_url': media_url,
+                'caption': caption,
+                'access_token': self.access_token,
+                'is_made_with_ai': 'true'
+            }
+        
+        container_response = self.session.post(container_url, data=container_params)
+        container_data = container_response.json()
+        
+        if 'id' not in container_data:
+            print(f"Instagram container creation failed: {container_data}")
+            self.last_error = f"Instagram container creation failed: {container_data}"
+            self._handle_api_error(container_data)
+            return None
+        
+        return container_data['id']
+    
+    def _get_container_status(self, container_id):
+        """Get a media container's status_code, or None if it can't be read"""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/{container_id}",
+                params={'fields': 'status_code', 'access_token': self.access_token}
+            )
+            return response.json().get('status_code')
+        except Exception as e:
+            print(f"⚠️ Instagram: Could not check container {container_id} - {e}")
+            return None
+    
+    def _find_published_media(self, caption):
+        """
+        Find the media ID of a post published by an interrupted run
+        Containers don't expose the media they became, so match the caption
+        against the account's most recent media
+        
+        Returns:
+            str: Media ID, or None if it can't be found
+        """
+        try:
+            response = self.session.get(
+                f"{self.base_url}/{self.instagram_account_id}/media",
+                params={'fields': 'id,caption', 'limit': RESUME_LOOKUP_LIMIT, 'access_token': self.access_token}
+            )
+            for media in response.json().get('data', []):
+                if media.get('caption') == caption:
+                    return media['id']
+        except Exception as e:
+            print(f"⚠️ Instagram: Could not look up the published media - {e}")
+        return None
+    
+    def post_content(self, content_data, caption, resume=None, checkpoint=None):
         """
         Post content to Instagram
         
         Args:
             content_data (dict): Content information with 'url', 'media_type'
             caption (str): Formatted caption with hashtags
+            resume (dict): Saved progress from an interrupted run (may hold 'container_id')
+            checkpoint (callable): checkpoint(state, **fields) to persist progress
             
         Returns:
             dict: API response or None if failed
         """
         if not self.access_token or not self.instagram_account_id:
             print("Instagram API credentials not configured or Instagram account not found")
+            self.last_error = "Instagram API credentials not configured or Instagram account not found"
             return None
             
         try:
             media_type = content_data['media_type']
             media_url = content_data['url']
+            container_id = None
             
-            # Step 1: Create media container using Instagram Business Account ID
-            container_url = f"{self.base_url}/{self.instagram_account_id}/media"
-            
-            if media_type == 'video':
-                container_params = {
-                    'media_type': 'REELS',
-                    'video_url': media_url,
-                    'caption': caption,
-                    'access_token': self.access_token,
-                    'is_made_with_ai': 'true'
-                }
-            else:  # image
-                container_params = {
-                    'image_url': media_url,
-                    'caption': caption,
-                    'access_token': self.access_token,
-                    'is_made_with_ai': 'true'
-                }
-            
-            container_response = requests.post(container_url, data=container_params)
-            container_data = container_response.json()
+            # Reuse the container from an interrupted run if it is still usable
+            if resume and resume.get('media_id'):
+                print("✅ Instagram: Already published in the interrupted run")
+                return {'id': resume['media_id'], 'creation_id': resume.get('container_id')}
+            if resume and resume.get('container_id'):
+                container_status = self._get_container_status(resume['container_id'])
+                if container_status == 'PUBLISHED':
+                    print("✅ Instagram: Container was already published in the interrupted run")
+                    result = {'creation_id': resume['container_id'], 'status_code': container_status}
+                    media_id = self._find_published_media(caption)
+                    if media_id:
+                        result['id'] = media_id
+                    else:
+                        print("⚠️ Instagram: Published media not found, it won't be indexed")
+                    return result
+                elif container_status in ('EXPIRED', 'ERROR', None):
+                    print(f"⚠️ Instagram: Saved container unusable ({container_status}), creating a new one")
+                else:
+                    container_id = resume['container_id']
+                    print(f"♻️ Instagram: Reusing container {container_id}")
             
-            if 'id' not in container_data:
-                print(f"Instagram container creation failed: {container_data}")
-                return None
-                
-            container_id = container_data['id']
+            if not container_id:
+                container_id = self._create_container(media_type, media_url, caption)
+                if not container_id:
+                    return None
+                if checkpoint:
+                    checkpoint(PROGRESS_CONTAINER_CREATED, container_id=container_id)
             
             # Step 2: Wait for processing (videos only)
             if media_type == 'video':
@@ -102,17 +267,21 @@ class InstagramPublisher:
                     'access_token': self.access_token
                 }
                 
-                for attempt in range(30):
-                    status_response = requests.get(status_url, params=status_params)
-                    status_data = status_response.json()
-                    
-                    if status_data.get('status_code') == 'FINISHED':
-                        break
-                    elif status_data.get('status_code') == 'ERROR':
-                        print(f"Instagram processing failed: {status_data}")
-                        return None
+                with span('instagram.poll', 'poll') as poll:
+                    for attempt in range(30):
+                        poll.set(polls=attempt + 1)
+                        status_response = self.session.get(status_url, params=status_params)
+                        status_data = status_response.json()
                         
-                    time.sleep(2)
+                        if status_data.get('status_code') == 'FINISHED':
+                            break
+                        elif status_data.get('status_code') == 'ERROR':
+                            print(f"Instagram processing failed: {status_data}")
+                            self.last_error = f"Instagram processing failed: {status_data}"
+                            poll.set(status='failed')
+                            return None
+                            
+                        time.sleep(2)
             
             # Step 3: Publish using Instagram Business Account ID
             publish_url = f"{self.base_url}/{self.instagram_account_id}/media_publish"
@@ -121,154 +290,311 @@ class InstagramPublisher:
                 'access_token': self.access_token
             }
             
-            publish_response = requests.post(publish_url, data=publish_params)
+            publish_response = self.session.post(publish_url, data=publish_params)
             publish_data = publish_response.json()
             
             if 'id' in publish_data:
                 print(f"✅ Instagram: Posted {media_type} successfully")
+                if checkpoint:
+                    # A rerun after a crash right here returns this ID instead of looking it up
+                    checkpoint(PROGRESS_CONTAINER_CREATED, container_id=container_id, media_id=publish_data['id'])
                 return publish_data
             else:
                 print(f"❌ Instagram: Publishing failed - {publish_data}")
+                self.last_error = f"Publishing failed - {publish_data}"
+                self._handle_api_error(publish_data)
                 return None
                 
         except Exception as e:
             print(f"❌ Instagram: Error - {e}")
+            self.last_error = f"Error - {e}"
             return None
 
 
 class TikTokPublisher:
     """TikTok Content Posting API publisher"""
     
-    def __init__(self):
-        self.access_token = TIKTOK_ACCESS_TOKEN
-        self.base_url = "https://open.tiktokapis.com/v2"
+    # TikTok error code for an expired or revoked access token
+    INVALID_TOKEN_CODE = 'access_token_invalid'
+    
+    @staticmethod
+    def _token_provider(account, session=None):
+        """Access tokens from the refresh token, or the static TIKTOK_ACCESS_TOKEN"""
+        return TikTokTokenProvider(
+            access_token=account.credential('TIKTOK_ACCESS_TOKEN'),
+            refresh_token=account.credential('TIKTOK_REFRESH_TOKEN'),
+            client_key=account.credential('TIKTOK_CLIENT_KEY'),
+            client_secret=account.credential('TIKTOK_CLIENT_SECRET'),
+            session=session,
+            # Where a rotated refresh token is stored (None: fixed credentials)
+            refresh_token_name=None if account.env_prefix is None else f"{account.env_prefix}TIKTOK_REFRESH_TOKEN"
+        )
+    
+    @staticmethod
+    def is_configured(account=None):
+        """Check credentials without any network I/O"""
+        account = account or default_account()
+        return TikTokPublisher._token_provider(account).configured
     
-    def post_content(self, content_data, caption):
+    @staticmethod
+    def needs_local_file(media_type=None):
+        """Video uploads need the file (images are skipped); PULL_FROM_URL lets TikTok fetch it"""
+        return media_type != 'image' and not pulls_from_url('tiktok')
+    
+    def __init__(self, account=None, session=None):
+        account = account or default_account()
+        self.last_error = None
+        # Keep-alive connection pool, reused across posts by a long-lived registry
+        self.session = trace_session(install_hooks(session or requests.Session()))
+        # A long-lived registry keeps the provider, so the refreshed token is reused
+        self.tokens = self._token_provider(account, self.session)
+        self.access_token = None
+        self.auth_failed = False
+        self.base_url = TIKTOK_API_BASE
+    
+    def is_ready(self):
+        """Check the access token was not rejected (a rebuild re-reads the credentials)"""
+        return not self.auth_failed
+    
+    def _headers(self):
+        """JSON API headers with the current access token"""
+        return {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json; charset=UTF-8'
+        }
+    
+    def _init_publish(self, caption, source_info):
+        """
+        Step 1: Initialize the post
+        
+        Args:
+            caption (str): Post title
+            source_info (dict): FILE_UPLOAD sizes, or the PULL_FROM_URL video_url
+        
+        Returns:
+            dict: Init data (publish_id, and upload_url for FILE_UPLOAD), or None if failed
+        """
+        init_url = f"{self.base_url}/post/publish/video/init/"
+        init_data = {
+            "post_info": {
+                "title": caption,
+                "privacy_level": "PUBLIC_TO_EVERYONE",
+                "disable_duet": False,
+                "disable_comment": False,
+                "disable_stitch": False,
+                "video_cover_timestamp_ms": 1000
+            },
+            "source_info": source_info
+        }
+        
+        init_response = self.session.post(init_url, headers=self._headers(), json=init_data)
+        init_result = init_response.json()
+        
+        if init_result.get('error', {}).get('code') == self.INVALID_TOKEN_CODE and self.tokens.can_refresh:
+            # Revoked early: refresh once and retry before anything is uploaded
+            print("🔑 TikTok: Access token rejected, refreshing")
+            self.tokens.invalidate()
+            self.access_token = self.tokens.get()
+            if not self.access_token:
+                self.last_error = self.tokens.last_error
+                self.auth_failed = True
+                return None
+            init_response = self.session.post(init_url, headers=self._headers(), json=init_data)
+            init_result = init_response.json()
+        
+        if init_result.get('error', {}).get('code') == self.INVALID_TOKEN_CODE:
+            self.auth_failed = True
+        if init_result.get('error', {}).get('code') != 'ok':
+            print(f"TikTok initialization failed: {init_result}")
+            self.last_error = f"TikTok initialization failed: {init_result}"
+            return None
+        
+        return init_result['data']
+    
+    def _upload_video(self, video_path, caption):
+        """
+        Steps 1-2: Initialize the post and upload the video file
+        
+        Returns:
+            str: TikTok publish_id, or None if failed
+        """
+        video_size = os.path.getsize(video_path)
+        init = self._init_publish(caption, {
+            "source": "FILE_UPLOAD",
+            "video_size": video_size,
+            "chunk_size": video_size,
+            "total_chunk_count": 1
+        })
+        if not init:
+            return None
+        
+        publish_id = init['publish_id']
+        upload_url = init['upload_url']
+        
+        # Step 2: Upload video
+        with open(video_path, 'rb') as video_file:
+            files = {'video': video_file}
+            upload_headers = {'Authorization': f'Bearer {self.access_token}'}
+            upload_response = self.session.put(upload_url, headers=upload_headers, files=files)
+            
+            if upload_response.status_code != 200:
+                print(f"TikTok upload failed: {upload_response.text}")
+                self.last_error = f"TikTok upload failed: {upload_response.text}"
+                return None
+        
+        return publish_id
+    
+    def _pull_video(self, video_url, caption):
+        """
+        Step 1 only: TikTok downloads the video from its URL (PULL_FROM_URL)
+        
+        Returns:
+            str: TikTok publish_id, or None if failed
+        """
+        init = self._init_publish(caption, {"source": "PULL_FROM_URL", "video_url": video_url})
+        return init['publish_id'] if init else None
+    
+    def post_content(self, content_data, caption, resume=None, checkpoint=None):
         """
         Post video content to TikTok
         
         Args:
-            content_data (dict): Content information with 'local_path', 'media_type'
+            content_data (dict): Content information with 'local_path' (or 'url'
+                                 when pulling from URL), 'media_type'
             caption (str): Formatted caption with hashtags
+            resume (dict): Saved progress from an interrupted run (may hold 'container_id')
+            checkpoint (callable): checkpoint(state, **fields) to persist progress
             
         Returns:
             dict: API response or None if failed
         """
-        if not self.access_token:
+        if not self.tokens.configured:
             print("TikTok API credentials not configured")
+            self.last_error = "TikTok API credentials not configured"
             return None
             
         if content_data['media_type'] != 'video':
             print("TikTok only supports video content")
+            self.last_error = "TikTok only supports video content"
             return None
             
-        try:
-            video_path = content_data['local_path']
-            if not os.path.exists(video_path):
-                print(f"TikTok: Video file not found - {video_path}")
-                return None
-                
-            # Step 1: Initialize upload
-            init_url = f"{self.base_url}/post/publish/video/init/"
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'Content-Type': 'application/json; charset=UTF-8'
-            }
-            
-            video_size = os.path.getsize(video_path)
-            init_data = {
-                "post_info": {
-                    "title": caption,
-                    "privacy_level": "PUBLIC_TO_EVERYONE",
-                    "disable_duet": False,
-                    "disable_comment": False,
-                    "disable_stitch": False,
-                    "video_cover_timestamp_ms": 1000
-                },
-                "source_info": {
-                    "source": "FILE_UPLOAD",
-                    "video_size": video_size,
-                    "chunk_size": video_size,
-                    "total_chunk_count": 1
-                }
-            }
-            
-            init_response = requests.post(init_url, headers=headers, json=init_data)
-            init_result = init_response.json()
+        # Just in time: a token about to expire is refreshed before the upload starts
+        self.access_token = self.tokens.get()
+        if not self.access_token:
+            print(f"❌ TikTok: {self.tokens.last_error}")
+            self.last_error = self.tokens.last_error
+            return None
             
-            if init_result.get('error', {}).get('code') != 'ok':
-                print(f"TikTok initialization failed: {init_result}")
-                return None
-                
-            publish_id = init_result['data']['publish_id']
-            upload_url = init_result['data']['upload_url']
-            
-            # Step 2: Upload video
-            with open(video_path, 'rb') as video_file:
-                files = {'video': video_file}
-                upload_headers = {'Authorization': f'Bearer {self.access_token}'}
-                upload_response = requests.put(upload_url, headers=upload_headers, files=files)
-                
-                if upload_response.status_code != 200:
-                    print(f"TikTok upload failed: {upload_response.text}")
+        try:
+            # An interrupted run already uploaded the video: only poll its status
+            if resume and resume.get('container_id'):
+                publish_id = resume['container_id']
+                print(f"♻️ TikTok: Resuming publish {publish_id}")
+            else:
+                if pulls_from_url('tiktok'):
+                    publish_id = self._pull_video(content_data['url'], caption)
+                else:
+                    video_path = content_data['local_path']
+                    if not video_path or not os.path.exists(video_path):
+                        print(f"TikTok: Video file not found - {video_path}")
+                        self.last_error = f"Video file not found - {video_path}"
+                        return None
+                    publish_id = self._upload_video(video_path, caption)
+                if not publish_id:
                     return None
+                if checkpoint:
+                    checkpoint(PROGRESS_CONTAINER_CREATED, container_id=publish_id)
             
-            # Step 3: Check status and publish
+            # Step 3: Check status and publish (init may have refreshed the token)
+            headers = self._headers()
             status_url = f"{self.base_url}/post/publish/status/fetch/"
             status_data = {"publish_id": publish_id}
             
-            for attempt in range(60):
-                status_response = requests.post(status_url, headers=headers, json=status_data)
-                status_result = status_response.json()
-                
-                status = status_result.get('data', {}).get('status')
-                if status == 'PUBLISH_COMPLETE':
-                    print("✅ TikTok: Video posted successfully")
-                    return status_result
-                elif status == 'FAILED':
-                    print(f"❌ TikTok: Publishing failed - {status_result}")
-                    return None
+            with span('tiktok.poll', 'poll') as poll:
+                for attempt in range(60):
+                    poll.set(polls=attempt + 1)
+                    status_response = self.session.post(status_url, headers=headers, json=status_data)
+                    status_result = status_response.json()
                     
-                time.sleep(3)
+                    status = status_result.get('data', {}).get('status')
+                    if status == 'PUBLISH_COMPLETE':
+                        print("✅ TikTok: Video posted successfully")
+                        return status_result
+                    elif status == 'FAILED':
+                        print(f"❌ TikTok: Publishing failed - {status_result}")
+                        self.last_error = f"Publishing failed - {status_result}"
+                        poll.set(status='failed')
+                        return None
+                        
+                    time.sleep(3)
+                poll.set(status='timeout')
             
             print("❌ TikTok: Upload timed out")
+            self.last_error = "Upload timed out"
             return None
             
         except Exception as e:
             print(f"❌ TikTok: Error - {e}")
+            self.last_error = f"Error - {e}"
             return None
 
 
 class TumblrPublisher:
     """Tumblr API publisher"""
     
-    def __init__(self):
+    CREDENTIAL_KEYS = (
+        'TUMBLR_CONSUMER_KEY', 'TUMBLR_CONSUMER_SECRET',
+        'TUMBLR_OAUTH_TOKEN', 'TUMBLR_OAUTH_TOKEN_SECRET', 'TUMBLR_BLOG_NAME'
+    )
+    
+    @staticmethod
+    def is_configured(account=None):
+        """Check credentials without any network I/O"""
+        account = account or default_account()
+        return all(account.credential(key) for key in TumblrPublisher.CREDENTIAL_KEYS)
+    
+    @staticmethod
+    def needs_local_file(media_type=None):
+        """Videos are always uploaded; in URL mode Tumblr fetches photos itself (PLATFORM_MEDIA_SOURCE)"""
+        return media_type != 'image' or not pulls_from_url('tumblr')
+    
+    def __init__(self, account=None, session=None):
+        account = account or default_account()
+        self.last_error = None
+        self.auth_failed = False
+        self.blog_name = account.credential('TUMBLR_BLOG_NAME')
         # Debug: Check if all Tumblr credentials are present
         print(f"🔍 Tumblr credentials check:")
-        print(f"   CONSUMER_KEY: {'✅' if TUMBLR_CONSUMER_KEY else '❌ None'}")
-        print(f"   CONSUMER_SECRET: {'✅' if TUMBLR_CONSUMER_SECRET else '❌ None'}")
-        print(f"   OAUTH_TOKEN: {'✅' if TUMBLR_OAUTH_TOKEN else '❌ None'}")
-        print(f"   OAUTH_TOKEN_SECRET: {'✅' if TUMBLR_OAUTH_TOKEN_SECRET else '❌ None'}")
-        print(f"   BLOG_NAME: {'✅' if TUMBLR_BLOG_NAME else '❌ None'}")
+        for key in self.CREDENTIAL_KEYS:
+            print(f"   {key[len('TUMBLR_'):]}: {'✅' if account.credential(key) else '❌ None'}")
         
-        if not all([TUMBLR_CONSUMER_KEY, TUMBLR_CONSUMER_SECRET, TUMBLR_OAUTH_TOKEN, TUMBLR_OAUTH_TOKEN_SECRET, TUMBLR_BLOG_NAME]):
+        if not self.is_configured(account):
             print("❌ Missing Tumblr credentials - posting will fail")
+            self.last_error = "Missing Tumblr credentials - posting will fail"
             self.client = None
             return
-            
+        
+        # Imported here so the SDK only loads when Tumblr actually posts
+        import pytumblr
         self.client = pytumblr.TumblrRestClient(
-            TUMBLR_CONSUMER_KEY,
-            TUMBLR_CONSUMER_SECRET,
-            TUMBLR_OAUTH_TOKEN,
-            TUMBLR_OAUTH_TOKEN_SECRET
+            account.credential('TUMBLR_CONSUMER_KEY'),
+            account.credential('TUMBLR_CONSUMER_SECRET'),
+            account.credential('TUMBLR_OAUTH_TOKEN'),
+            account.credential('TUMBLR_OAUTH_TOKEN_SECRET'),
+            host=TUMBLR_API_HOST
         )
     
+    def is_ready(self):
+        """Check the client was built and its OAuth tokens were not rejected since"""
+        return self.client is not None and not self.auth_failed
+    
     def post_content(self, content_data, caption, hashtags):
         """
         Post content to Tumblr
         
         Args:
-            content_data (dict): Content information with 'local_path', 'media_type'
+            content_data (dict): Content information with 'local_path' (or 'url'
+                                 in URL mode), 'media_type'
             caption (str): Caption text
             hashtags (list): List of hashtag strings
             
@@ -277,6 +603,7 @@ class TumblrPublisher:
         """
         if not self.client:
             print("❌ Tumblr: Client not initialized due to missing credentials")
+            self.last_error = "Client not initialized due to missing credentials"
             return None
             
         try:
@@ -286,23 +613,34 @@ class TumblrPublisher:
             print(f"🔍 Tumblr: Posting {media_type} with caption: {caption[:50]}...")
             print(f"🔍 Tumblr: Using hashtags: {hashtags}")
             
-            if media_type == 'image':
-                response = self.client.create_photo(
-                    TUMBLR_BLOG_NAME,
-                    state="published",
-                    tags=hashtags,
-                    caption=caption,
-                    source=local_path
-                )
-            else:  # video
-                # For video posts, Tumblr uses different parameter names
-                response = self.client.create_video(
-                    TUMBLR_BLOG_NAME,
-                    state="published",
-                    tags=hashtags,
-                    caption=caption,  # This should work for videos too
-                    data=local_path
-                )
+            if media_type == 'image' and pulls_from_url('tumblr'):
+                # Tumblr fetches the photo itself ('source' is a URL)
+                media = {'source': content_data['url']}
+                span_fields = {'source': MEDIA_SOURCE_URL}
+            else:
+                # Local files go through 'data'; videos are always uploaded
+                media = {'data': local_path}
+                span_fields = {'bytes': os.path.getsize(local_path)}
+            
+            with span('tumblr.upload', 'http', **span_fields) as upload:
+                if media_type == 'image':
+                    response = self.client.create_photo(
+                        self.blog_name,
+                        state="published",
+                        tags=hashtags,
+                        caption=caption,
+                        **media
+                    )
+                else:  # video
+                    # For video posts, Tumblr uses different parameter names
+                    response = self.client.create_video(
+                        self.blog_name,
+                        state="published",
+                        tags=hashtags,
+                        caption=caption,  # This should work for videos too
+                        **media
+                    )
+                upload.set(status=response.get('meta', {}).get('status'))
             
             print(f"🔍 Tumblr API response: {response}")
             
@@ -317,24 +655,54 @@ class TumblrPublisher:
                 return response
             else:
                 print(f"❌ Tumblr: Posting failed - {response}")
+                self.last_error = f"Posting failed - {response}"
+                # 401: the OAuth tokens were revoked
+                self.auth_failed = response.get('meta', {}).get('status') == 401
                 return None
                 
         except Exception as e:
             print(f"❌ Tumblr: Error - {e}")
+            self.last_error = f"Error - {e}"
             return None
 
 
 class BlueskyPublisher:
     """Bluesky AT Protocol publisher"""
     
-    def __init__(self):
-        self.client = BskyClient()
+    @staticmethod
+    def is_configured(account=None):
+        """Check credentials without any network I/O"""
+        account = account or default_account()
+        return bool(account.credential('BLUESKY_USERNAME') and account.credential('BLUESKY_PASSWORD'))
+    
+    @staticmethod
+    def needs_local_file(media_type=None):
+        """Bluesky blobs are always uploaded from local bytes"""
+        return True
+    
+    def __init__(self, account=None, session=None):
+        account = account or default_account()
+        self.last_error = None
+        # atproto pulls in a large set of pydantic models; load it only when posting
+        from atproto import Client as BskyClient
+        self.auth_failed = False
+        self.client = BskyClient(base_url=BLUESKY_API_BASE)
         try:
-            self.client.login(BLUESKY_USERNAME, BLUESKY_PASSWORD)
+            login_with_saved_session(
+                self.client,
+                account.credential('BLUESKY_USERNAME'),
+                account.credential('BLUESKY_PASSWORD'),
+                account.bluesky_session_file
+            )
         except Exception as e:
             print(f"Bluesky login failed: {e}")
+            self.last_error = f"Bluesky login failed: {e}"
             self.client = None
     
+    def is_ready(self):
+        """Check the login succeeded and the session was not rejected since"""
+        return self.client is not None and not self.auth_failed
+    
     def post_content(self, content_data, caption, facets=None):
         """
         Post content to Bluesky
@@ -349,6 +717,7 @@ class BlueskyPublisher:
         """
         if not self.client:
             print("Bluesky client not initialized")
+            self.last_error = "Bluesky client not initialized"
             return None
             
         try:
@@ -358,108 +727,228 @@ class BlueskyPublisher:
             with open(local_path, 'rb') as media_file:
                 media_data = media_file.read()
             
-            if media_type == 'video':
-                response = self.client.send_video(
-                    text=caption,
-                    video=media_data,
-                    video_alt=f"Video: {os.path.basename(local_path)}",
-                    facets=facets or []
-                )
-            else:  # image
-                response = self.client.send_image(
-                    text=caption,
-                    image=media_data,
-                    image_alt=os.path.basename(local_path),
-                    facets=facets or []
-                )
+            with span('bluesky.upload', 'http', bytes=len(media_data)):
+                if media_type == 'video':
+                    response = self.client.send_video(
+                        text=caption,
+                        video=media_data,
+                        video_alt=f"Video: {os.path.basename(local_path)}",
+                        facets=facets or []
+                    )
+                else:  # image
+                    response = self.client.send_image(
+                        text=caption,
+                        image=media_data,
+                        image_alt=os.path.basename(local_path),
+                        facets=facets or []
+                    )
             
             print("✅ Bluesky: Content posted successfully")
             return response
             
         except Exception as e:
             print(f"❌ Bluesky: Error - {e}")
+            self.last_error = f"Error - {e}"
+            # atproto request errors carry the response with Bluesky's ratelimit-* headers
+            response = getattr(e, 'response', None)
+            if response is not None and getattr(response, 'headers', None):
+                get_tracker().record_response('bluesky', response.status_code, response.headers)
+            # 401: the session was revoked, so the next post logs in again
+            self.auth_failed = getattr(response, 'status_code', None) == 401
             return None
 
 
 class ThreadsPublisher:
     """Threads API publisher (Meta)"""
     
-    def __init__(self):
-        self.access_token = THREADS_ACCESS_TOKEN
-        self.base_url = "https://graph.threads.net/v1.0"
+    @staticmethod
+    def is_configured(account=None):
+        """Check credentials without any network I/O"""
+        account = account or default_account()
+        return bool(account.credential('THREADS_ACCESS_TOKEN'))
+    
+    @staticmethod
+    def needs_local_file(media_type=None):
+        """Threads always fetches the media from its URL"""
+        return False
+    
+    def __init__(self, account=None, session=None):
+        account = account or default_account()
+        self.last_error = None
+        # Keep-alive connection pool, reused across posts by a long-lived registry
+        self.session = trace_session(install_hooks(session or requests.Session()))
+        self.access_token = account.credential('THREADS_ACCESS_TOKEN')
+        self.base_url = THREADS_API_BASE
         self.user_id = None
+        self.auth_failed = False
+        self.identity_cache = IdentityCache(account.identity_cache_file)
         self._get_user_id()
     
+    def is_ready(self):
+        """Check the user ID lookup succeeded and the token was not rejected since"""
+        return self.user_id is not None and not self.auth_failed
+    
     def _get_user_id(self):
-        """Get the Threads user ID from the access token"""
+        """Get the Threads user ID from the access token (cached)"""
         if not self.access_token:
             return
+        
+        cached_id = self.identity_cache.get(THREADS_USER_CACHE_KEY)
+        if cached_id:
+            self.user_id = cached_id
+            return
+        
         try:
             url = f"{self.base_url}/me"
             params = {
                 'access_token': self.access_token,
                 'fields': 'id,username'
             }
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params)
             data = response.json()
             
             if 'id' in data:
                 self.user_id = data['id']
+                self.identity_cache.set(THREADS_USER_CACHE_KEY, self.user_id)
                 print(f"✅ Threads: Connected as @{data.get('username', 'unknown')}")
             else:
                 print(f"❌ Threads: Failed to get user ID - {data}")
+                self.last_error = f"Failed to get user ID - {data}"
         except Exception as e:
             print(f"❌ Threads: Error getting user ID - {e}")
+            self.last_error = f"Error getting user ID - {e}"
+    
+    def _handle_api_error(self, response_data):
+        """Drop the cached user ID after auth or unknown-object errors"""
+        error_code = response_data.get('error', {}).get('code') if isinstance(response_data, dict) else None
+        if is_auth_error(response_data) or error_code == GRAPH_UNKNOWN_OBJECT_CODE:
+            self.identity_cache.invalidate(THREADS_USER_CACHE_KEY)
+        if is_auth_error(response_data):
+            self.auth_failed = True
+            get_token_manager().mark_invalid('threads', self.access_token, response_data['error'].get('message'))
+    
+    def _create_container(self, media_type, media_url, caption):
+        """
+        Step 1: Create media container
+        
+        Returns:
+            str: Container ID, or None if creation failed
+        """
+        container_url = f"{self.base_url}/{self.user_id}/threads"
+        
+        if media_type == 'video':
+            container_params = {
+                'media_type': 'VIDEO',
+                'video_url': media_url,
+                'text': caption,
+                'access_token': self.access_token,
+                'is_made_with_ai': 'true'
+            }
+        else:  # image
+            container_params = {
+                'media_type': 'IMAGE',
+                'image_url': media_url,
+                'text': caption,
+                'access_token': self.access_token,
+                'is_made_with_ai': 'true'
+            }
+        
+        print(f"🔄 Threads: Creating {media_type} container...")
+        container_response = self.session.post(container_url, data=container_params)
+        container_data = container_response.json()
+        
+        if 'id' not in container_data:
+            print(f"❌ Threads: Container creation failed - {container_data}")
+            self.last_error = f"Container creation failed - {container_data}"
+            self._handle_api_error(container_data)
+            return None
+        
+        print(f"✅ Threads: Container created (ID: {container_data['id']})")
+        return container_data['id']
+    
+    def _get_container_status(self, container_id):
+        """Get a media container's status, or None if it can't be read"""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/{container_id}",
+                params={'fields': 'status', 'access_token': self.access_token}
+            )
+            return response.json().get('status')
+        except Exception as e:
+            print(f"⚠️ Threads: Could not check container {container_id} - {e}")
+            return None
     
-    def post_content(self, content_data, caption):
+    def _find_published_media(self, caption):
+        """
+        Find the media ID of a post published by an interrupted run
+        Containers don't expose the post they became, so match the text
+        against the user's most recent threads
+        
+        Returns:
+            str: Media ID, or None if it can't be found
+        """
+        try:
+            response = self.session.get(
+                f"{self.base_url}/{self.user_id}/threads",
+                params={'fields': 'id,text', 'limit': RESUME_LOOKUP_LIMIT, 'access_token': self.access_token}
+            )
+            for media in response.json().get('data', []):
+                if media.get('text') == caption:
+                    return media['id']
+        except Exception as e:
+            print(f"⚠️ Threads: Could not look up the published post - {e}")
+        return None
+    
+    def post_content(self, content_data, caption, resume=None, checkpoint=None):
         """
         Post content to Threads
         
         Args:
             content_data (dict): Content information with 'url', 'media_type'
             caption (str): Formatted caption with hashtags
+            resume (dict): Saved progress from an interrupted run (may hold 'container_id')
+            checkpoint (callable): checkpoint(state, **fields) to persist progress
             
         Returns:
             dict: API response or None if failed
         """
         if not self.access_token or not self.user_id:
             print("❌ Threads: API credentials not configured or user ID not found")
+            self.last_error = "API credentials not configured or user ID not found"
             return None
             
         try:
             media_type = content_data['media_type']
             media_url = content_data['url']
+            container_id = None
             
-            # Step 1: Create media container
-            container_url = f"{self.base_url}/{self.user_id}/threads"
-            
-            if media_type == 'video':
-                container_params = {
-                    'media_type': 'VIDEO',
-                    'video_url': media_url,
-                    'text': caption,
-                    'access_token': self.access_token,
-                    'is_made_with_ai': 'true'
-                }
-            else:  # image
-                container_params = {
-                    'media_type': 'IMAGE',
-                    'image_url': media_url,
-                    'text': caption,
-                    'access_token': self.access_token,
-                    'is_made_with_ai': 'true'
-                }
-            
-            print(f"🔄 Threads: Creating {media_type} container...")
-            container_response = requests.post(container_url, data=container_params)
-            container_data = container_response.json()
+            # Reuse the container from an interrupted run if it is still usable
+            if resume and resume.get('media_id'):
+                print("✅ Threads: Already published in the interrupted run")
+                return {'id': resume['media_id'], 'creation_id': resume.get('container_id')}
+            if resume and resume.get('container_id'):
+                container_status = self._get_container_status(resume['container_id'])
+                if container_status == 'PUBLISHED':
+                    print("✅ Threads: Container was already published in the interrupted run")
+                    result = {'creation_id': resume['container_id'], 'status': container_status}
+                    media_id = self._find_published_media(caption)
+                    if media_id:
+                        result['id'] = media_id
+                    else:
+                        print("⚠️ Threads: Published post not found, it won't be indexed")
+                    return result
+                elif container_status in ('EXPIRED', 'ERROR', None):
+                    print(f"⚠️ Threads: Saved container unusable ({container_status}), creating a new one")
+                else:
+                    container_id = resume['container_id']
+                    print(f"♻️ Threads: Reusing container {container_id}")
             
-            if 'id' not in container_data:
-                print(f"❌ Threads: Container creation failed - {container_data}")
-                return None
-                
-            container_id = container_data['id']
-            print(f"✅ Threads: Container created (ID: {container_id})")
+            if not container_id:
+                container_id = self._create_container(media_type, media_url, caption)
+                if not container_id:
+                    return None
+                if checkpoint:
+                    checkpoint(PROGRESS_CONTAINER_CREATED, container_id=container_id)
             
             # Step 2: Wait for processing (especially for videos)
             status_url = f"{self.base_url}/{container_id}"
@@ -468,23 +957,27 @@ class ThreadsPublisher:
                 'access_token': self.access_token
             }
             
-            for attempt in range(30):
-                status_response = requests.get(status_url, params=status_params)
-                status_data = status_response.json()
-                status = status_data.get('status')
-                
-                if status == 'FINISHED':
-                    print("✅ Threads: Media processing complete")
-                    break
-                elif status == 'ERROR':
-                    print(f"❌ Threads: Media processing failed - {status_data}")
-                    return None
-                elif status == 'IN_PROGRESS':
-                    print(f"🔄 Threads: Processing... (attempt {attempt + 1}/30)")
-                    time.sleep(2)
-                else:
-                    # For images, status might not be returned
-                    break
+            with span('threads.poll', 'poll') as poll:
+                for attempt in range(30):
+                    poll.set(polls=attempt + 1)
+                    status_response = self.session.get(status_url, params=status_params)
+                    status_data = status_response.json()
+                    status = status_data.get('status')
+                    
+                    if status == 'FINISHED':
+                        print("✅ Threads: Media processing complete")
+                        break
+                    elif status == 'ERROR':
+                        print(f"❌ Threads: Media processing failed - {status_data}")
+                        self.last_error = f"Media processing failed - {status_data}"
+                        poll.set(status='failed')
+                        return None
+                    elif status == 'IN_PROGRESS':
+                        print(f"🔄 Threads: Processing... (attempt {attempt + 1}/30)")
+                        time.sleep(2)
+                    else:
+                        # For images, status might not be returned
+                        break
             
             # Step 3: Publish
             publish_url = f"{self.base_url}/{self.user_id}/threads_publish"
@@ -494,78 +987,328 @@ class ThreadsPublisher:
             }
             
             print("🔄 Threads: Publishing...")
-            publish_response = requests.post(publish_url, data=publish_params)
+            publish_response = self.session.post(publish_url, data=publish_params)
             publish_data = publish_response.json()
             
             if 'id' in publish_data:
                 print(f"✅ Threads: Posted {media_type} successfully (ID: {publish_data['id']})")
+                if checkpoint:
+                    # A rerun after a crash right here returns this ID instead of looking it up
+                    checkpoint(PROGRESS_CONTAINER_CREATED, container_id=container_id, media_id=publish_data['id'])
                 return publish_data
             else:
                 print(f"❌ Threads: Publishing failed - {publish_data}")
+                self.last_error = f"Publishing failed - {publish_data}"
+                self._handle_api_error(publish_data)
                 return None
                 
         except Exception as e:
             print(f"❌ Threads: Error - {e}")
+            self.last_error = f"Error - {e}"
+            return None
+
+
+PUBLISHER_CLASSES = {
+    'instagram': InstagramPublisher,
+    'tiktok': TikTokPublisher,
+    'tumblr': TumblrPublisher,
+    'bluesky': BlueskyPublisher,
+    'threads': ThreadsPublisher
+}
+
+PLATFORMS = list(PUBLISHER_CLASSES)
+
+NOT_CONFIGURED = "Skipped (not configured)"
+
+
+class PublisherRegistry:
+    """
+    Lazily constructs publishers on first use
+    Unconfigured platforms are skipped without any network I/O, and the
+    constructors (account lookups, logins) can be pre-warmed concurrently
+    
+    Only ready publishers are kept: a failed setup or a rejected token is
+    rebuilt on the next get(), and a change to .env or the token state
+    (e.g. renewed tokens) re-reads the credentials and drops every publisher
+    """
+    
+    def __init__(self, account=None, session=None):
+        """
+        Args:
+            account (Account): Account to post as (default: the env-configured one)
+            session (requests.Session): HTTP pool shared with other registries;
+                                        publishers create their own if None
+        """
+        self.account = account or default_account()
+        self.shared_session = session
+        self._publishers = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._credentials_stamp = self._credential_files_stamp()
+    
+    @staticmethod
+    def _credential_files_stamp():
+        """Modification times of the files renewed tokens are written to"""
+        stamp = []
+        for path in (ENV_FILE, TOKEN_STATE_FILE):
+            try:
+                stamp.append(os.path.getmtime(path))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+    
+    def _close_publisher(self, publisher):
+        """Close a publisher's own HTTP session (a shared one belongs to whoever passed it in)"""
+        session = getattr(publisher, 'session', None)
+        if session is not None and session is not self.shared_session:
+            session.close()
+    
+    def _check_credentials(self):
+        """Re-read the credentials and drop every publisher once .env or the token state changed"""
+        stamp = self._credential_files_stamp()
+        with self._lock:
+            if stamp == self._credentials_stamp:
+                return
+            self._credentials_stamp = stamp
+            publishers, self._publishers = list(self._publishers.values()), {}
+            # Pre-warming publishers were built with the old credentials
+            self._pending = {}
+            self.account.reload_credentials()
+        print("🔑 Credentials changed, rebuilding publishers")
+        for publisher in publishers:
+            self._close_publisher(publisher)
+    
+    def evict(self, platform):
+        """Drop a platform's publisher so the next get() builds a new one"""
+        with self._lock:
+            publisher = self._publishers.pop(platform, None)
+        if publisher is not None:
+            self._close_publisher(publisher)
+    
+    def is_configured(self, platform):
+        """Check whether a platform has credentials (no network I/O)"""
+        return PUBLISHER_CLASSES[platform].is_configured(self.account)
+    
+    def configured_platforms(self):
+        """List configured platforms in posting order"""
+        return [platform for platform in PUBLISHER_CLASSES if self.is_configured(platform)]
+    
+    def needs_local_file(self, platforms=None, media_type=None):
+        """
+        Check whether any configured platform needs the media downloaded first
+        
+        Args:
+            platforms (list): Platforms about to post (default: all)
+            media_type (str): 'image' or 'video' (None: assume either)
+            
+        Returns:
+            bool: False when every configured platform fetches the media by URL
+        """
+        return any(
+            PUBLISHER_CLASSES[platform].needs_local_file(media_type)
+            for platform in platforms or PUBLISHER_CLASSES
+            if self.is_configured(platform)
+        )
+    
+    def _construct(self, platform):
+        """Build a publisher, never raising (failures become None)"""
+        try:
+            with span(f"{platform}.setup", 'setup'):
+                return PUBLISHER_CLASSES[platform](self.account, self.shared_session)
+        except Exception as e:
+            print(f"❌ {platform.capitalize()}: Publisher setup failed - {e}")
             return None
+    
+    def prewarm(self, platforms=None):
+        """
+        Start constructing publishers in background threads
+        Lets logins and account lookups overlap with the media download
+        
+        Args:
+            platforms (list): Platforms to warm up (default: all configured)
+        """
+        platforms = [p for p in (platforms or PUBLISHER_CLASSES) if self.is_configured(p)]
+        with self._lock:
+            platforms = [p for p in platforms if p not in self._publishers and p not in self._pending]
+            if not platforms:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=len(PUBLISHER_CLASSES), thread_name_prefix='prewarm')
+            for platform in platforms:
+                self._pending[platform] = self._executor.submit(self._construct, platform)
+        print(f"🔥 Pre-warming publishers: {', '.join(platforms)}")
+    
+    def get(self, platform):
+        """
+        Get the publisher for a platform, constructing it on first use
+        
+        Args:
+            platform (str): Platform name
+            
+        Returns:
+            object: Publisher instance (check is_ready()), or None if unconfigured
+                    or setup raised; only ready publishers are cached
+        """
+        self._check_credentials()
+        if not self.is_configured(platform):
+            return None
+        
+        with self._lock:
+            publisher = self._publishers.get(platform)
+            if publisher is not None and publisher.is_ready():
+                return publisher
+            future = self._pending.pop(platform, None)
+        if publisher is not None:
+            # Setup or the token failed since: rebuild instead of reusing it
+            self.evict(platform)
+        
+        publisher = future.result() if future else self._construct(platform)
+        if publisher is not None and publisher.is_ready():
+            with self._lock:
+                self._publishers[platform] = publisher
+        elif publisher is not None:
+            self._close_publisher(publisher)
+        return publisher
+    
+    def shutdown(self):
+        """Stop the pre-warm threads (does not wait for unfinished setup)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def close(self):
+        """Stop the pre-warm threads and close the publishers' own HTTP sessions"""
+        self.shutdown()
+        with self._lock:
+            publishers, self._publishers = list(self._publishers.values()), {}
+        for publisher in publishers:
+            self._close_publisher(publisher)
+
+
+def _post_to_platform(platform, publisher, content_data, captions_data, resume=None, checkpoint=None):
+    """Call one publisher with its platform-specific caption data"""
+    if platform == 'tumblr':
+        return publisher.post_content(
+            content_data,
+            captions_data['tumblr'],
+            captions_data['hashtags']['tumblr']
+        )
+    elif platform == 'bluesky':
+        facets = captions_data.get('bluesky_facets')
+        if facets is None:
+            # Items queued before facets were stored on the queue item
+            facets = get_bluesky_facets(
+                captions_data['bluesky'],
+                captions_data['hashtags']['bluesky']
+            )
+        facets, facet_errors = validate_facets(captions_data['bluesky'], facets)
+        for error in facet_errors:
+            print(f"⚠️ Bluesky: Dropping invalid facet - {error}")
+        return publisher.post_content(
+            content_data,
+            captions_data['bluesky'],
+            facets
+        )
+    elif platform == 'threads':
+        return publisher.post_content(
+            content_data,
+            captions_data.get('threads', captions_data['instagram']),  # Fallback to Instagram caption
+            resume=resume,
+            checkpoint=checkpoint
+        )
+    else:
+        return publisher.post_content(
+            content_data,
+            captions_data[platform],
+            resume=resume,
+            checkpoint=checkpoint
+        )
 
 
-def post_to_all_platforms(content_data, captions_data):
+def post_to_all_platforms(content_data, captions_data, registry=None, progress=None, checkpoint=None, platforms=None):
     """
-    Post content to all platforms simultaneously
+    Post content to each platform in turn (publisher setup can be pre-warmed concurrently)
     
     Args:
         content_data (dict): Content information
         captions_data (dict): Platform-specific captions and hashtags
+        registry (PublisherRegistry): Shared (possibly pre-warmed) publishers
+        progress (dict): platform -> saved progress from an interrupted run;
+                         platforms that already finished are not posted again
+        checkpoint (callable): checkpoint(platform, state, **fields), called as
+                               each platform advances so a rerun can resume
+        platforms (list): Only post to these platforms (default: all)
         
     Returns:
         dict: Results from all platforms
     """
+    registry = registry or PublisherRegistry()
+    progress = progress or {}
     results = {}
+    limiter = get_tracker()
+    tokens = get_token_manager()
+    scope = registry.account.name
     
-    # Instagram
-    instagram = InstagramPublisher()
-    results['instagram'] = instagram.post_content(
-        content_data, 
-        captions_data['instagram']
-    )
-    
-    # TikTok (videos only)
-    if content_data['media_type'] == 'video':
-        tiktok = TikTokPublisher()
-        results['tiktok'] = tiktok.post_content(
-            content_data,
-            captions_data['tiktok']
-        )
-    else:
-        results['tiktok'] = "Skipped (images not supported)"
-    
-    # Tumblr
-    tumblr = TumblrPublisher()
-    results['tumblr'] = tumblr.post_content(
-        content_data,
-        captions_data['tumblr'],
-        captions_data['hashtags']['tumblr']
-    )
-    
-    # Bluesky
-    bluesky = BlueskyPublisher()
-    from caption_generator import CaptionGenerator
-    generator = CaptionGenerator()
-    facets = generator.get_bluesky_facets(
-        captions_data['bluesky'],
-        captions_data['hashtags']['bluesky']
-    )
-    results['bluesky'] = bluesky.post_content(
-        content_data,
-        captions_data['bluesky'],
-        facets
-    )
-    
-    # Threads
-    threads = ThreadsPublisher()
-    results['threads'] = threads.post_content(
-        content_data,
-        captions_data.get('threads', captions_data['instagram'])  # Fallback to Instagram caption
-    )
+    for platform in platforms or PUBLISHER_CLASSES:
+        saved = progress.get(platform) or {}
+        if saved.get('state') in (PROGRESS_PUBLISHED, PROGRESS_FAILED, PROGRESS_SKIPPED):
+            print(f"⏭️ {platform.capitalize()}: Already {saved['state']} in an earlier run")
+            results[platform] = saved.get('result')
+            continue
+        
+        def platform_checkpoint(state, _platform=platform, **fields):
+            if checkpoint:
+                checkpoint(_platform, state, **fields)
+        
+        reason = None
+        retry_after = None
+        if platform == 'tiktok' and content_data['media_type'] != 'video':
+            result = "Skipped (images not supported)"
+        elif not registry.is_configured(platform):
+            print(f"⏭️ {platform.capitalize()}: Not configured, skipping")
+            result = NOT_CONFIGURED
+        else:
+            # Check quotas and the access token before any login or upload is
+            # spent on a post the platform would reject
+            allowed, limit_reason, retry_after = limiter.check(platform, scope)
+            token_fresh, token_reason = True, None
+            if allowed:
+                token_fresh, token_reason = tokens.check(
+                    platform, registry.account.credential(TOKEN_CREDENTIALS.get(platform))
+                )
+            publisher = registry.get(platform) if allowed and token_fresh else None
+            if not allowed:
+                print(f"⏸️ {platform.capitalize()}: Deferred - {limit_reason}")
+                result = None
+                reason = f"Deferred: {limit_reason}"
+            elif not token_fresh:
+                print(f"🔑 {platform.capitalize()}: Not posting - {token_reason}")
+                result = None
+                reason = f"Token: {token_reason}"
+            elif publisher is None or not publisher.is_ready():
+                result = None
+                reason = (publisher and publisher.last_error) or "Publisher setup failed"
+            else:
+                publisher.last_error = None
+                with span(f"{platform}.post", 'platform', account=scope) as post_span:
+                    result = _post_to_platform(
+                        platform, publisher, content_data, captions_data,
+                        resume=saved, checkpoint=platform_checkpoint
+                    )
+                    post_span.set(status='ok' if result else 'failed')
+                reason = publisher.last_error
+        
+        if is_skipped_result(result):
+            platform_checkpoint(PROGRESS_SKIPPED, result=result)
+        elif result:
+            limiter.record_publish(platform, scope)
+            platform_checkpoint(PROGRESS_PUBLISHED, result=result)
+        elif retry_after:
+            platform_checkpoint(PROGRESS_FAILED, result=None, reason=reason, retry_after=retry_after.isoformat())
+        else:
+            platform_checkpoint(PROGRESS_FAILED, result=None, reason=reason or "Publisher returned no result")
+        results[platform] = result
     
     return results
@@ -0,0 +1,146 @@
+"""
+Persistent index of published posts
+Maps each platform post ID (e.g. an Instagram media ID) to the queue item it
+came from, so comment and DM jobs can look a post up without scanning the
+queue. Entries outlive cleanup_queue(), which drops old items from the queue.
+"""
+
+import json
+import os
+from datetime import datetime
+from config import POST_INDEX_FILE, CONTENT_QUEUE_FILE
+
+
+# Queue item fields copied into each entry
+INDEXED_FIELDS = ('id', 'filename', 'fun_fact', 'fun_fact_followup', 'posted_date')
+
+
+def post_ids(results):
+    """
+    Extract the platform post IDs from posting results
+
+    Args:
+        results (dict): posting_results of a queue item
+
+    Returns:
+        dict: Platform -> post ID for every platform that returned one
+    """
+    ids = {}
+    for platform, result in (results or {}).items():
+        if not isinstance(result, dict):
+            continue
+        # Graph API and Tumblr return 'id', Bluesky a record 'uri', TikTok a 'publish_id'
+        post_id = result.get('id') or result.get('uri') or result.get('publish_id')
+        if post_id:
+            ids[platform] = str(post_id)
+    return ids
+
+
+def _key(platform, post_id):
+    return f"{platform}:{post_id}"
+
+
+class PostIndex:
+    """
+    JSON-backed platform post ID -> queue item lookup
+    """
+
+    def __init__(self, index_file=POST_INDEX_FILE, queue_file=CONTENT_QUEUE_FILE):
+        self.index_file = index_file
+        self.queue_file = queue_file
+        self._entries = None
+
+    @property
+    def entries(self):
+        """Index entries, loaded (or backfilled from the queue) on first use"""
+        if self._entries is None:
+            self._entries = self._load()
+        return self._entries
+
+    def _load(self):
+        """Load the index, building it from the queue file if there is none yet"""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                pass
+        return self._backfill()
+
+    def _backfill(self):
+        """Index the posted items still in the queue file"""
+        if not self.queue_file or not os.path.exists(self.queue_file):
+            return {}
+        try:
+            with open(self.queue_file, 'r') as f:
+                queue = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
+
+        entries = {}
+        for item in queue:
+            if item.get('posted'):
+                entries.update(self._entries_for(item))
+        if entries:
+            print(f"🗂️ Built post index from the queue ({len(entries)} posts)")
+            self._save(entries)
+        return entries
+
+    def _entries_for(self, item):
+        """Index entries for one posted queue item"""
+        entry = {field: item.get(field) for field in INDEXED_FIELDS}
+        entry['indexed_at'] = datetime.now().isoformat()
+        return {
+            _key(platform, post_id): dict(entry, platform=platform)
+            for platform, post_id in post_ids(item.get('posting_results')).items()
+        }
+
+    def _save(self, entries):
+        """Save index entries to file"""
+        os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+
+    def add(self, item):
+        """
+        Index the platform posts of a queue item (called when it is marked as posted)
+
+        Args:
+            item (dict): Posted queue item
+
+        Returns:
+            int: Number of posts indexed
+        """
+        new_entries = self._entries_for(item)
+        if not new_entries:
+            return 0
+        try:
+            self.entries.update(new_entries)
+            self._save(self.entries)
+        except OSError as e:
+            print(f"⚠️ Could not save post index: {e}")
+        return len(new_entries)
+
+    def lookup(self, platform, post_id):
+        """
+        Find the queue item a platform post came from
+
+        Args:
+            platform (str): Platform name, e.g. 'instagram'
+            post_id (str): Platform post ID
+
+        Returns:
+            dict: Entry with id, filename, fun_fact, fun_fact_followup and
+                  posted_date, or None if the post is unknown
+        """
+        return self.entries.get(_key(platform, post_id))
+
+    def get_fun_fact_followup(self, platform, post_id):
+        """
+        Get the follow-up fun fact for a platform post
+
+        Returns:
+            str: The fun_fact_followup, or None if the post is unknown
+        """
+        entry = self.lookup(platform, post_id)
+        return entry.get('fun_fact_followup') if entry else None
@@ -0,0 +1,260 @@
+"""
+Posting steps shared by the CLI and the daemon
+Builds captions and content data, posts one queue item and retries failures
+against a publisher registry the caller owns
+"""
+
+import os
+from content_queue import is_skipped_result
+from tracing import span
+
+# Publisher SDKs (requests, pytumblr, atproto) are imported only when posting
+
+
+def download_file_from_s3(s3_url, local_path):
+    """
+    Download file from S3 URL to local path for platforms that need local files
+    
+    Args:
+        s3_url (str): S3 URL of the file
+        local_path (str): Local path where to save the file
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    import requests
+    
+    try:
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        
+        # Download file from S3
+        print(f"📥 Downloading {os.path.basename(local_path)} from S3...")
+        with span('s3.download', 's3') as download:
+            response = requests.get(s3_url)
+            download.set(status=response.status_code, bytes=len(response.content))
+        response.raise_for_status()
+        
+        # Save to local path
+        with open(local_path, 'wb') as f:
+            f.write(response.content)
+        
+        print(f"✅ Downloaded to {local_path}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Failed to download file: {e}")
+        return False
+
+
+def build_captions(content):
+    """
+    Build the captions data structure platform publishers expect
+    
+    Args:
+        content (dict): Queue item with pre-generated captions
+        
+    Returns:
+        dict: Captions per platform, hashtags and Bluesky facets
+    """
+    return {
+        'base_caption': content.get('kaomoji', ''),
+        'fun_fact': content.get('fun_fact', ''),
+        'fun_fact_followup': content.get('fun_fact_followup', ''),
+        'instagram': content['platform_captions']['instagram'],
+        'tiktok': content['platform_captions']['tiktok'],
+        'tumblr': content['platform_captions']['tumblr'],
+        'bluesky': content['platform_captions']['bluesky'],
+        'threads': content['platform_captions'].get('threads') or content['platform_captions']['instagram'],
+        'bluesky_facets': content.get('bluesky_facets'),
+        'hashtags': {
+            'instagram': content.get('hashtags', []),
+            'tiktok': content.get('hashtags', []),
+            'tumblr': content.get('hashtags', []),
+            'bluesky': content.get('hashtags', [])
+        }
+    }
+
+
+def build_content_data(content, download=True):
+    """
+    Download the media if needed and build the content data for publishers
+    
+    Args:
+        content (dict): Queue item to post
+        download (bool): Whether a platform needs the local file; when all of
+                         them post by URL the download is skipped
+        
+    Returns:
+        dict: Content data, or None if the download failed
+    """
+    # Download file from S3 to local path for platforms that need local files
+    local_path = content.get('local_path')
+    if local_path and not os.path.exists(local_path):
+        if not download:
+            print("⏭️ Skipping download: every platform fetches the media by URL")
+            local_path = None
+        elif not download_file_from_s3(content['url'], local_path):
+            print("❌ Failed to download file for local platforms")
+            return None
+    
+    return {
+        'url': content['url'],
+        'local_path': local_path,
+        'media_type': content['media_type'],
+        'filename': content['filename']
+    }
+
+
+def get_due_content(queue, scheduler):
+    """
+    Get the content whose planned slot is due (an interrupted post first)
+    
+    Args:
+        queue (ContentQueue): Content queue
+        scheduler (PostingScheduler): Posting plan for the queue
+        
+    Returns:
+        tuple: (content, platforms), or (None, None) if nothing is due
+    """
+    in_progress = queue.get_in_progress_content()
+    if in_progress:
+        print(f"♻️ Resuming interrupted post: {in_progress['filename']}")
+        return in_progress, None
+    
+    scheduler.refresh()
+    slot = scheduler.get_due()
+    if not slot:
+        upcoming = scheduler.upcoming()
+        next_slot = upcoming[0]['slot'][:16] if upcoming else 'none planned'
+        print(f"🕒 Nothing due (next slot: {next_slot})")
+        return None, None
+    
+    print(f"🗓️ Slot {slot['slot'][:16]} is due")
+    return queue.get_content(slot['content_id']), slot['platforms']
+
+
+def post_content(queue, content, registry, platforms=None, prewarm=True):
+    """
+    Post one queue item to its platforms and mark it as posted
+    
+    Args:
+        queue (ContentQueue): Queue the item belongs to
+        content (dict): Queue item to post
+        registry (PublisherRegistry): Publishers to post with (not shut down here)
+        platforms (list): Only post to these platforms (default: all)
+        prewarm (bool): Start publisher setup while the media downloads
+        
+    Returns:
+        dict: Results per platform, or None if nothing was posted
+    """
+    print(f"🎯 Selected content: {content['filename']} (ID: {content['id']})")
+    
+    # Use pre-generated captions from queue
+    print("📝 Using pre-generated captions...")
+    
+    # Check if content has complete caption data
+    if 'platform_captions' not in content or not content['platform_captions']:
+        print("❌ Content missing pre-generated captions. Please run migration script.")
+        return None
+    
+    captions = build_captions(content)
+    
+    print(f"✅ Using pre-generated caption: {captions['base_caption']}")
+    
+    from platform_publishers import PLATFORMS, post_to_all_platforms
+    
+    # A resumed post keeps the platforms it started with
+    if platforms is None and content.get('platform_progress'):
+        platforms = list(content['platform_progress'])
+    
+    # Start publisher setup (logins, account lookups) while the media downloads
+    if prewarm:
+        registry.prewarm(platforms)
+    
+    content_data = build_content_data(content, registry.needs_local_file(platforms, content['media_type']))
+    if content_data is None:
+        return None
+    
+    # Checkpoint per-platform progress on the queue item so a crashed or
+    # timed-out run resumes only the unfinished platforms
+    progress = queue.start_posting(content['id'], platforms or PLATFORMS)
+    
+    def checkpoint(platform, state, **fields):
+        queue.update_platform_progress(content['id'], platform, state, **fields)
+    
+    # Post to each platform in turn
+    print("📤 Posting to all platforms...")
+    try:
+        results = post_to_all_platforms(
+            content_data, captions,
+            registry=registry, progress=progress, checkpoint=checkpoint,
+            platforms=platforms
+        )
+        
+        # Log results
+        print("\n📊 Posting Results:")
+        for platform, result in results.items():
+            if is_skipped_result(result):
+                print(f"   ⏭️ {platform.capitalize()}: {result}")
+            elif result:
+                print(f"   ✅ {platform.capitalize()}: Success")
+            else:
+                print(f"   ❌ {platform.capitalize()}: Failed")
+        
+        # Mark as posted
+        queue.mark_as_posted(content['id'], results)
+        
+        print(f"✅ Successfully posted: {content['filename']}")
+        return results
+        
+    except Exception as e:
+        print(f"❌ Posting failed: {e}")
+        return None
+
+
+def retry_due(queue, registry):
+    """
+    Retry platforms that failed on recently posted items, with backoff
+    
+    Args:
+        queue (ContentQueue): Content queue
+        registry (PublisherRegistry): Publishers to post with (not shut down here)
+        
+    Returns:
+        int: Number of items retried
+    """
+    due = queue.get_due_retries()
+    if not due:
+        print("🔁 No platform retries due")
+        return 0
+    
+    print(f"🔁 {len(due)} item(s) with platform retries due")
+    
+    from platform_publishers import post_to_all_platforms
+    
+    for item, platforms in due:
+        print(f"🎯 Retrying {', '.join(platforms)} for {item['filename']} (ID: {item['id']})")
+        content_data = build_content_data(item, registry.needs_local_file(platforms, item['media_type']))
+        if content_data is None:
+            continue
+        
+        # Record each platform's outcome as soon as it finishes
+        failures = {}
+        
+        def checkpoint(platform, state, **fields):
+            if 'reason' in fields:
+                failures[platform] = fields
+        
+        results = post_to_all_platforms(
+            content_data, build_captions(item),
+            registry=registry, checkpoint=checkpoint, platforms=platforms
+        )
+        for platform in platforms:
+            failure = failures.get(platform, {})
+            queue.record_retry_result(
+                item['id'], platform, results.get(platform),
+                failure.get('reason'), failure.get('retry_after')
+            )
+    
+    return len(due)
@@ -0,0 +1,264 @@
+"""
+Per-platform rate limit and quota tracking
+Reads usage headers from every API response, counts publishes per account
+against daily caps, and tells the poster to defer a platform before any
+media is uploaded
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from config import (
+    RATE_LIMIT_FILE, PLATFORM_DAILY_CAPS, APP_USAGE_THRESHOLD,
+    INSTAGRAM_API_BASE, THREADS_API_BASE, TIKTOK_API_BASE
+)
+
+
+# API base URLs -> platform, so one response hook serves every publisher session
+PLATFORM_API_BASES = {
+    INSTAGRAM_API_BASE: 'instagram',
+    THREADS_API_BASE: 'threads',
+    TIKTOK_API_BASE: 'tiktok',
+}
+
+# Meta usage percentages are over a rolling one-hour window
+APP_USAGE_WINDOW = timedelta(hours=1)
+
+# How long to back off after a 429 that carries no reset information
+DEFAULT_RETRY_AFTER = timedelta(minutes=15)
+
+_LOCK = threading.Lock()
+_TRACKER = None
+
+
+def parse_daily_caps(spec):
+    """
+    Parse 'instagram=25,tiktok=15' into {platform: cap}
+
+    Args:
+        spec (str): Comma-separated platform=count pairs
+
+    Returns:
+        dict: Maximum publishes per rolling 24 hours per platform
+    """
+    caps = {}
+    for part in spec.split(','):
+        if '=' not in part:
+            continue
+        platform, cap = part.split('=', 1)
+        try:
+            caps[platform.strip().lower()] = int(cap)
+        except ValueError:
+            print(f"⚠️ Ignoring invalid daily cap '{part.strip()}'")
+    return caps
+
+
+def _usage_percent(headers):
+    """
+    Highest usage percentage in Meta's X-App-Usage / X-Business-Use-Case-Usage
+
+    Returns:
+        tuple: (percent or None, minutes until access is regained or None)
+    """
+    percents = []
+    regain_minutes = None
+
+    app_usage = headers.get('x-app-usage')
+    if app_usage:
+        try:
+            usage = json.loads(app_usage)
+            percents.extend(value for value in usage.values() if isinstance(value, (int, float)))
+        except ValueError:
+            pass
+
+    business_usage = headers.get('x-business-use-case-usage')
+    if business_usage:
+        try:
+            for entries in json.loads(business_usage).values():
+                for entry in entries:
+                    percents.extend(
+                        entry.get(field, 0) for field in ('call_count', 'total_cputime', 'total_time')
+                    )
+                    regain = entry.get('estimated_time_to_regain_access') or 0
+                    if regain:
+                        regain_minutes = max(regain_minutes or 0, regain)
+        except (ValueError, AttributeError):
+            pass
+
+    return (max(percents) if percents else None), regain_minutes
+
+
+def _reset_time(value, now):
+    """Parse a reset header that is either epoch seconds or seconds from now"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    if seconds > 1e9:
+        return datetime.fromtimestamp(seconds)
+    return now + timedelta(seconds=seconds)
+
+
+class RateLimitTracker:
+    """
+    Persistent quota state per platform, shared by every publisher
+    """
+
+    def __init__(self, state_file=RATE_LIMIT_FILE, daily_caps=None, usage_threshold=APP_USAGE_THRESHOLD):
+        self.state_file = state_file
+        self.daily_caps = parse_daily_caps(PLATFORM_DAILY_CAPS) if daily_caps is None else daily_caps
+        self.usage_threshold = usage_threshold
+        self.state = self._load_state()
+
+    def _load_state(self):
+        """Load quota state from file"""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _save_state(self):
+        """Save quota state to file (caller holds the lock)"""
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(self.state_file, 'w') as f:
+                json.dump(self.state, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save rate limit state: {e}")
+
+    def _platform(self, platform):
+        """State entry for a platform (caller holds the lock)"""
+        return self.state.setdefault(platform, {'publishes': {}})
+
+    def record_response(self, platform, status_code, headers, now=None):
+        """
+        Update quota state from one API response
+
+        Args:
+            platform (str): Platform the response came from
+            status_code (int): HTTP status
+            headers (Mapping): Response headers (case-insensitive)
+        """
+        now = now or datetime.now()
+        headers = {key.lower(): value for key, value in headers.items()}
+        percent, regain_minutes = _usage_percent(headers)
+
+        blocked_until = None
+        reason = None
+        remaining = headers.get('x-ratelimit-remaining', headers.get('ratelimit-remaining'))
+        if remaining is not None and str(remaining).strip() == '0':
+            blocked_until = _reset_time(headers.get('x-ratelimit-reset', headers.get('ratelimit-reset')), now)
+            reason = "rate limit window exhausted"
+        if regain_minutes:
+            blocked_until = now + timedelta(minutes=regain_minutes)
+            reason = "Meta business use case throttled"
+        if status_code == 429:
+            blocked_until = blocked_until or _reset_time(headers.get('retry-after'), now) or now + DEFAULT_RETRY_AFTER
+            reason = "HTTP 429 Too Many Requests"
+
+        if percent is None and blocked_until is None:
+            return
+
+        with _LOCK:
+            entry = self._platform(platform)
+            if percent is not None:
+                entry['usage_percent'] = percent
+                entry['usage_at'] = now.isoformat()
+            if blocked_until is not None:
+                entry['blocked_until'] = blocked_until.isoformat()
+                entry['block_reason'] = reason
+                print(f"⏸️ {platform.capitalize()}: {reason}, holding off until {blocked_until.isoformat()[:16]}")
+            self._save_state()
+
+    def record_publish(self, platform, scope, now=None):
+        """
+        Count one successful publish against the daily cap
+
+        Args:
+            platform (str): Platform name
+            scope (str): Account the post was made from
+        """
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=1)
+        with _LOCK:
+            publishes = self._platform(platform)['publishes']
+            recent = [stamp for stamp in publishes.get(scope, []) if datetime.fromisoformat(stamp) > cutoff]
+            recent.append(now.isoformat())
+            publishes[scope] = recent
+            self._save_state()
+
+    def check(self, platform, scope, now=None):
+        """
+        Decide whether a publish may start now
+
+        Args:
+            platform (str): Platform name
+            scope (str): Account that would post
+
+        Returns:
+            tuple: (allowed, reason, retry_after datetime or None)
+        """
+        now = now or datetime.now()
+        with _LOCK:
+            entry = dict(self.state.get(platform, {}))
+            stamps = list(entry.get('publishes', {}).get(scope, []))
+
+        blocked_until = entry.get('blocked_until')
+        if blocked_until and datetime.fromisoformat(blocked_until) > now:
+            until = datetime.fromisoformat(blocked_until)
+            return False, f"{entry.get('block_reason', 'rate limited')} until {blocked_until[:16]}", until
+
+        usage_at = entry.get('usage_at')
+        if usage_at and entry.get('usage_percent', 0) >= self.usage_threshold:
+            usage_time = datetime.fromisoformat(usage_at)
+            if now - usage_time < APP_USAGE_WINDOW:
+                return False, f"app usage at {entry['usage_percent']}%", usage_time + APP_USAGE_WINDOW
+
+        cap = self.daily_caps.get(platform)
+        if cap is not None:
+            recent = sorted(
+                datetime.fromisoformat(stamp) for stamp in stamps
+                if now - datetime.fromisoformat(stamp) < timedelta(days=1)
+            )
+            if len(recent) >= cap:
+                return False, f"daily cap of {cap} posts reached", recent[-cap] + timedelta(days=1)
+
+        return True, None, None
+
+
+def get_tracker():
+    """Process-wide tracker shared by all publishers and accounts"""
+    global _TRACKER
+    with _LOCK:
+        if _TRACKER is None:
+            _TRACKER = RateLimitTracker()
+        return _TRACKER
+
+
+def _response_hook(response, *args, **kwargs):
+    """requests response hook: feed quota headers to the tracker"""
+    for base, platform in PLATFORM_API_BASES.items():
+        if response.url.startswith(base):
+            get_tracker().record_response(platform, response.status_code, response.headers)
+            break
+    return response
+
+
+def install_hooks(session):
+    """
+    Track quota headers on every response of a requests session
+
+    Args:
+        session (requests.Session): Session to instrument (idempotent)
+
+    Returns:
+        requests.Session: The same session
+    """
+    hooks = session.hooks.setdefault('response', [])
+    if _response_hook not in hooks:
+        hooks.append(_response_hook)
+    return session
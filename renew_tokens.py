@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """
-Unified token renewal script for Instagram and Threads
-Renews long-lived access tokens before they expire
+Unified token renewal script for Instagram, Threads and TikTok
+Renews long-lived access tokens (and the TikTok refresh token) before they
+expire; platforms are renewed
+concurrently and the new tokens are written to .env in one atomic step
 """
 
 import requests
@@ -9,8 +11,12 @@ import json
 import os
 import sys
 import argparse
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv
+from atomic_io import atomic_write_json
+from config import TOKEN_OUTPUT_FILE
+from token_manager import TokenManager, refresh_tiktok_token, update_env_file
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,15 +25,18 @@ load_dotenv()
 FACEBOOK_CLIENT_ID = os.getenv('FACEBOOK_CLIENT_ID')
 FACEBOOK_CLIENT_SECRET = os.getenv('FACEBOOK_CLIENT_SECRET')
 THREADS_APP_SECRET = os.getenv('THREADS_APP_SECRET')
+TIKTOK_CLIENT_KEY = os.getenv('TIKTOK_CLIENT_KEY')
+TIKTOK_CLIENT_SECRET = os.getenv('TIKTOK_CLIENT_SECRET')
 
 
-def renew_instagram_token(current_token, dry_run=False):
+def renew_instagram_token(current_token, dry_run=False, session=None):
     """
     Renew Instagram/Facebook access token (exchange for new long-lived token)
     
     Args:
         current_token (str): Current access token
         dry_run (bool): If True, simulate without making API calls
+        session (requests.Session): Shared connection pool
         
     Returns:
         dict: New token data or None if failed
@@ -46,7 +55,7 @@ def renew_instagram_token(current_token, dry_run=False):
         }
         
         print("🔄 Renewing Instagram access token...")
-        response = requests.get(url, params=params)
+        response = (session or requests).get(url, params=params)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -62,13 +71,14 @@ def renew_instagram_token(current_token, dry_run=False):
         return None
 
 
-def renew_threads_token(current_token, dry_run=False):
+def renew_threads_token(current_token, dry_run=False, session=None):
     """
     Renew Threads access token (refresh long-lived token)
     
     Args:
         current_token (str): Current access token
         dry_run (bool): If True, simulate without making API calls
+        session (requests.Session): Shared connection pool
         
     Returns:
         dict: New token data or None if failed
@@ -85,7 +95,7 @@ def renew_threads_token(current_token, dry_run=False):
         }
         
         print("🔄 Renewing Threads access token...")
-        response = requests.get(url, params=params)
+        response = (session or requests).get(url, params=params)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -101,45 +111,50 @@ def renew_threads_token(current_token, dry_run=False):
         return None
 
 
-def update_env_file(token_name, new_token, dry_run=False):
+def renew_tiktok_token(current_token, dry_run=False, session=None):
     """
-    Update .env file with new token
+    Renew the TikTok refresh token
+    
+    Access tokens only last a day and are refreshed by the publisher when it
+    posts; what has to be stored is the refresh token, which TikTok may rotate
+    on any refresh and which expires after a year
     
     Args:
-        token_name (str): Name of the token variable
-        new_token (str): New access token
-        dry_run (bool): If True, simulate without writing
+        current_token (str): Current refresh token
+        dry_run (bool): If True, simulate without making API calls
+        session (requests.Session): Shared connection pool
+        
+    Returns:
+        dict: New refresh token as access_token, with its expires_in, or None if failed
     """
     if dry_run:
-        print(f"📝 [DRY RUN] Would update {token_name} in .env")
-        return
+        print("🔄 [DRY RUN] Would renew TikTok refresh token...")
+        return {'access_token': 'DRY_RUN_TOKEN_TIKTOK', 'expires_in': 31536000}
     
-    try:
-        env_file = '.env'
-        
-        if os.path.exists(env_file):
-            with open(env_file, 'r') as f:
-                lines = f.readlines()
-        else:
-            lines = []
-        
-        updated = False
-        for i, line in enumerate(lines):
-            if line.startswith(f'{token_name}='):
-                lines[i] = f'{token_name}={new_token}\n'
-                updated = True
-                break
-        
-        if not updated:
-            lines.append(f'{token_name}={new_token}\n')
-        
-        with open(env_file, 'w') as f:
-            f.writelines(lines)
-        
-        print(f"✅ Updated {token_name} in .env file")
-        
-    except Exception as e:
-        print(f"❌ Error updating .env file: {e}")
+    if not TIKTOK_CLIENT_KEY or not TIKTOK_CLIENT_SECRET:
+        print("❌ TikTok token renewal needs TIKTOK_CLIENT_KEY and TIKTOK_CLIENT_SECRET")
+        return None
+    
+    print("🔄 Renewing TikTok refresh token...")
+    token_data = refresh_tiktok_token(TIKTOK_CLIENT_KEY, TIKTOK_CLIENT_SECRET, current_token, session)
+    if not token_data:
+        return None
+    
+    refresh_token = token_data.get('refresh_token') or current_token
+    expires_in = token_data.get('refresh_expires_in', 31536000)
+    print(f"✅ TikTok refresh token renewed{'' if refresh_token == current_token else ' (rotated)'}!")
+    print(f"   Expires in: {expires_in//86400} days")
+    return {'access_token': refresh_token, 'expires_in': expires_in}
+
+
+# Platforms one renewal pass covers: token variable and renew function.
+# A renew function takes (current_token, dry_run, session) and returns the
+# platform's token response (access_token, expires_in) or None on failure
+RENEWERS = {
+    'instagram': ('INSTAGRAM_ACCESS_TOKEN', renew_instagram_token),
+    'threads': ('THREADS_ACCESS_TOKEN', renew_threads_token),
+    'tiktok': ('TIKTOK_REFRESH_TOKEN', renew_tiktok_token),
+}
 
 
 def write_token_output(tokens, dry_run=False):
@@ -155,14 +170,13 @@ def write_token_output(tokens, dry_run=False):
         return
     
     try:
-        with open('renewed_tokens.json', 'w') as f:
-            json.dump(tokens, f)
-        print("✅ Tokens written to renewed_tokens.json")
+        atomic_write_json(TOKEN_OUTPUT_FILE, tokens, mode=0o600)
+        print(f"✅ Tokens written to {TOKEN_OUTPUT_FILE}")
     except Exception as e:
         print(f"❌ Error writing token output: {e}")
 
 
-def log_renewal(platform, token_data, dry_run=False):
+def log_renewal(platform, token_data, dry_run=False, next_renewal=None):
     """
     Log token renewal for tracking
     """
@@ -174,7 +188,7 @@ def log_renewal(platform, token_data, dry_run=False):
             'timestamp': datetime.now().isoformat(),
             'platform': platform,
             'expires_in_days': token_data.get('expires_in', 5184000) // 86400,
-            'next_renewal_date': (datetime.now() + timedelta(days=50)).isoformat()
+            'next_renewal_date': next_renewal.isoformat() if next_renewal else None
         }
         
         with open('token_renewals.log', 'a') as f:
@@ -184,52 +198,105 @@ def log_renewal(platform, token_data, dry_run=False):
         print(f"⚠️ Could not log renewal: {e}")
 
 
+def renewal_due(manager, platform, token, force=False, dry_run=False):
+    """
+    Decide whether a token should be renewed in this run
+    
+    Args:
+        manager (TokenManager): Token expiry state
+        platform (str): Platform name (a key of RENEWERS)
+        token (str): Current access token
+        force (bool): Renew regardless of the expiry
+        dry_run (bool): Skip the debug_token check
+        
+    Returns:
+        bool: True if the token should be renewed
+    """
+    if force or dry_run:
+        return True
+    
+    renew, reason = manager.needs_renewal(platform, token)
+    if renew:
+        print(f"🔑 {platform.capitalize()} token: {reason}, renewing")
+    else:
+        print(f"✅ {platform.capitalize()} token: {reason}, skipping")
+    return renew
+
+
+def renew_platform(platform, manager, session, force=False, dry_run=False):
+    """
+    Check one platform's token and renew it if it is due
+    
+    Returns:
+        dict: Token response if renewed, None if nothing was due, False if renewal failed
+    """
+    token_name, renew = RENEWERS[platform]
+    current_token = os.getenv(token_name)
+    if not current_token:
+        print(f"⚠️ No {token_name} found, skipping")
+        return None
+    if not renewal_due(manager, platform, current_token, force, dry_run):
+        return None
+    
+    token_data = renew(current_token, dry_run, session)
+    if not token_data:
+        return False
+    if not dry_run:
+        manager.record_renewal(platform, token_data['access_token'], token_data.get('expires_in'))
+    return token_data
+
+
 def main():
-    parser = argparse.ArgumentParser(description='Renew Instagram and Threads access tokens')
+    parser = argparse.ArgumentParser(description='Renew platform access tokens')
     parser.add_argument('--dry-run', action='store_true', help='Simulate renewal without making API calls')
     parser.add_argument('--instagram-only', action='store_true', help='Only renew Instagram token')
     parser.add_argument('--threads-only', action='store_true', help='Only renew Threads token')
+    parser.add_argument('--platforms', help=f"Comma-separated platforms to renew (default: {','.join(RENEWERS)})")
+    parser.add_argument('--force', action='store_true', help='Renew even if the token is not close to expiring')
     args = parser.parse_args()
     
     dry_run = args.dry_run
+    if args.instagram_only:
+        platforms = ['instagram']
+    elif args.threads_only:
+        platforms = ['threads']
+    elif args.platforms:
+        platforms = [name.strip() for name in args.platforms.split(',') if name.strip()]
+    else:
+        platforms = list(RENEWERS)
+    
+    unknown = [name for name in platforms if name not in RENEWERS]
+    if unknown:
+        parser.error(f"Unknown platform(s): {', '.join(unknown)}")
     
     print(f"🚀 Token Renewal - {datetime.now()}")
     if dry_run:
         print("⚠️  DRY RUN MODE - No actual changes will be made")
     print("=" * 50)
     
-    renewed_tokens = {}
-    
-    # Renew Instagram token
-    if not args.threads_only:
-        instagram_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
-        if instagram_token:
-            token_data = renew_instagram_token(instagram_token, dry_run)
-            if token_data:
-                new_token = token_data['access_token']
-                update_env_file('INSTAGRAM_ACCESS_TOKEN', new_token, dry_run)
-                log_renewal('instagram', token_data, dry_run)
-                renewed_tokens['INSTAGRAM_ACCESS_TOKEN'] = new_token
-        else:
-            print("⚠️ No INSTAGRAM_ACCESS_TOKEN found, skipping")
-    
-    print()
+    # Platforms are checked and renewed concurrently over one connection pool;
+    # the results are applied together once all of them finished
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+        manager = TokenManager(session=session)
+        futures = {
+            platform: executor.submit(renew_platform, platform, manager, session, args.force, dry_run)
+            for platform in platforms
+        }
+        outcomes = {platform: future.result() for platform, future in futures.items()}
     
-    # Renew Threads token
-    if not args.instagram_only:
-        threads_token = os.getenv('THREADS_ACCESS_TOKEN')
-        if threads_token:
-            token_data = renew_threads_token(threads_token, dry_run)
-            if token_data:
-                new_token = token_data['access_token']
-                update_env_file('THREADS_ACCESS_TOKEN', new_token, dry_run)
-                log_renewal('threads', token_data, dry_run)
-                renewed_tokens['THREADS_ACCESS_TOKEN'] = new_token
-        else:
-            print("⚠️ No THREADS_ACCESS_TOKEN found, skipping")
+    renewed_tokens = {}
+    failed = []
+    for platform, token_data in outcomes.items():
+        token_name = RENEWERS[platform][0]
+        if token_data is False:
+            failed.append(token_name)
+        elif token_data:
+            renewed_tokens[token_name] = token_data['access_token']
+            log_renewal(platform, token_data, dry_run, manager.renewal_due_at(platform, token_data['access_token']))
     
-    # Write output for GitHub Actions
-    if renewed_tokens and not dry_run:
+    if renewed_tokens:
+        update_env_file(renewed_tokens, dry_run)
+        # Output for GitHub Actions
         write_token_output(renewed_tokens, dry_run)
     
     print()
@@ -239,9 +306,11 @@ def main():
         for name in renewed_tokens:
             print(f"   ✅ {name}")
     else:
-        print("⚠️ No tokens were renewed")
+        print("ℹ️ No tokens were renewed")
+    for name in failed:
+        print(f"   ❌ {name} renewal failed")
     
-    return 0 if renewed_tokens else 1
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+"""
+Slot-based posting scheduler
+Assigns queue items to concrete future slots (weekly slot times, per-platform
+cadence, per-day caps, quiet hours) and stores the plan so a frequent trigger
+only posts what is due
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from config import (
+    POSTING_PLAN_FILE, POSTING_SLOTS, PLATFORM_MIN_GAP_HOURS, MAX_POSTS_PER_DAY,
+    QUIET_HOURS, PLAN_HORIZON_DAYS, SLOT_EXPIRY_HOURS, SELECTION_POLICY
+)
+from caption_renderer import PLATFORMS
+from selection_policies import UnpostedIndex, get_policy
+
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Slot states in the plan file
+SLOT_PLANNED = 'planned'
+SLOT_POSTED = 'posted'
+SLOT_MISSED = 'missed'
+SLOT_SKIPPED = 'skipped'
+
+# Finished slots are kept this long so the plan stays inspectable
+PLAN_HISTORY_DAYS = 14
+
+
+def parse_weekly_slots(spec):
+    """
+    Parse 'mon 22:00, tue 19:30' into sorted (weekday, hour, minute) tuples
+
+    Args:
+        spec (str): Comma-separated weekday and HH:MM pairs ('daily' for every day)
+
+    Returns:
+        list: (weekday index, hour, minute) tuples
+    """
+    slots = set()
+    for part in spec.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        try:
+            day, clock = part.split()
+            hour, minute = (int(value) for value in clock.split(':'))
+            days = range(7) if day == 'daily' else [WEEKDAYS.index(day[:3])]
+        except ValueError:
+            print(f"⚠️ Ignoring invalid posting slot '{part}'")
+            continue
+        for weekday in days:
+            slots.add((weekday, hour, minute))
+    return sorted(slots)
+
+
+def parse_platform_gaps(spec):
+    """
+    Parse 'tiktok=24,tumblr=12' into {platform: timedelta}
+
+    Args:
+        spec (str): Comma-separated platform=hours pairs
+
+    Returns:
+        dict: Minimum gap between posts per platform
+    """
+    gaps = {}
+    for part in spec.split(','):
+        if '=' not in part:
+            continue
+        platform, hours = part.split('=', 1)
+        try:
+            gaps[platform.strip().lower()] = timedelta(hours=float(hours))
+        except ValueError:
+            print(f"⚠️ Ignoring invalid platform gap '{part.strip()}'")
+    return gaps
+
+
+def parse_quiet_hours(spec):
+    """
+    Parse '01-07' into (start hour, end hour), or None when disabled
+
+    Args:
+        spec (str): Hour range; wraps past midnight when start > end
+    """
+    if not spec:
+        return None
+    try:
+        start, end = (int(value) for value in spec.split('-'))
+        return start, end
+    except ValueError:
+        print(f"⚠️ Ignoring invalid quiet hours '{spec}'")
+        return None
+
+
+def in_quiet_hours(moment, quiet_hours):
+    """Check whether a datetime falls inside the quiet hour range"""
+    if not quiet_hours:
+        return False
+    start, end = quiet_hours
+    if start <= end:
+        return start <= moment.hour < end
+    return moment.hour >= start or moment.hour < end
+
+
+class PostingScheduler:
+    """
+    Builds and keeps the posting plan for a content queue
+    """
+
+    def __init__(self, queue, plan_file=POSTING_PLAN_FILE, posting_slots=POSTING_SLOTS, selection_policy=SELECTION_POLICY):
+        self.queue = queue
+        self.plan_file = plan_file
+        self.selection_policy = selection_policy
+        self.weekly_slots = parse_weekly_slots(posting_slots)
+        self.platform_gaps = parse_platform_gaps(PLATFORM_MIN_GAP_HOURS)
+        self.quiet_hours = parse_quiet_hours(QUIET_HOURS)
+        self.max_per_day = MAX_POSTS_PER_DAY
+        self.horizon = timedelta(days=PLAN_HORIZON_DAYS)
+        self.expiry = timedelta(hours=SLOT_EXPIRY_HOURS)
+        self.slots = self._load_plan()
+
+    def _load_plan(self):
+        """Load planned slots from file"""
+        if os.path.exists(self.plan_file):
+            try:
+                with open(self.plan_file, 'r') as f:
+                    return json.load(f).get('slots', [])
+            except (json.JSONDecodeError, FileNotFoundError):
+                return []
+        return []
+
+    def _save_plan(self):
+        """Save the plan with readable Unicode characters"""
+        os.makedirs(os.path.dirname(self.plan_file), exist_ok=True)
+        with open(self.plan_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(),
+                'slots': self.slots
+            }, f, indent=2, ensure_ascii=False)
+
+    def candidate_slots(self, start, end):
+        """
+        Slot times between start and end from the weekly slots
+
+        Args:
+            start (datetime): First moment to consider
+            end (datetime): Last moment to consider
+
+        Returns:
+            list: Slot datetimes outside quiet hours
+        """
+        times = []
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= end:
+            for weekday, hour, minute in self.weekly_slots:
+                if weekday != day.weekday():
+                    continue
+                moment = day.replace(hour=hour, minute=minute)
+                if start <= moment <= end and not in_quiet_hours(moment, self.quiet_hours):
+                    times.append(moment)
+            day += timedelta(days=1)
+        return times
+
+    def _platforms_for(self, moment, last_post):
+        """Platforms whose cadence allows a post at this moment"""
+        platforms = []
+        for platform in PLATFORMS:
+            gap = self.platform_gaps.get(platform)
+            previous = last_post.get(platform)
+            if gap is None or previous is None or abs(moment - previous) >= gap:
+                platforms.append(platform)
+        return platforms
+
+    def refresh(self, now=None):
+        """
+        Expire stale slots and fill free slots up to the planning horizon
+
+        Args:
+            now (datetime): Current time (for simulations)
+
+        Returns:
+            list: All slots in the plan
+        """
+        now = now or datetime.now()
+        items = {item['id']: item for item in self.queue.queue}
+
+        # Expire slots that were never posted, and drop old history
+        kept = []
+        for entry in self.slots:
+            slot_time = datetime.fromisoformat(entry['slot'])
+            if entry['status'] == SLOT_PLANNED:
+                item = items.get(entry['content_id'])
+                if item is None or item['posted']:
+                    entry['status'] = SLOT_SKIPPED
+                elif now - slot_time > self.expiry:
+                    entry['status'] = SLOT_MISSED
+                    print(f"⌛ Missed slot {entry['slot'][:16]} for {entry['filename']}")
+            if entry['status'] == SLOT_PLANNED or now - slot_time < timedelta(days=PLAN_HISTORY_DAYS):
+                kept.append(entry)
+        self.slots = kept
+
+        planned_ids = {entry['content_id'] for entry in self.slots if entry['status'] == SLOT_PLANNED}
+        taken_times = {entry['slot'] for entry in self.slots if entry['status'] != SLOT_MISSED}
+        posts_per_day = {}
+        last_post = {}
+        for entry in self.slots:
+            if entry['status'] in (SLOT_PLANNED, SLOT_POSTED):
+                slot_time = datetime.fromisoformat(entry['slot'])
+                posts_per_day[slot_time.date()] = posts_per_day.get(slot_time.date(), 0) + 1
+                for platform in entry['platforms']:
+                    if last_post.get(platform) is None or slot_time > last_post[platform]:
+                        last_post[platform] = slot_time
+
+        # Items already planned are taken out of a scratch index before picking
+        positions = {item['id']: position for position, item in enumerate(self.queue.queue)}
+        index = UnpostedIndex(self.queue.queue)
+        for content_id in planned_ids:
+            index.remove(positions[content_id])
+        policy = get_policy(self.selection_policy)
+
+        added = 0
+        for moment in self.candidate_slots(now, now + self.horizon):
+            if moment.isoformat() in taken_times or not index.count():
+                continue
+            if posts_per_day.get(moment.date(), 0) >= self.max_per_day:
+                continue
+            platforms = self._platforms_for(moment, last_post)
+            if not platforms:
+                continue
+
+            item = policy.select(index)
+            index.remove(positions[item['id']])
+            # TikTok only takes videos, so an image slot does not use up its cadence
+            if item['media_type'] != 'video' and 'tiktok' in platforms and len(platforms) > 1:
+                platforms.remove('tiktok')
+            self.slots.append({
+                'slot': moment.isoformat(),
+                'content_id': item['id'],
+                'filename': item['filename'],
+                'media_type': item['media_type'],
+                'platforms': platforms,
+                'status': SLOT_PLANNED
+            })
+            posts_per_day[moment.date()] = posts_per_day.get(moment.date(), 0) + 1
+            for platform in platforms:
+                last_post[platform] = moment
+            added += 1
+
+        self.slots.sort(key=lambda entry: entry['slot'])
+        self._save_plan()
+        if added:
+            print(f"🗓️ Planned {added} new slot(s) up to {(now + self.horizon).date()}")
+        return self.slots
+
+    def get_due(self, now=None):
+        """
+        Get the earliest planned slot whose time has come
+
+        Args:
+            now (datetime): Current time (for simulations)
+
+        Returns:
+            dict: Plan entry, or None if nothing is due
+        """
+        now = now or datetime.now()
+        for entry in self.slots:
+            if entry['status'] == SLOT_PLANNED and datetime.fromisoformat(entry['slot']) <= now:
+                return entry
+        return None
+
+    def upcoming(self):
+        """Planned slots that have not been posted yet"""
+        return [entry for entry in self.slots if entry['status'] == SLOT_PLANNED]
+
+    def mark_posted(self, content_id):
+        """
+        Mark the planned slot(s) of a content item as posted
+
+        Args:
+            content_id (int): ID of the content item that was posted
+        """
+        for entry in self.slots:
+            if entry['content_id'] == content_id and entry['status'] == SLOT_PLANNED:
+                entry['status'] = SLOT_POSTED
+                entry['posted_at'] = datetime.now().isoformat()
+        self._save_plan()
@@ -0,0 +1,381 @@
+"""
+Selection policies for picking the next item to post
+Backed by an incremental index of unposted items. Building it is one O(n)
+pass over the queue (about the cost of the old list-building pick); after
+that every pick is O(log n), which pays off in the daemon and in simulations
+"""
+
+import random
+from collections import deque
+from datetime import datetime
+
+
+# Timestamps are whole seconds since this epoch, so tree sums stay exact integers
+_EPOCH = datetime(2024, 1, 1).timestamp()
+
+# Every item gets at least this much age (seconds) so brand new items can still be picked
+AGING_FLOOR_SECONDS = 3600
+
+# How many recently posted items the diversity and round-robin policies look at
+RECENT_HISTORY = 10
+
+# Candidates drawn by the diversity policy before scoring them
+DIVERSITY_CANDIDATES = 8
+
+
+def _now_timestamp(now=None):
+    """Seconds since _EPOCH for now"""
+    return int((now or datetime.now()).timestamp() - _EPOCH)
+
+
+def _added_timestamp(item, now):
+    """
+    Seconds since _EPOCH at which the item was added to the queue
+
+    An added_date in the future (clock skew, another timezone) is clamped to
+    now, so no item ever gets a negative age weight
+    """
+    try:
+        stamp = int(datetime.fromisoformat(item['added_date']).timestamp() - _EPOCH)
+    except (KeyError, TypeError, ValueError):
+        return 0
+    return min(stamp, now)
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over a fixed number of slots
+    Point updates and prefix sums in O(log n)
+    """
+
+    def __init__(self, values):
+        # Linear-time build: push each node's total up to its parent
+        self.size = len(values)
+        self.tree = [0] + list(values)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def append(self, value):
+        """Grow by one slot holding value, in O(log n)"""
+        self.size += 1
+        i = self.size
+        # Node i covers the slots (i - lowbit(i), i]
+        self.tree.append(value + self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i)))
+
+    def add(self, position, delta):
+        """Add delta to the value at 0-based position"""
+        i = position + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count):
+        """Sum of the first count values"""
+        total = 0
+        i = count
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class UnpostedIndex:
+    """
+    Index of unposted queue items by queue position
+
+    Keeps two Fenwick trees (unposted count and sum of added timestamps) so
+    FIFO, uniform and age-weighted picks are all O(log n). The index is kept
+    per media type as well for round-robin selection, and remembers which
+    unposted items have a posting in progress so a resume needs no scan.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self._build()
+
+    def _build(self):
+        """Build the trees from the queue in O(n); appended items grow them"""
+        counts = [0] * len(self.queue)
+        # Kept per position so remove() subtracts exactly what was added
+        stamps = self.position_stamps = [0] * len(self.queue)
+        self.newest_stamp = now = _now_timestamp()
+        self.by_type = {}
+        self.in_progress = set()
+        posted = []
+
+        for position, item in enumerate(self.queue):
+            if item.get('posted'):
+                if item.get('posted_date'):
+                    posted.append((item['posted_date'], position))
+                continue
+            counts[position] = 1
+            stamps[position] = _added_timestamp(item, now)
+            if item.get('platform_progress'):
+                self.in_progress.add(position)
+            self.by_type.setdefault(item.get('media_type'), set()).add(position)
+
+        self.counts = FenwickTree(counts)
+        self.stamps = FenwickTree(stamps)
+        # Per-type trees are only needed for round-robin picks; built on first use
+        self.type_trees = {}
+
+        self.total = sum(counts)
+        self.recent = deque(
+            (self.queue[position] for _, position in sorted(posted)[-RECENT_HISTORY:]),
+            maxlen=RECENT_HISTORY
+        )
+
+    def _grow(self, size):
+        """Append empty slots until the trees cover size positions"""
+        while self.counts.size < size:
+            self.counts.append(0)
+            self.stamps.append(0)
+            self.position_stamps.append(0)
+            for type_counts, type_stamps in self.type_trees.values():
+                type_counts.append(0)
+                type_stamps.append(0)
+
+    def add(self, position):
+        """Index a newly appended unposted item"""
+        self._grow(position + 1)
+        item = self.queue[position]
+        stamp = _added_timestamp(item, _now_timestamp())
+        media_type = item.get('media_type')
+        self.position_stamps[position] = stamp
+        self.newest_stamp = max(self.newest_stamp, stamp)
+
+        self.counts.add(position, 1)
+        self.stamps.add(position, stamp)
+        self.total += 1
+
+        self.by_type.setdefault(media_type, set()).add(position)
+        if media_type in self.type_trees:
+            type_counts, type_stamps = self.type_trees[media_type]
+            type_counts.add(position, 1)
+            type_stamps.add(position, stamp)
+
+    def remove(self, position):
+        """Drop an item that was just posted"""
+        item = self.queue[position]
+        media_type = item.get('media_type')
+        self.in_progress.discard(position)
+        if position not in self.by_type.get(media_type, ()):
+            return
+        stamp = self.position_stamps[position]
+
+        self.counts.add(position, -1)
+        self.stamps.add(position, -stamp)
+        self.total -= 1
+
+        if media_type in self.type_trees:
+            type_counts, type_stamps = self.type_trees[media_type]
+            type_counts.add(position, -1)
+            type_stamps.add(position, -stamp)
+        self.by_type[media_type].discard(position)
+        self.recent.append(item)
+
+    def mark_in_progress(self, position):
+        """Remember that posting of an unposted item has started"""
+        if position in self.by_type.get(self.queue[position].get('media_type'), ()):
+            self.in_progress.add(position)
+
+    def first_in_progress(self):
+        """
+        Earliest unposted item whose posting was started
+
+        Returns:
+            dict: Queue item, or None
+        """
+        return self.queue[min(self.in_progress)] if self.in_progress else None
+
+    def _trees(self, media_type=None):
+        """Count and timestamp trees for all items or one media type"""
+        if media_type is None:
+            return self.counts, self.stamps
+        if media_type not in self.type_trees:
+            type_counts = [0] * self.counts.size
+            type_stamps = [0] * self.counts.size
+            for position in self.by_type.get(media_type, ()):
+                type_counts[position] = 1
+                type_stamps[position] = self.position_stamps[position]
+            self.type_trees[media_type] = (FenwickTree(type_counts), FenwickTree(type_stamps))
+        return self.type_trees[media_type]
+
+    def count(self, media_type=None):
+        """Number of unposted items (of a media type)"""
+        if media_type is None:
+            return self.total
+        return len(self.by_type.get(media_type, ()))
+
+    def media_types(self):
+        """Media types that still have unposted items"""
+        return [media_type for media_type, positions in self.by_type.items() if positions]
+
+    def _descend(self, target, weight, media_type=None):
+        """
+        Walk the trees to the first position whose prefix weight exceeds target
+
+        Args:
+            target (int): Value in [0, total weight)
+            weight (callable): weight(count, stamp_sum) of a tree node
+            media_type (str): Walk the trees of this media type only
+        """
+        counts, stamps = self._trees(media_type)
+        position = 0
+        step = 1 << counts.size.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= counts.size:
+                node_weight = weight(counts.tree[nxt], stamps.tree[nxt])
+                if node_weight <= target:
+                    position = nxt
+                    target -= node_weight
+            step >>= 1
+        return position
+
+    def kth(self, k, media_type=None):
+        """Item at the k-th (0-based) unposted position"""
+        position = self._descend(k, lambda count, stamp_sum: count, media_type)
+        return self.queue[position]
+
+    def weighted_by_age(self, rng, now=None, media_type=None):
+        """
+        Sample an item with probability proportional to its age
+
+        The weight of a set of items is count * now - sum(added), so both
+        trees are walked together without storing time-dependent weights.
+        now is never earlier than the newest indexed stamp, so every item
+        weighs at least AGING_FLOOR_SECONDS.
+        """
+        now = max(_now_timestamp(now), self.newest_stamp) + AGING_FLOOR_SECONDS
+        counts, stamps = self._trees(media_type)
+        total_weight = counts.prefix_sum(counts.size) * now - stamps.prefix_sum(stamps.size)
+        position = self._descend(
+            rng.randrange(total_weight),
+            lambda count, stamp_sum: count * now - stamp_sum,
+            media_type
+        )
+        return self.queue[position]
+
+
+class SelectionPolicy:
+    """
+    Base class for selection policies
+    """
+
+    name = None
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def select(self, index, media_type=None):
+        """
+        Pick the next item to post
+
+        Args:
+            index (UnpostedIndex): Index of unposted items (must not be empty)
+            media_type (str): Only pick items of this media type
+
+        Returns:
+            dict: Selected queue item
+        """
+        raise NotImplementedError
+
+
+class RandomPolicy(SelectionPolicy):
+    """Uniform random pick (the original behaviour)"""
+
+    name = 'random'
+
+    def select(self, index, media_type=None):
+        return index.kth(self.rng.randrange(index.count(media_type)), media_type)
+
+
+class FifoPolicy(SelectionPolicy):
+    """Oldest unposted item first"""
+
+    name = 'fifo'
+
+    def select(self, index, media_type=None):
+        return index.kth(0, media_type)
+
+
+class AgingPolicy(SelectionPolicy):
+    """Random pick weighted by time in the queue, so old items cannot starve"""
+
+    name = 'aging'
+
+    def select(self, index, media_type=None):
+        return index.weighted_by_age(self.rng, media_type=media_type)
+
+
+class RoundRobinPolicy(SelectionPolicy):
+    """Alternate media types, picking by age within the chosen type"""
+
+    name = 'round_robin'
+
+    def select(self, index, media_type=None):
+        types = sorted(index.media_types(), key=str)
+        if media_type is None and len(types) > 1:
+            last_type = index.recent[-1].get('media_type') if index.recent else None
+            if last_type in types:
+                media_type = types[(types.index(last_type) + 1) % len(types)]
+            else:
+                media_type = types[0]
+        return index.weighted_by_age(self.rng, media_type=media_type)
+
+
+class DiversityPolicy(SelectionPolicy):
+    """
+    Draw a few age-weighted candidates and keep the one sharing the fewest
+    hashtags and kaomojis with recently posted items
+    """
+
+    name = 'diversity'
+
+    def select(self, index, media_type=None):
+        recent_tags = set()
+        recent_kaomojis = set()
+        for item in index.recent:
+            recent_tags.update(tag.lower() for tag in item.get('hashtags') or [])
+            if item.get('kaomoji'):
+                recent_kaomojis.add(item['kaomoji'])
+
+        best = None
+        best_score = None
+        for _ in range(min(DIVERSITY_CANDIDATES, index.count(media_type))):
+            candidate = index.weighted_by_age(self.rng, media_type=media_type)
+            score = len(recent_tags.intersection(tag.lower() for tag in candidate.get('hashtags') or []))
+            if candidate.get('kaomoji') in recent_kaomojis:
+                score += 2
+            if best_score is None or score < best_score:
+                best, best_score = candidate, score
+            if score == 0:
+                break
+        return best
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (RandomPolicy, FifoPolicy, AgingPolicy, RoundRobinPolicy, DiversityPolicy)
+}
+
+
+def get_policy(name, rng=None):
+    """
+    Create a selection policy by name
+
+    Args:
+        name (str): One of POLICIES (unknown names fall back to 'aging')
+        rng (random.Random): Random source, for reproducible simulations
+
+    Returns:
+        SelectionPolicy: Policy instance
+    """
+    policy_class = POLICIES.get(name)
+    if policy_class is None:
+        print(f"⚠️ Unknown selection policy '{name}', using aging")
+        policy_class = AgingPolicy
+    return policy_class(rng)
@@ -0,0 +1,207 @@
+"""
+Structured output parsing for LLM responses
+Extracts, repairs and validates the JSON object returned by the caption model
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from config import CAPTION_METRICS_FILE
+
+
+# Fields the caption model must return as non-empty strings
+REQUIRED_TEXT_FIELDS = ('kaomoji', 'fun_fact', 'fun_fact_followup')
+
+# Optional hashtag lists (2 entries each are kept)
+HASHTAG_FIELDS = ('niche_hashtags', 'broad_hashtags')
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+
+
+def strip_code_fences(text):
+    """
+    Remove markdown code fences around a model response
+
+    Args:
+        text (str): Raw model response
+
+    Returns:
+        str: Content of the first fenced block, or the stripped text if none
+    """
+    match = _FENCE_PATTERN.search(text)
+    if match:
+        return match.group(1).strip()
+    return text.strip()
+
+
+def _scan_for_object(text):
+    """Return the first JSON object found anywhere in text, or None"""
+    decoder = json.JSONDecoder()
+    start = text.find('{')
+
+    while start != -1:
+        try:
+            obj, _ = decoder.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find('{', start + 1)
+
+    return None
+
+
+def _repair(text):
+    """Apply cheap textual repairs for the most common model mistakes"""
+    repaired = text.translate(_SMART_QUOTES)
+    repaired = _TRAILING_COMMA_PATTERN.sub(r'\1', repaired)
+    return repaired
+
+
+def extract_json_object(text):
+    """
+    Extract a JSON object from a model response, repairing it if needed
+
+    Tries, in order: the raw text, the fenced block, a scan for the first
+    embedded object, and the same scan after textual repairs.
+
+    Args:
+        text (str): Raw model response
+
+    Returns:
+        tuple: (dict, method) where method is 'direct', 'fenced', 'scanned'
+               or 'repaired', or (None, None) if nothing could be parsed
+    """
+    if not text:
+        return None, None
+
+    try:
+        obj = json.loads(text.strip())
+        if isinstance(obj, dict):
+            return obj, 'direct'
+    except json.JSONDecodeError:
+        pass
+
+    unfenced = strip_code_fences(text)
+    try:
+        obj = json.loads(unfenced)
+        if isinstance(obj, dict):
+            return obj, 'fenced'
+    except json.JSONDecodeError:
+        pass
+
+    obj = _scan_for_object(unfenced)
+    if obj is not None:
+        return obj, 'scanned'
+
+    obj = _scan_for_object(_repair(unfenced))
+    if obj is not None:
+        return obj, 'repaired'
+
+    return None, None
+
+
+def validate_caption_payload(obj):
+    """
+    Validate and normalise a parsed caption payload
+
+    Args:
+        obj (dict): Parsed JSON object from the model
+
+    Returns:
+        tuple: (payload, errors) - payload is None when errors is non-empty
+    """
+    errors = []
+    payload = {}
+
+    for field in REQUIRED_TEXT_FIELDS:
+        value = obj.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"'{field}' must be a non-empty string")
+        else:
+            payload[field] = value.strip()
+
+    for field in HASHTAG_FIELDS:
+        value = obj.get(field, [])
+        if isinstance(value, str):
+            value = value.replace(',', ' ').split()
+        if not isinstance(value, list):
+            errors.append(f"'{field}' must be a list of strings")
+            continue
+        tags = [str(tag).strip().lstrip('#') for tag in value if str(tag).strip().lstrip('#')]
+        payload[field] = [tag.replace(' ', '') for tag in tags][:2]
+
+    if errors:
+        return None, errors
+
+    payload['hashtags'] = payload['niche_hashtags'] + payload['broad_hashtags']
+    return payload, []
+
+
+class ParseMetrics:
+    """
+    Per-model parse-success counters persisted between runs
+    """
+
+    def __init__(self, metrics_file=CAPTION_METRICS_FILE):
+        self.metrics_file = metrics_file
+        self.metrics = self._load()
+
+    def _load(self):
+        """Load metrics from file or start empty"""
+        if os.path.exists(self.metrics_file):
+            try:
+                with open(self.metrics_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _save(self):
+        """Save metrics to file"""
+        os.makedirs(os.path.dirname(self.metrics_file), exist_ok=True)
+        with open(self.metrics_file, 'w') as f:
+            json.dump(self.metrics, f, indent=2)
+
+    def record(self, model_id, method, attempts):
+        """
+        Record the outcome of one structured-output request
+
+        Args:
+            model_id (str): Model that produced the response
+            method (str): Extraction method that succeeded, or None on failure
+            attempts (int): Number of model calls used (1 = no re-ask)
+        """
+        stats = self.metrics.setdefault(model_id, {
+            'requests': 0,
+            'model_calls': 0,
+            'parsed': 0,
+            'failed': 0,
+            'first_attempt_success': 0,
+            'methods': {}
+        })
+
+        stats['requests'] += 1
+        stats['model_calls'] += attempts
+        if method:
+            stats['parsed'] += 1
+            stats['methods'][method] = stats['methods'].get(method, 0) + 1
+            if attempts == 1:
+                stats['first_attempt_success'] += 1
+        else:
+            stats['failed'] += 1
+
+        stats['success_rate'] = round(stats['parsed'] / stats['requests'], 4)
+        stats['last_updated'] = datetime.now().isoformat()
+
+        try:
+            self._save()
+        except OSError as e:
+            print(f"⚠️ Could not save parse metrics: {e}")
+
+    def get(self, model_id):
+        """Get the stored counters for a model (empty dict if unknown)"""
+        return self.metrics.get(model_id, {})
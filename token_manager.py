@@ -0,0 +1,456 @@
+"""
+Access token expiry tracking
+Records when Instagram and Threads tokens actually expire (from expires_in at
+renewal and from debug_token checks), tells the renewal job whether a token
+is inside its renewal window, and lets the poster check a token before any
+media is uploaded. Short-lived TikTok access tokens are refreshed in process
+from the refresh token (TikTokTokenProvider)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from config import (
+    TOKEN_STATE_FILE, TOKEN_RENEW_WINDOW_DAYS, TOKEN_CHECK_HOURS, TOKEN_MIN_VALID_HOURS,
+    TIKTOK_TOKEN_MARGIN_MINUTES, INSTAGRAM_API_BASE, THREADS_API_BASE, TIKTOK_API_BASE,
+    ENV_FILE, TOKEN_OUTPUT_FILE
+)
+from atomic_io import atomic_write_json, atomic_write_text, file_lock
+from identity_cache import is_auth_error
+from tracing import span
+
+
+# Platforms whose long-lived tokens expire and are renewed by renew_tokens.py
+TOKEN_CREDENTIALS = {
+    'instagram': 'INSTAGRAM_ACCESS_TOKEN',
+    'threads': 'THREADS_ACCESS_TOKEN',
+}
+
+_LOCK = threading.Lock()
+_MANAGER = None
+
+
+def _fingerprint(token):
+    """Hash the token so it never lands in the state file"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+
+class TokenManager:
+    """
+    Persistent expiry and validity state per token
+    """
+
+    def __init__(self, state_file=TOKEN_STATE_FILE, renew_window_days=TOKEN_RENEW_WINDOW_DAYS,
+                 check_hours=TOKEN_CHECK_HOURS, min_valid_hours=TOKEN_MIN_VALID_HOURS, session=None):
+        self.state_file = state_file
+        self.renew_window = timedelta(days=renew_window_days)
+        self.check_interval = timedelta(hours=check_hours)
+        self.min_valid = timedelta(hours=min_valid_hours)
+        self.session = session
+        self.state = self._load_state()
+
+    def _load_state(self):
+        """Load token state from file"""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    def _save_state(self):
+        """Save token state to file (caller holds the lock)"""
+        try:
+            atomic_write_json(self.state_file, self.state, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save token state: {e}")
+
+    def _key(self, platform, token):
+        return f"{platform}:{_fingerprint(token)}"
+
+    def _update(self, platform, token, **fields):
+        """Merge fields into a token's entry and save"""
+        with _LOCK:
+            entry = self.state.setdefault(self._key(platform, token), {'platform': platform})
+            entry.update(fields)
+            self._save_state()
+            return dict(entry)
+
+    def record_renewal(self, platform, token, expires_in, now=None):
+        """
+        Record a freshly issued token
+
+        Args:
+            platform (str): 'instagram', 'threads' or 'tiktok'
+            token (str): New access token (the refresh token for TikTok)
+            expires_in (int): Seconds until it expires, from the renewal response
+        """
+        now = now or datetime.now()
+        self._update(
+            platform, token,
+            expires_at=(now + timedelta(seconds=int(expires_in))).isoformat() if expires_in else None,
+            renewed_at=now.isoformat(),
+            checked_at=now.isoformat(),
+            valid=True,
+            error=None
+        )
+
+    def mark_invalid(self, platform, token, error):
+        """
+        Record that the API rejected a token (OAuth error 190)
+
+        Args:
+            platform (str): Platform name
+            token (str): Rejected access token
+            error (str): Error message from the API
+        """
+        if token:
+            self._update(platform, token, valid=False, error=str(error)[:200], checked_at=datetime.now().isoformat())
+
+    def _inspect(self, platform, token):
+        """
+        Ask the platform about a token (one cheap request)
+
+        Returns:
+            dict: valid, expires_at (None if unknown or never) and error;
+                  None if the check itself could not be made or failed for
+                  another reason than a rejected token (rate limit, outage)
+        """
+        import requests
+
+        session = self.session or requests
+        try:
+            with span(f"{platform}.token_check", 'auth'):
+                return self._inspect_request(session, platform, token)
+        except Exception as e:
+            print(f"⚠️ Could not check {platform} token: {e}")
+            return None
+
+    def _inspect_request(self, session, platform, token):
+        """The debug_token (Instagram) or /me (Threads) request behind _inspect"""
+        if platform == 'instagram':
+            # A user token may inspect itself, so no app secret is needed here
+            data = session.get(f"{INSTAGRAM_API_BASE}/debug_token", params={
+                'input_token': token, 'access_token': token
+            }).json()
+            if 'data' not in data:
+                return self._check_failed(platform, data)
+            info = data['data']
+            expires_at = info.get('expires_at') or info.get('data_access_expires_at')
+            return {
+                'valid': bool(info.get('is_valid')),
+                'expires_at': datetime.fromtimestamp(expires_at).isoformat() if expires_at else None,
+                'error': (info.get('error') or {}).get('message')
+            }
+
+        if platform == 'threads':
+            # Threads has no debug_token; a /me call shows whether the token still works
+            data = session.get(f"{THREADS_API_BASE}/me", params={'fields': 'id', 'access_token': token}).json()
+            if 'id' in data:
+                return {'valid': True, 'error': None}
+            return self._check_failed(platform, data)
+
+        # No cheap check (TikTok refresh tokens): rely on the recorded expiry
+        return None
+
+    def _check_failed(self, platform, data):
+        """
+        Interpret an error answer to a token check
+
+        Only an OAuth error (190/102) means the token is bad; anything else
+        (throttling, a transient error) leaves the stored state as it is
+        """
+        if is_auth_error(data):
+            return {'valid': False, 'error': str(data['error'].get('message', data['error']))[:200]}
+        print(f"⚠️ Could not check {platform} token: {str(data.get('error', data))[:200]}")
+        return None
+
+    def status(self, platform, token, now=None, refresh=False):
+        """
+        Get what is known about a token, checking with the platform when the
+        last check is older than TOKEN_CHECK_HOURS
+
+        Args:
+            platform (str): 'instagram', 'threads' or 'tiktok'
+            token (str): Access token
+            refresh (bool): Check with the platform even if the state is recent
+
+        Returns:
+            dict: valid (None if unknown), expires_at, checked_at, error
+        """
+        now = now or datetime.now()
+        with _LOCK:
+            entry = dict(self.state.get(self._key(platform, token), {}))
+
+        checked_at = entry.get('checked_at')
+        if refresh or not checked_at or now - datetime.fromisoformat(checked_at) > self.check_interval:
+            result = self._inspect(platform, token)
+            if result is not None:
+                if result.get('expires_at') is None:
+                    # debug_token reports 0 for non-expiring tokens; keep a recorded expiry
+                    result.pop('expires_at', None)
+                entry = self._update(platform, token, checked_at=now.isoformat(), **result)
+        return entry
+
+    def needs_renewal(self, platform, token, now=None):
+        """
+        Decide whether the renewal job should renew a token now
+
+        Returns:
+            tuple: (renew, reason)
+        """
+        now = now or datetime.now()
+        entry = self.status(platform, token, now, refresh=True)
+        if entry.get('valid') is False:
+            return True, f"token rejected ({entry.get('error')})"
+        expires_at = entry.get('expires_at')
+        if not expires_at:
+            return True, "expiry unknown"
+        remaining = datetime.fromisoformat(expires_at) - now
+        if remaining <= self.renew_window:
+            return True, f"expires in {remaining.days} days"
+        return False, f"expires in {remaining.days} days (renewing within {self.renew_window.days})"
+
+    def check(self, platform, token, now=None):
+        """
+        Decide whether a token is good for a post (usually no network call)
+
+        Args:
+            platform (str): Platform name (platforms without tracked tokens always pass)
+            token (str): Access token
+
+        Returns:
+            tuple: (fresh, reason)
+        """
+        if platform not in TOKEN_CREDENTIALS or not token:
+            return True, None
+        now = now or datetime.now()
+        entry = self.status(platform, token, now)
+        if entry.get('valid') is False:
+            return False, f"access token rejected ({entry.get('error')})"
+        expires_at = entry.get('expires_at')
+        if expires_at and datetime.fromisoformat(expires_at) - now < self.min_valid:
+            return False, f"access token expires at {expires_at[:16]}"
+        return True, None
+
+    def renewal_due_at(self, platform, token):
+        """
+        When the renewal window for a token opens
+
+        Returns:
+            datetime: Start of the renewal window, or None if the expiry is unknown
+        """
+        with _LOCK:
+            expires_at = self.state.get(self._key(platform, token), {}).get('expires_at')
+        return datetime.fromisoformat(expires_at) - self.renew_window if expires_at else None
+
+
+def update_env_file(tokens, dry_run=False, env_file='.env'):
+    """
+    Update .env file with new tokens in one atomic write
+    
+    Args:
+        tokens (dict): Dictionary of token_name -> token_value
+        dry_run (bool): If True, simulate without writing
+        env_file (str): File to update
+    """
+    if dry_run:
+        for token_name in tokens:
+            print(f"📝 [DRY RUN] Would update {token_name} in .env")
+        return
+    
+    try:
+        with file_lock(env_file):
+            if os.path.exists(env_file):
+                with open(env_file, 'r') as f:
+                    lines = f.readlines()
+            else:
+                lines = []
+            
+            pending = dict(tokens)
+            for i, line in enumerate(lines):
+                token_name = line.split('=', 1)[0]
+                if token_name in pending:
+                    lines[i] = f'{token_name}={pending.pop(token_name)}\n'
+            
+            if lines and not lines[-1].endswith('\n'):
+                lines[-1] += '\n'
+            lines.extend(f'{token_name}={value}\n' for token_name, value in pending.items())
+            
+            # A new .env holds secrets, so only the owner may read it
+            atomic_write_text(env_file, ''.join(lines), None if os.path.exists(env_file) else 0o600)
+        
+        for token_name in tokens:
+            print(f"✅ Updated {token_name} in .env file")
+        
+    except Exception as e:
+        print(f"❌ Error updating .env file: {e}")
+
+
+def load_stored_token(token_name, output_file=TOKEN_OUTPUT_FILE):
+    """
+    Get a token stored by store_rotated_token() that is not in the secrets yet
+
+    Returns:
+        str: Stored token, or None if there is none
+    """
+    try:
+        with open(output_file, 'r') as f:
+            return json.load(f).get(token_name)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def store_rotated_token(token_name, value, output_file=TOKEN_OUTPUT_FILE, env_file=ENV_FILE):
+    """
+    Keep a token the platform rotated during a post run
+
+    It is merged into output_file, which later processes of the same run read
+    (load_stored_token) and the workflow copies into the repository secret,
+    and written to .env when there is one, for local installs
+
+    Args:
+        token_name (str): Variable name, e.g. TIKTOK_REFRESH_TOKEN
+        value (str): New token
+    """
+    try:
+        with file_lock(output_file):
+            try:
+                with open(output_file, 'r') as f:
+                    tokens = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                tokens = {}
+            tokens[token_name] = value
+            atomic_write_json(output_file, tokens, mode=0o600)
+        print(f"✅ Rotated {token_name} written to {output_file}")
+    except Exception as e:
+        print(f"❌ Could not store rotated {token_name}: {e}")
+    if os.path.isfile(env_file):
+        update_env_file({token_name: value}, env_file=env_file)
+
+
+def refresh_tiktok_token(client_key, client_secret, refresh_token, session=None):
+    """
+    Exchange a TikTok refresh token for a new access token
+
+    Args:
+        client_key (str): TikTok app client key
+        client_secret (str): TikTok app client secret
+        refresh_token (str): Current refresh token (valid for a year)
+        session (requests.Session): Connection pool to use
+
+    Returns:
+        dict: access_token, expires_in, refresh_token (may be a new one) and
+              refresh_expires_in, or None if the refresh failed
+    """
+    import requests
+
+    try:
+        with span('tiktok.token_refresh', 'auth'):
+            response = (session or requests).post(f"{TIKTOK_API_BASE}/oauth/token/", data={
+                'client_key': client_key,
+                'client_secret': client_secret,
+                'grant_type': 'refresh_token',
+                'refresh_token': refresh_token
+            }, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+            data = response.json()
+    except Exception as e:
+        print(f"❌ TikTok: Token refresh error - {e}")
+        return None
+
+    if 'access_token' not in data:
+        print(f"❌ TikTok: Token refresh failed - {data.get('error_description') or data.get('error') or data}")
+        return None
+    return data
+
+
+class TikTokTokenProvider:
+    """
+    TikTok access tokens for one account, refreshed just in time
+
+    The access token is cached in memory with its expiry and refreshed from
+    the refresh token when less than TIKTOK_TOKEN_MARGIN_MINUTES are left, so
+    a post never starts on a token that expires halfway. Without a refresh
+    token (or app credentials) the static access token is used as is.
+    TikTok may rotate the refresh token on any refresh; the new one is stored
+    under refresh_token_name (store_rotated_token) so the next process and
+    the repository secret don't keep the stale one.
+    """
+
+    def __init__(self, access_token=None, refresh_token=None, client_key=None, client_secret=None,
+                 session=None, margin_minutes=TIKTOK_TOKEN_MARGIN_MINUTES, refresh_token_name=None):
+        self.refresh_token_name = refresh_token_name
+        # A rotation by an earlier process of this run wins over the stale secret
+        stored = load_stored_token(refresh_token_name) if refresh_token and refresh_token_name else None
+        self.refresh_token = stored or refresh_token
+        self.client_key = client_key
+        self.client_secret = client_secret
+        self.session = session
+        self.margin = timedelta(minutes=margin_minutes)
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._static_token = access_token
+        self._access_token = None
+        self._expires_at = None
+
+    @property
+    def can_refresh(self):
+        """True when the refresh token and app credentials are all set"""
+        return bool(self.refresh_token and self.client_key and self.client_secret)
+
+    @property
+    def configured(self):
+        """True when there is a static token or one can be refreshed"""
+        return self.can_refresh or bool(self._static_token)
+
+    def get(self, now=None):
+        """
+        Get an access token that stays valid for the next few minutes
+
+        Returns:
+            str: Access token, or None if it could not be refreshed
+        """
+        if not self.can_refresh:
+            return self._static_token
+
+        now = now or datetime.now()
+        with self._lock:
+            if self._access_token and self._expires_at - now > self.margin:
+                return self._access_token
+
+            data = refresh_tiktok_token(self.client_key, self.client_secret, self.refresh_token, self.session)
+            if data is None:
+                self.last_error = "TikTok access token refresh failed"
+                self._access_token = None
+                return None
+
+            self.last_error = None
+            self._access_token = data['access_token']
+            self._expires_at = now + timedelta(seconds=int(data.get('expires_in', 86400)))
+            if data.get('refresh_token') and data['refresh_token'] != self.refresh_token:
+                self.refresh_token = data['refresh_token']
+                print("🔑 TikTok: Refresh token rotated")
+                if self.refresh_token_name:
+                    store_rotated_token(self.refresh_token_name, self.refresh_token)
+                else:
+                    print("⚠️ TikTok: No variable to store the rotated refresh token in, keeping it in memory")
+            print(f"🔑 TikTok: Access token refreshed (valid until {self._expires_at.isoformat(timespec='minutes')})")
+            return self._access_token
+
+    def invalidate(self):
+        """Drop the cached access token (e.g. after TikTok rejected it)"""
+        with self._lock:
+            self._access_token = None
+            self._expires_at = None
+
+
+def get_token_manager():
+    """Process-wide token manager shared by all publishers and accounts"""
+    global _MANAGER
+    with _LOCK:
+        if _MANAGER is None:
+            _MANAGER = TokenManager()
+        return _MANAGER
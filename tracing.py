@@ -0,0 +1,244 @@
+"""
+Run tracing
+Times the hot paths of a run (HTTP calls, status polls, ffmpeg, PIL, S3
+transfers, queue load/save) as spans, writes them as a Chrome trace
+(open in chrome://tracing or https://ui.perfetto.dev) and prints a summary
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import TRACING_ENABLED, TRACE_DIR
+
+
+# Spans kept per run; a long daemon job cannot grow the buffer without bound
+MAX_EVENTS = 50000
+
+# How many span names the end-of-run summary lists
+SUMMARY_ROWS = 15
+
+_LOCK = threading.Lock()
+_EVENTS = []
+_ORIGIN = time.perf_counter()
+_STARTED_AT = datetime.now()
+
+
+class Span:
+    """
+    One timed operation; set() attaches bytes, status or other details
+    """
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **fields):
+        """Attach details (bytes=..., status=...) to the span"""
+        self.args.update(fields)
+
+
+def _record(name, category, start, end, args):
+    """Store one finished span as a Chrome 'complete' event"""
+    event = {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'ts': round((start - _ORIGIN) * 1e6),
+        'dur': round((end - start) * 1e6),
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+        'args': args
+    }
+    with _LOCK:
+        if len(_EVENTS) < MAX_EVENTS:
+            _EVENTS.append(event)
+
+
+@contextmanager
+def span(name, category='app', **args):
+    """
+    Time a block of code
+
+    Args:
+        name (str): Span name, e.g. 'instagram.poll'
+        category (str): Group for the summary ('http', 'poll', 'ffmpeg', 'pil', 's3', 'queue', ...)
+        **args: Details stored with the span (bytes, status, ...)
+
+    Yields:
+        Span: Call .set(...) to add details once they are known
+    """
+    current = Span(name, category, args)
+    if not TRACING_ENABLED:
+        yield current
+        return
+
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.args.setdefault('status', 'error')
+        current.args.setdefault('error', str(e)[:200])
+        raise
+    finally:
+        current.args.setdefault('status', 'ok')
+        _record(current.name, current.category, start, time.perf_counter(), current.args)
+
+
+def _response_hook(response, *args, **kwargs):
+    """requests response hook: one 'http' span per request"""
+    end = time.perf_counter()
+    request = response.request
+    body = request.body
+    if isinstance(body, (bytes, str)):
+        sent = len(body)
+    else:
+        sent = int(request.headers.get('Content-Length', 0) or 0)
+    received = response.headers.get('Content-Length')
+
+    # The query string is dropped: Graph API calls carry the access token in it
+    url = response.url.split('?', 1)[0]
+    host = url.split('/')[2] if '://' in url else url
+    _record(f"{request.method} {host}", 'http', end - response.elapsed.total_seconds(), end, {
+        'url': url,
+        'status': response.status_code,
+        'bytes_sent': sent,
+        'bytes': int(received) if received and received.isdigit() else None
+    })
+    return response
+
+
+def trace_session(session):
+    """
+    Record a span for every request made through a requests session
+
+    Args:
+        session (requests.Session): Session to instrument (idempotent)
+
+    Returns:
+        requests.Session: The same session
+    """
+    if TRACING_ENABLED:
+        hooks = session.hooks.setdefault('response', [])
+        if _response_hook not in hooks:
+            hooks.append(_response_hook)
+    return session
+
+
+def recorded_events():
+    """Copy of the spans recorded so far in this run"""
+    with _LOCK:
+        return list(_EVENTS)
+
+
+def reset():
+    """Drop recorded spans and restart the run clock"""
+    global _ORIGIN, _STARTED_AT
+    with _LOCK:
+        _EVENTS.clear()
+        _ORIGIN = time.perf_counter()
+        _STARTED_AT = datetime.now()
+
+
+def summarize(events=None):
+    """
+    Aggregate spans by name
+
+    Returns:
+        list: Rows with name, category, count, total/max seconds, bytes and errors,
+              slowest total first
+    """
+    if events is None:
+        events = recorded_events()
+
+    rows = {}
+    for event in events:
+        row = rows.setdefault(event['name'], {
+            'name': event['name'], 'category': event['cat'],
+            'count': 0, 'total': 0.0, 'max': 0.0, 'bytes': 0, 'errors': 0
+        })
+        seconds = event['dur'] / 1e6
+        row['count'] += 1
+        row['total'] += seconds
+        row['max'] = max(row['max'], seconds)
+        row['bytes'] += (event['args'].get('bytes') or 0) + (event['args'].get('bytes_sent') or 0)
+        status = event['args'].get('status')
+        if status in ('error', 'failed', 'timeout') or (isinstance(status, int) and status >= 400):
+            row['errors'] += 1
+    return sorted(rows.values(), key=lambda row: row['total'], reverse=True)
+
+
+def export(run_name, trace_dir=TRACE_DIR):
+    """
+    Write the recorded spans as a Chrome trace file
+
+    Args:
+        run_name (str): Command or job the trace belongs to
+        trace_dir (str): Folder for trace files
+
+    Returns:
+        str: Path of the trace file, or None if nothing was recorded
+    """
+    events = recorded_events()
+    if not events:
+        return None
+
+    threads = {event['tid'] for event in events}
+    metadata = [{
+        'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+        'args': {'name': f"{run_name} {_STARTED_AT.isoformat(timespec='seconds')}"}
+    }] + [{
+        'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+        'args': {'name': 'main' if tid == threading.main_thread().ident else f"worker-{index}"}
+    } for index, tid in enumerate(sorted(threads))]
+
+    path = os.path.join(trace_dir, f"{_STARTED_AT.strftime('%Y%m%d-%H%M%S')}-{run_name}.json")
+    try:
+        os.makedirs(trace_dir, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+    except OSError as e:
+        print(f"⚠️ Could not write trace: {e}")
+        return None
+    return path
+
+
+def print_summary(rows=None):
+    """Print where the run spent its time, slowest span names first"""
+    rows = summarize() if rows is None else rows
+    if not rows:
+        return
+
+    print(f"\n⏱️ Time by span ({time.perf_counter() - _ORIGIN:.1f}s wall):")
+    for row in rows[:SUMMARY_ROWS]:
+        details = f"{row['count']}x  total {row['total']:.2f}s  max {row['max']:.2f}s"
+        if row['bytes'] >= 1e6:
+            details += f"  {row['bytes'] / 1e6:.1f} MB"
+        elif row['bytes']:
+            details += f"  {row['bytes'] / 1e3:.1f} KB"
+        if row['errors']:
+            details += f"  {row['errors']} failed"
+        print(f"   {row['category']:<9} {row['name']:<34} {details}")
+
+
+def finish_run(run_name):
+    """
+    Export the trace for this run and print its summary, then start a new run
+
+    Args:
+        run_name (str): Command or job the trace belongs to
+
+    Returns:
+        str: Path of the trace file, or None if tracing is off or nothing was recorded
+    """
+    if not TRACING_ENABLED:
+        return None
+    path = export(run_name)
+    if path:
+        print_summary()
+        print(f"🧭 Trace written to {path}")
+    reset()
+    return path